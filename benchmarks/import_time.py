@@ -0,0 +1,35 @@
+"""
+Measures the time it takes to start a fresh interpreter, import powercmd and
+run a single command, i.e. the cost of a one-shot, non-interactive invocation.
+
+Usage: python benchmarks/import_time.py [REPEATS]
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+SCRIPTS = {
+    'python startup': 'pass',
+    'import powercmd': 'import powercmd',
+    'onecmd': 'import powercmd; powercmd.Cmd().onecmd("help")',
+    'import prompt_toolkit': 'import prompt_toolkit',
+}
+
+
+def measure(script: str, repeats: int) -> float:
+    """Returns the best wall clock time of running SCRIPT, in seconds."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.check_call([sys.executable, '-c', script], cwd=root, stdout=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == '__main__':
+    REPEATS = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for name, code in SCRIPTS.items():
+        print('%-24s %8.1f ms' % (name, measure(code, REPEATS) * 1000))
@@ -0,0 +1,65 @@
+"""
+Measures memory used by a command registry and by parsed command lines.
+
+Usage: python benchmarks/memory.py [COMMANDS]
+"""
+
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from powercmd.command import Command
+from powercmd.command_line import CommandLine
+from powercmd.commands_dict import CommandsDict
+
+
+def make_handler(index: int):
+    """Returns a distinct command handler with a few annotated parameters."""
+    def handler(self, first: int, second: str = '', third: float = 0.0):
+        pass
+    handler.__name__ = 'do_command_%d' % index
+    return handler
+
+
+def measure(build) -> int:
+    """
+    Returns the number of bytes owned by the object returned by BUILD, i.e.
+    released once it is dropped. Caches populated as a side effect, like
+    function annotations, are not counted.
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    del result
+    gc.collect()
+    remaining, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size - remaining
+
+
+def build_registry(handlers) -> CommandsDict:
+    """Returns a registry of HANDLERS, named as if collected from methods."""
+    registry = CommandsDict()
+    for handler in handlers:
+        name = handler.__name__[len('do_'):]
+        registry[name] = Command(name=name, handler=handler)
+    return registry
+
+
+def build_cmdlines(count: int):
+    """Returns COUNT parsed command lines with positional and named arguments."""
+    return [CommandLine('command_%d 1 "two words" third=3.0' % i) for i in range(count)]
+
+
+if __name__ == '__main__':
+    COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    HANDLERS = [make_handler(i) for i in range(COUNT)]
+    for name, build in [('command registry', lambda: build_registry(HANDLERS)),
+                        ('parsed command lines', lambda: build_cmdlines(COUNT))]:
+        print('%-24s %8.1f KiB per 1k' % (name, measure(build) / COUNT * 1000 / 1024))
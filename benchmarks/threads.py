@@ -0,0 +1,59 @@
+"""
+Measures throughput of a single Cmd instance executing commands from multiple
+threads at once, as when embedded in a threaded service.
+
+Usage: python benchmarks/threads.py [COMMANDS_PER_THREAD]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from powercmd.cmd import Cmd
+
+
+class BenchmarkCmd(Cmd):
+    def do_add(self, first: int, second: int):
+        return first + second
+
+    def do_wait(self, seconds: float):
+        time.sleep(seconds)
+
+
+def measure(cmd: Cmd,
+            line: str,
+            threads: int,
+            count: int) -> float:
+    """Returns the number of LINE executions per second with THREADS threads."""
+    barrier = threading.Barrier(threads + 1)
+
+    def run():
+        barrier.wait()
+        for _ in range(count):
+            cmd.onecmd(line)
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return threads * count / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    CMD = BenchmarkCmd()
+    for name, line, count in [('cpu-bound: add', 'add 1 2', COUNT),
+                              ('io-bound: wait 1ms', 'wait 0.001', COUNT // 10)]:
+        for threads in [1, 2, 4, 8]:
+            with contextlib.redirect_stdout(io.StringIO()):
+                rate = measure(CMD, line, threads, count)
+            print('%-20s %2d threads %10.0f commands/s' % (name, threads, rate))
@@ -1,3 +1,5 @@
+import sys
+
 import powercmd
 from powercmd.match_string import match_string
 
@@ -60,4 +62,5 @@ class SimpleCmd(powercmd.Cmd):
 
 
 if __name__ == '__main__':
-    SimpleCmd().cmdloop()
+    # `simple.py sum 1 2` runs a single command, `simple.py` starts a shell
+    sys.exit(SimpleCmd.main())
@@ -2,6 +2,10 @@
 powercmd - An utility for building typesafe line-oriented command interpreters.
 """
 
+from .cache import cacheable, cached
+from .cancellation import CancellationToken, timeout
 from .cmd import Cmd
+from .concurrency import ConcurrencyLimit, concurrency_limit
 
-__all__ = ['Cmd']
+__all__ = ['CancellationToken', 'Cmd', 'ConcurrencyLimit', 'cacheable', 'cached', 'concurrency_limit',
+           'timeout']
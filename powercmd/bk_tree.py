@@ -0,0 +1,131 @@
+"""
+Metric index for finding strings within a given edit distance.
+"""
+
+from typing import Callable, Iterable, List, Tuple
+
+
+def levenshtein_distance(first: str,
+                         second: str) -> int:
+    """
+    Returns the minimum number of single-character insertions, deletions or
+    substitutions required to turn FIRST into SECOND.
+    """
+    if len(first) < len(second):
+        first, second = second, first
+
+    previous = list(range(len(second) + 1))
+    for i, first_char in enumerate(first, start=1):
+        current = [i]
+        for j, second_char in enumerate(second, start=1):
+            current.append(min(previous[j] + 1,
+                               current[j - 1] + 1,
+                               previous[j - 1] + (first_char != second_char)))
+        previous = current
+
+    return previous[-1]
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree: an index of strings that allows finding all elements
+    within a given DISTANCE of a query without comparing it to every element.
+
+    DISTANCE must be a metric (in particular, satisfy the triangle inequality).
+    """
+    class _Node:
+        __slots__ = ('word', 'alive', 'children')
+
+        def __init__(self, word: str):
+            self.word = word
+            self.alive = True
+            # most nodes are leaves; their children dict is only allocated
+            # once needed
+            self.children = None
+
+    def __init__(self,
+                 words: Iterable[str] = (),
+                 distance: Callable[[str, str], int] = levenshtein_distance):
+        self._distance = distance
+        self._root = None
+        self._size = 0
+        for word in words:
+            self.add(word)
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, word: str):
+        node = self._find(word)
+        return node is not None and node.alive
+
+    def _find(self, word: str):
+        """Returns the node holding WORD, or None if there is none."""
+        node = self._root
+        while node is not None:
+            dist = self._distance(word, node.word)
+            if dist == 0:
+                return node
+            node = node.children.get(dist) if node.children else None
+        return None
+
+    def add(self, word: str):
+        """Inserts WORD into the tree. Does nothing if it is already there."""
+        if self._root is None:
+            self._root = BKTree._Node(word)
+            self._size += 1
+            return
+
+        node = self._root
+        while True:
+            dist = self._distance(word, node.word)
+            if dist == 0:
+                if not node.alive:
+                    node.alive = True
+                    self._size += 1
+                return
+
+            if node.children is None:
+                node.children = {}
+            child = node.children.get(dist)
+            if child is None:
+                node.children[dist] = BKTree._Node(word)
+                self._size += 1
+                return
+            node = child
+
+    def remove(self, word: str):
+        """
+        Removes WORD from the tree. The node is only marked as deleted, so that
+        the structure of the tree stays valid.
+        """
+        node = self._find(word)
+        if node is None or not node.alive:
+            raise KeyError(word)
+        node.alive = False
+        self._size -= 1
+
+    def find(self,
+             word: str,
+             max_distance: int) -> List[Tuple[int, str]]:
+        """
+        Returns a list of (distance, element) pairs for all elements within
+        MAX_DISTANCE of WORD, closest first.
+        """
+        if self._root is None:
+            return []
+
+        results = []
+        candidates = [self._root]
+        while candidates:
+            node = candidates.pop()
+            dist = self._distance(word, node.word)
+            if dist <= max_distance and node.alive:
+                results.append((dist, node.word))
+
+            # copied at once, as another thread may be adding children
+            for child_dist, child in tuple((node.children or {}).items()):
+                if dist - max_distance <= child_dist <= dist + max_distance:
+                    candidates.append(child)
+
+        return sorted(results)
@@ -0,0 +1,199 @@
+"""
+Caching results of pure command handlers, and values parsed from strings.
+
+Example:
+    class MyCmd(powercmd.Cmd):
+        @powercmd.cached(maxsize=256, ttl=60)
+        def do_lookup(self, host: str):
+            return expensive_dns_query(host)
+
+Argument types with immutable instances that are expensive to parse may opt
+in to reusing values parsed from the same string:
+
+    @powercmd.cacheable(maxsize=4096)
+    class Host:
+        @staticmethod
+        def powercmd_parse(text):
+            ...
+
+Setting a `powercmd_cacheable = True` class attribute does the same, with
+the default cache size. Enums need the decorator, as their class attributes
+become members.
+"""
+
+import collections
+import collections.abc
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional
+
+_MISSING = object()
+
+# number of values kept for types with powercmd_cacheable = True
+PARSE_CACHE_SIZE = 1024
+
+# type -> LruCache mapping strings to values of that type
+_PARSE_CACHES = {}
+_PARSE_CACHES_LOCK = threading.Lock()
+
+
+class LruCache:
+    """
+    A bounded mapping that evicts least recently used entries once it holds
+    MAXSIZE of them. If TTL is given, entries older than TTL seconds are
+    considered missing. Safe to use from multiple threads.
+    """
+    def __init__(self,
+                 maxsize: int = 128,
+                 ttl: float = None):
+        if maxsize <= 0:
+            raise ValueError('maxsize must be positive, got %d' % (maxsize,))
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()  # key -> (expiry time, value)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self,
+            key: Hashable,
+            default: Any = None) -> Any:
+        """Returns the value cached for KEY, or DEFAULT if there is none."""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                expiry, value = entry
+                if expiry is None or time.monotonic() < expiry:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            self.misses += 1
+            return default
+
+    def put(self,
+            key: Hashable,
+            value: Any):
+        """Stores VALUE for KEY, evicting the least recently used entry if full."""
+        expiry = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expiry, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Removes all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        """Returns the fraction of lookups that found a cached value."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __str__(self):
+        return ('%d/%d entries, %d hits, %d misses (%.1f%% hit rate), %d evictions'
+                % (len(self), self.maxsize, self.hits, self.misses,
+                   self.hit_rate * 100, self.evictions))
+
+
+def _freeze(value: Any) -> Hashable:
+    """Returns a hashable equivalent of VALUE, converting common containers."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, set):
+        return frozenset(_freeze(item) for item in value)
+    if isinstance(value, collections.abc.Iterator):
+        raise TypeError('iterators cannot be used as cache keys')
+    hash(value)
+    return value
+
+
+def make_key(args: Mapping[str, Any]) -> Optional[Hashable]:
+    """
+    Returns a cache key for a handler call with ARGS, or None if some of the
+    argument values are not hashable.
+    """
+    try:
+        return tuple(sorted((name, _freeze(value)) for name, value in args.items()))
+    except TypeError:
+        return None
+
+
+def get_cache(handler: Callable) -> Optional[LruCache]:
+    """
+    Returns the cache of HANDLER marked as @cached, or None if it is not
+    cached. Lazily loaded handlers that were not loaded yet are not imported
+    and considered uncached.
+    """
+    if getattr(handler, 'loaded', True) is False:
+        return None
+    return getattr(handler, 'powercmd_cache', None)
+
+
+def cached(maxsize: int = 128,
+           ttl: float = None) -> Callable[[Callable], Callable]:
+    """
+    Marks a command handler as a pure function of its arguments: the results
+    of up to MAXSIZE most recent calls are kept for TTL seconds (forever if
+    None) and returned instead of calling the handler again with the same
+    arguments. Results that are iterators are never cached.
+
+    Hit rate can be displayed with the `stats` command, and the cache dropped
+    using `invalidate`.
+    """
+    def decorator(handler: Callable) -> Callable:
+        handler.powercmd_cache = LruCache(maxsize, ttl)
+        return handler
+
+    return decorator
+
+
+def get_parse_cache(cls: type) -> Optional[LruCache]:
+    """
+    Returns the cache of values of CLS parsed from strings, or None if CLS
+    does not opt in to caching with a `powercmd_cacheable` attribute. Every
+    type gets its own cache, even if it inherits the attribute.
+    """
+    size = getattr(cls, 'powercmd_cacheable', None)
+    if not size:
+        return None
+
+    with _PARSE_CACHES_LOCK:
+        cache = _PARSE_CACHES.get(cls)
+        if cache is None:
+            cache = LruCache(PARSE_CACHE_SIZE if size is True else size)
+            _PARSE_CACHES[cls] = cache
+        return cache
+
+
+def get_parse_caches() -> Dict[type, LruCache]:
+    """Returns all caches of parsed values created so far, by type."""
+    with _PARSE_CACHES_LOCK:
+        return dict(_PARSE_CACHES)
+
+
+def cacheable(maxsize: int = PARSE_CACHE_SIZE) -> Callable[[type], type]:
+    """
+    Marks an argument type as safe to share instances of: values parsed from
+    up to MAXSIZE most recently used strings are reused instead of being
+    parsed again. Instances must not be modified by command handlers.
+
+    Hit rate can be displayed with the `stats` command.
+    """
+    def decorator(cls: type) -> type:
+        cls.powercmd_cacheable = maxsize
+        return cls
+
+    return decorator
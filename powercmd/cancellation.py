@@ -0,0 +1,193 @@
+"""
+Command time limits and cooperative cancellation.
+
+A command may declare a time limit with the @timeout decorator; `Cmd` can
+also define a default one for all commands. Such commands run in a worker
+thread, so that the prompt is available again once the limit passes, even if
+the handler is stuck.
+
+Python threads cannot be stopped from outside, so handlers that may run for
+long should check for cancellation themselves. To do that, a handler declares
+a parameter annotated as CancellationToken. That parameter is not a command
+argument: a token is passed to it automatically, and gets cancelled when the
+command times out or the user presses Ctrl-C.
+
+Example:
+    class MyCmd(powercmd.Cmd):
+        @powercmd.timeout(30)
+        def do_crawl(self, url: str, token: powercmd.CancellationToken):
+            for page in pages(url):
+                token.raise_if_cancelled()
+                process(page)
+
+`async def` handlers are run in an event loop, and get cancelled through
+task cancellation.
+"""
+
+import contextlib
+import inspect
+import threading
+from typing import Any, Callable, Coroutine, Mapping, Optional, Sequence
+
+from powercmd.exceptions import CommandCancelled, CommandTimeout
+from powercmd.output_capture import capture_output, captured_stream
+
+
+class CancellationToken:
+    """
+    A flag signaling that a command should stop as soon as possible.
+    """
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        """Checks if cancellation was requested."""
+        return self._event.is_set()
+
+    def cancel(self):
+        """Requests cancellation, calling all registered callbacks."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        for callback in callbacks:
+            callback()
+
+    def add_callback(self, callback: Callable[[], Any]):
+        """
+        Registers CALLBACK to be called once cancellation is requested. If it
+        already was, CALLBACK is called immediately.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def raise_if_cancelled(self):
+        """Raises CommandCancelled if cancellation was requested."""
+        if self.cancelled:
+            raise CommandCancelled()
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Blocks for up to TIMEOUT seconds, or until cancellation is requested.
+        Returns True in the latter case. Useful as an interruptible sleep.
+        """
+        return self._event.wait(timeout)
+
+
+def timeout(seconds: Optional[float]) -> Callable[[Callable], Callable]:
+    """
+    Limits the time a command handler may run to SECONDS. After that, the
+    command fails with CommandTimeout and its cancellation token, if any, is
+    cancelled. None removes the limit, overriding the default one of `Cmd`.
+    """
+    def decorator(handler: Callable) -> Callable:
+        handler.powercmd_timeout = seconds
+        return handler
+
+    return decorator
+
+
+def run_coroutine(coro: Coroutine,
+                  token: CancellationToken = None,
+                  limit: float = None) -> Any:
+    """
+    Runs CORO in a new event loop until it completes, LIMIT seconds pass or
+    TOKEN gets cancelled. In the last two cases the task running CORO is
+    cancelled and CommandTimeout or CommandCancelled is raised.
+    """
+    import asyncio  # slow to import, and rarely needed
+
+    async def main():
+        task = asyncio.ensure_future(coro)
+        if token is not None:
+            loop = asyncio.get_running_loop()
+
+            def cancel_task():
+                with contextlib.suppress(RuntimeError):  # loop already closed
+                    loop.call_soon_threadsafe(task.cancel)
+
+            token.add_callback(cancel_task)
+
+        try:
+            return await asyncio.wait_for(task, limit)
+        except asyncio.TimeoutError:
+            raise CommandTimeout(limit) from None
+        except asyncio.CancelledError:
+            raise CommandCancelled() from None
+
+    try:
+        return asyncio.run(main())
+    except KeyboardInterrupt:
+        if token is not None:
+            token.cancel()
+        raise CommandCancelled() from None
+
+
+def call_cancellable(handler: Callable,
+                     args: Sequence[Any],
+                     kwargs: Mapping[str, Any],
+                     limit: float = None,
+                     token_param: str = None,
+                     on_exit: Callable[[], Any] = None) -> Any:
+    """
+    Calls HANDLER with ARGS and KWARGS in a worker thread and waits up to
+    LIMIT seconds (indefinitely if None) for the result. If TOKEN_PARAM is
+    given, a CancellationToken is passed to HANDLER as that keyword argument.
+    ON_EXIT, if given, is called once HANDLER actually returns.
+
+    Raises CommandTimeout if the time limit passes, or CommandCancelled on
+    KeyboardInterrupt; in both cases the token is cancelled, but the handler
+    may still be running in the background. Output of the handler is captured
+    the same way as output of the calling thread.
+    """
+    token = CancellationToken()
+    if token_param is not None:
+        kwargs = dict(kwargs)
+        kwargs[token_param] = token
+
+    if inspect.iscoroutinefunction(handler):
+        try:
+            return run_coroutine(handler(*args, **kwargs), token, limit)
+        finally:
+            if on_exit is not None:
+                on_exit()
+
+    stream = captured_stream()
+    done = threading.Event()
+    outcome = {}
+
+    def worker():
+        try:
+            with capture_output(stream) if stream is not None else contextlib.nullcontext():
+                result = handler(*args, **kwargs)
+                if inspect.iscoroutine(result):
+                    result = run_coroutine(result, token)
+                outcome['result'] = result
+        # re-raised in the calling thread
+        except BaseException as e:  # pylint: disable=broad-except
+            outcome['error'] = e
+        finally:
+            if on_exit is not None:
+                on_exit()
+            done.set()
+
+    threading.Thread(target=worker, name='powercmd worker', daemon=True).start()
+    try:
+        if not done.wait(limit):
+            token.cancel()
+            raise CommandTimeout(limit)
+    except KeyboardInterrupt:
+        token.cancel()
+        raise CommandCancelled() from None
+
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
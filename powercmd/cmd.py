@@ -4,6 +4,38 @@ powercmd - A generic class to build typesafe line-oriented command interpreters.
 As in Cmd module, methods starting with 'do_' are considered command handlers.
 That behavior can be changed by overriding the `get_command_prefixes` method.
 
+An attribute with a command prefix that holds another `Cmd` instance defines
+a group of subcommands: `do_cluster = ClusterCmd()` makes `cluster restart`
+invoke `ClusterCmd.do_restart`.
+
+Commands are collected from attributes once, when the first command is
+executed. Afterwards, commands can be changed with `add_command` and
+`remove_command`, or by setting and deleting `do_*` attributes of the
+instance. Attributes added to the class after that are not noticed by
+existing instances.
+
+Commands can be chained with `|`: in `produce | consume`, whatever `produce`
+returns is iterated over and passed to the first `consume` parameter annotated
+as `Iterable[T]`. String items are converted to T as if they were typed in the
+command line. If the last command returns an iterator, its items are printed.
+Only a separate `|` word chains commands, and commands after the first one
+must be given by their full names.
+
+Commands can be given a time limit with `@powercmd.timeout(seconds)` and stop
+cooperatively using a `CancellationToken` parameter; `async def` handlers are
+supported too. See `powercmd.cancellation` for details.
+
+The number of concurrently running commands can be limited per command with
+`@powercmd.concurrency_limit(n)` or for all of them with `CONCURRENCY_LIMIT`,
+see `powercmd.concurrency`. Built-in commands, like `help` or `stats`, are
+not subject to `CONCURRENCY_LIMIT`.
+
+Long or multi-line arguments can be given as heredocs (`name=<<TAG`, see
+`powercmd.command_line`) or read from files (`name=@path`, see
+`powercmd.file_input`). The latter needs to be enabled with `FILE_ARGUMENTS`.
+Built-in commands reading files, like `bulk`, are refused at every level of
+command groups if `FILE_ACCESS` is disabled.
+
 All command handler arguments must have a type annotation. Actual values passed
 to the command handler are not strings typed by the user, but objects of
 appropriate types hinted by the annotations, which are constructed as follows:
@@ -34,35 +66,118 @@ Example:
             pass
 """
 
+import collections
+import collections.abc
+import csv
 import inspect
+import itertools
 import os
 import sys
+import threading
+import time
 import traceback
+import types
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Mapping, Sequence, Tuple, Union
 
-from prompt_toolkit import PromptSession
-from prompt_toolkit.history import History
-from prompt_toolkit.patch_stdout import patch_stdout
-from prompt_toolkit.styles import Style
-
-from powercmd.command import Command
+from powercmd.cache import get_cache, get_parse_caches
+from powercmd.command import Command, CommandGroup
 from powercmd.command_invoker import CommandInvoker
-from powercmd.command_line import CommandLine
+from powercmd.command_line import CommandLine, heredoc_tags, split_heredocs, split_pipeline
 from powercmd.commands_dict import CommandsDict
-from powercmd.completer import Completer
-from powercmd.exceptions import InvalidInput
+from powercmd.concurrency import get_concurrency_limit
+from powercmd.exceptions import CommandCancelled, CommandTimeout, InvalidInput
+from powercmd.lazy_command import LazyCommand, LazyHandler
+from powercmd.type_info import type_name
+
+if TYPE_CHECKING:
+    # prompt_toolkit is slow to import, and only needed by interactive cmdloop
+    from prompt_toolkit.history import History  # pylint: disable=unused-import
+    from powercmd.journal import Journal  # pylint: disable=unused-import
+
+
+# Result of a single command execution: the value returned by its handler and
+# a TracebackException describing the error, if any
+CommandOutcome = collections.namedtuple('CommandOutcome', ['result', 'error'])
+
+
+def _unbind(f: Callable) -> Callable:
+    """
+    Returns the base function if the argument is a bound one.
+
+    https://bugs.python.org/msg166144
+    """
+    if not callable(f):
+        raise TypeError('%s is not callable' % (repr(f),))
+
+    self = getattr(f, '__self__', None)
+    if (self is not None
+            and not isinstance(self, types.ModuleType)
+            and not isinstance(self, type)):
+        if hasattr(f, '__func__'):
+            return f.__func__
+        return getattr(type(f.__self__), f.__name__)
+
+    return f
+
+
+def _builtin(handler: Callable) -> Callable:
+    """
+    Marks HANDLER as a built-in command, not subject to `Cmd.CONCURRENCY_LIMIT`,
+    so that e.g. `stats` works even if all slots are taken.
+    """
+    handler.powercmd_builtin = True
+    return handler
+
+
+def _reads_files(handler: Callable) -> Callable:
+    """
+    Marks HANDLER as a command reading files named by the user, refused if
+    `Cmd.FILE_ACCESS` is not set.
+    """
+    handler.powercmd_reads_files = True
+    return handler
 
 
 class Cmd:
     """
     A simple framework for writing typesafe line-oriented command interpreters.
+
+    `onecmd` may be called from multiple threads at once. The command registry
+    is built once, guarded by a lock, and then looked up without locking. The
+    outcome of each command is tracked separately for every call; only the
+    recent errors shown by `get_error` and `stats` counters are shared.
     """
-    def __init__(self, history: History = None):
-        self._last_exception = None
-        self._session = PromptSession(history=history)
+    # number of recent errors kept for the `get_error` command
+    MAX_ERRORS = 16
+    # time limit for commands not decorated with @timeout, in seconds
+    DEFAULT_TIMEOUT = None
+    # ConcurrencyLimit shared by all commands of all instances of the class
+    CONCURRENCY_LIMIT = None
+    # whether arguments may be read from files given as @path
+    FILE_ARGUMENTS = False
+    # whether commands may read files named by the user, like `bulk`
+    FILE_ACCESS = True
+
+    def __init__(self,
+                 history: 'History' = None,
+                 journal: 'Journal' = None):
+        self._errors = collections.deque(maxlen=self.MAX_ERRORS)
+        self._timeouts = collections.Counter()
+        self._cancellations = collections.Counter()
+        self._stats_lock = threading.Lock()
+        self._journal = journal
+        self._commands = None
+        self._commands_lock = threading.Lock()
+        self._history = history
+        self._session = None
+        self._completer = None
         self._loop = True
 
         self.prompt = '> '
-        self.prompt_style = Style.from_dict({'': 'bold'})
+        # prompt displayed while reading heredoc lines
+        self.continuation_prompt = '... '
+        # prompt_toolkit Style of the interactive prompt; None means bold
+        self.prompt_style = None
 
     # pylint: disable=no-self-use
     def get_command_prefixes(self):
@@ -79,15 +194,89 @@ class Cmd:
         """
         return {'do_': ''}
 
-    def do_get_error(self):
+    @_builtin
+    def do_get_error(self,
+                     index: int = 0):
         """
-        Displays an exception thrown by last command.
+        Displays an exception thrown by a recent command: the last one by
+        default, INDEX commands earlier otherwise.
         """
-        if self._last_exception is None:
+        if not self._errors:
             print('no errors')
+        elif not 0 <= index < len(self._errors):
+            print('no such error: %d (recent errors: 0-%d)' % (index, len(self._errors) - 1))
         else:
-            traceback.print_exception(*self._last_exception)
+            print(''.join(self._errors[index].format()), end='')
 
+    @_builtin
+    def do_stats(self):
+        """
+        Displays runtime statistics of commands, like hit rates of @cached ones
+        and of cacheable argument types, concurrency limit usage or the number
+        of times they timed out or were cancelled.
+        """
+        if self.CONCURRENCY_LIMIT is not None:
+            print('all commands: concurrency: %s' % (self.CONCURRENCY_LIMIT,))
+        for cls, cache in sorted(get_parse_caches().items(), key=lambda item: type_name(item[0])):
+            print('%s: parse cache: %s' % (type_name(cls), cache))
+        for name, cmd in sorted(self._get_all_commands().items()):
+            cache = get_cache(cmd.handler)
+            if cache is not None:
+                print('%s: cache: %s' % (name, cache))
+            limit = get_concurrency_limit(cmd.handler)
+            if limit is not None:
+                print('%s: concurrency: %s' % (name, limit))
+            if self._timeouts[name] or self._cancellations[name]:
+                print('%s: timeouts: %d, cancelled: %d'
+                      % (name, self._timeouts[name], self._cancellations[name]))
+
+    @_builtin
+    def do_invalidate(self,
+                      command: str):
+        """
+        Drops results of a @cached command, forcing it to be executed again.
+        """
+        cmd = self._get_all_commands().choose(command, verbose=True)
+        cache = get_cache(cmd.handler)
+        if cache is None:
+            print('%s is not cached' % (cmd.name,))
+        else:
+            cache.clear()
+
+    @_builtin
+    @_reads_files
+    def do_bulk(self,
+                command: str,
+                path: str,
+                workers: int = 1):
+        """
+        Executes COMMAND once for each row of a CSV file at PATH (TSV if the
+        file name ends with .tsv), printing results as they are produced. If
+        every value in the first row is a parameter name, it is treated as
+        a header, and columns are matched to parameters by name. Otherwise,
+        columns are passed as positional arguments. Up to WORKERS rows are
+        executed concurrently.
+        """
+        # pylint: disable=protected-access
+        invoker = self._get_invoker(verbose=False)
+        cmd, _ = invoker._resolve_name((self,), command)
+        delimiter = '\t' if path.endswith('.tsv') else ','
+
+        with open(path, newline='') as f:
+            rows = (row for row in csv.reader(f, delimiter=delimiter) if row)
+            first = next(rows, None)
+            if first is None:
+                return
+            if all(field in cmd.parameters for field in first):
+                rows = (dict(zip(first, row)) for row in rows)
+            else:
+                rows = itertools.chain([first], rows)
+
+            for result in self.invoke_many(command, rows, workers=workers):
+                if result is not None:
+                    print(result)
+
+    @_builtin
     def do_exit(self):
         """Terminates the command loop."""
         self._loop = False
@@ -95,11 +284,13 @@ class Cmd:
         return True
 
     # pylint: disable=invalid-name
+    @_builtin
     def do_EOF(self):
         """Terminates the command loop."""
         return self.do_exit()
 
     # pylint: disable=arguments-differ
+    @_builtin
     def do_help(self,
                 topic: str = ''):
         """
@@ -118,45 +309,153 @@ class Cmd:
             print(handler.help)
         except InvalidInput:
             print('no such command: %s' % (topic,))
-            print('available commands: %s' % (' '.join(sorted(cmds)),))
+            suggestions = cmds.suggest(topic)
+            if suggestions:
+                print('did you mean: %s' % (' '.join(suggestions),))
+            else:
+                print('available commands: %s' % (' '.join(sorted(cmds)),))
+
+    def add_command(self,
+                    name: str,
+                    handler: Callable):
+        """
+        Registers HANDLER as a command available as NAME. HANDLER is called
+        the same way as `do_*` methods are, i.e. with the Cmd instance as the
+        first argument, and all its other parameters must be annotated.
 
-    def _get_all_commands(self) -> CommandsDict:
-        """Returns all defined commands."""
-        import types
+        If HANDLER is a LazyHandler, its module is not imported until the
+        command is used.
+        """
+        self._get_all_commands().add_all({name: self._make_command(name, handler)})
+
+    @staticmethod
+    def _make_command(name: str,
+                      handler: Callable) -> Command:
+        """Returns a Command calling HANDLER, lazily loaded if needed."""
+        if isinstance(handler, LazyHandler):
+            return LazyCommand(name=name, handler=handler)
+        return Command(name=name, handler=handler)
+
+    def add_manifest(self,
+                     manifest: Iterable[Mapping[str, Any]]):
+        """
+        Registers lazily loaded commands described by MANIFEST entries. See
+        `powercmd.lazy_command` for the manifest format.
+        """
+        new_commands = {}
+        for entry in manifest:
+            name, handler = LazyHandler.from_manifest_entry(entry)
+            new_commands[name] = self._make_command(name, handler)
+        self._get_all_commands().add_all(new_commands)
+
+    def remove_command(self,
+                       name: str):
+        """
+        Unregisters a command previously defined by a method or added with
+        `add_command`.
+        """
+        del self._get_all_commands()[name]
+
+    def invoke_many(self,
+                    command: str,
+                    rows: Iterable[Union[Sequence[Any], Mapping[str, Any]]],
+                    workers: int = 1) -> Iterator[Any]:
+        """
+        Executes COMMAND once for each of ROWS, returning an iterator over
+        handler results. A row is either a sequence of positional arguments or
+        a mapping of parameter names to values; strings are parsed as if they
+        were typed in the command line. COMMAND may name a subcommand of
+        a group, e.g. 'cluster restart'.
+
+        ROWS are consumed lazily, so they may be read from a file of any size.
+        If WORKERS > 1, up to that many rows are executed concurrently, but
+        results are still returned in order.
+        """
+        invoker = self._get_invoker(verbose=False)
+        return invoker.invoke_many(self, command=command, rows=rows, workers=workers)
+
+    def _get_invoker(self, verbose: bool = True) -> CommandInvoker:
+        """Returns a CommandInvoker for commands of this object."""
+        return CommandInvoker(self._get_all_commands(),
+                              verbose=verbose,
+                              default_timeout=self.DEFAULT_TIMEOUT,
+                              concurrency_limit=self.CONCURRENCY_LIMIT,
+                              file_args=self.FILE_ARGUMENTS,
+                              file_access=self.FILE_ACCESS)
 
-        def unbind(f):
-            """
-            Returns the base function if the argument is a bound one.
+    def _get_all_commands(self) -> CommandsDict:
+        """
+        Returns all defined commands. The registry is collected from methods
+        on first use and updated by `add_command`/`remove_command` and
+        instance attribute changes afterwards.
+        """
+        if self._commands is None:
+            with self._commands_lock:
+                if self._commands is None:
+                    self._commands = self._collect_commands()
+        return self._commands
+
+    def _collect_commands(self) -> CommandsDict:
+        """Returns all commands defined as methods of this object."""
+        prefixes = self.get_command_prefixes()
+        commands = {}
 
-            https://bugs.python.org/msg166144
-            """
-            if not callable(f):
-                raise TypeError('%s is not callable' % (repr(f),))
+        for name, handler in inspect.getmembers(self):
+            for cmd_name, cmd in self._member_commands(prefixes, name, handler):
+                assert cmd_name not in commands
+                commands[cmd_name] = cmd
 
-            self = getattr(f, '__self__', None)
-            if (self is not None
-                    and not isinstance(self, types.ModuleType)
-                    and not isinstance(self, type)):
-                if hasattr(f, '__func__'):
-                    return f.__func__
-                return getattr(type(f.__self__), f.__name__)
+        return CommandsDict(commands)
 
-            return f
+    @staticmethod
+    def _member_commands(prefixes: Mapping[str, str],
+                         name: str,
+                         handler: Any) -> Iterator[Tuple[str, Command]]:
+        """
+        Yields (command name, command) pairs defined by a member NAME with
+        HANDLER value, for every matching one of command PREFIXES.
+        """
+        is_group = isinstance(handler, Cmd)
+        if not callable(handler) and not is_group:
+            return
+        for prefix, substitution in prefixes.items():
+            if name.startswith(prefix):
+                cmd_name = sys.intern(substitution + name[len(prefix):])
+                if is_group:
+                    yield cmd_name, CommandGroup(name=cmd_name, handler=handler)
+                else:
+                    yield cmd_name, Command(name=cmd_name, handler=_unbind(handler))
 
-        members = inspect.getmembers(self)
+    def _update_member_commands(self,
+                                name: str):
+        """
+        Updates commands defined by attribute NAME in the registry, if it was
+        already collected, after the attribute was set or deleted.
+        """
+        commands = self.__dict__.get('_commands')
+        if commands is None:
+            return
         prefixes = self.get_command_prefixes()
-        commands = CommandsDict()
+        if not any(name.startswith(prefix) for prefix in prefixes):
+            return
 
-        for name, handler in members:
-            if not callable(handler):
-                continue
+        with self._commands_lock:
             for prefix, substitution in prefixes.items():
                 if name.startswith(prefix):
-                    assert substitution + name not in commands
                     cmd_name = substitution + name[len(prefix):]
-                    commands[cmd_name] = Command(name=cmd_name, handler=unbind(handler))
+                    if cmd_name in commands:
+                        del commands[cmd_name]
+            handler = getattr(self, name, None)
+            if handler is not None:
+                commands.update(self._member_commands(prefixes, name, handler))
 
-        return commands
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        self._update_member_commands(name)
+
+    def __delattr__(self, name):
+        super().__delattr__(name)
+        self._update_member_commands(name)
 
     def emptyline(self):
         """
@@ -165,21 +464,127 @@ class Cmd:
 
     def default(self, cmdline):
         """
-        Interprets CMDLINE as a command and executes it.
+        Interprets CMDLINE as a command and executes it. If the session has
+        a journal, the command is recorded in it.
+        """
+        if not cmdline:
+            return self.emptyline()
+        if self._journal is None:
+            return self._execute(cmdline).result
+
+        timestamp = time.time()
+        start = time.perf_counter()
+        outcome = self._execute(cmdline)
+        error = None
+        if outcome.error is not None:
+            error = ''.join(outcome.error.format_exception_only()).strip()
+        self._journal.record(cmdline, timestamp, time.perf_counter() - start, error)
+        return outcome.result
+
+    def _execute(self, cmdline: str) -> CommandOutcome:
+        """
+        Executes CMDLINE, which may be a pipeline. Exceptions are displayed
+        and stored for the `get_error` command instead of propagated. Only
+        a summary of the traceback is kept, so that frames of the failed
+        command and their locals can be released.
         """
         try:
-            if not cmdline:
-                return self.emptyline()
-
-            invoker = CommandInvoker(self._get_all_commands())
-            return invoker.invoke(self, cmdline=CommandLine(cmdline))
+            line, heredocs = split_heredocs(cmdline)
+            if '|' in line:
+                stages = split_pipeline(line)
+                if len(stages) > 1:
+                    heredocs = iter(heredocs)
+                    cmdlines = [CommandLine(stage, heredocs=heredocs) for stage in stages]
+                    return CommandOutcome(self._invoke_pipeline(cmdlines), None)
+
+            return CommandOutcome(self._invoke(CommandLine(cmdline)), None)
         # it's a bit too ruthless to terminate on every single broken command
         # pylint: disable=broad-except
         except Exception as e:
-            self._last_exception = sys.exc_info()
+            error = traceback.TracebackException.from_exception(e, lookup_lines=False)
+            with self._stats_lock:
+                if isinstance(e, CommandTimeout):
+                    self._timeouts[e.command] += 1
+                elif isinstance(e, CommandCancelled):
+                    self._cancellations[e.command] += 1
+            self._errors.appendleft(error)
             print('%s (try "get_error" for details)' % e)
-        else:
-            self._last_exception = None
+            return CommandOutcome(None, error)
+
+    def _invoke(self, cmdline: CommandLine):
+        """Executes a command described by CMDLINE."""
+        invoker = self._get_invoker()
+        return invoker.invoke(self, cmdline=cmdline)
+
+    def _invoke_pipeline(self, cmdlines: Sequence[CommandLine]):
+        """
+        Executes a pipeline of commands described by CMDLINES. If the last one
+        returns an iterator, its items are printed as they are produced.
+        """
+        if any(not cmdline.command for cmdline in cmdlines):
+            raise InvalidInput('empty command in pipeline')
+
+        invoker = self._get_invoker()
+        result = invoker.invoke_pipeline(self, cmdlines=cmdlines)
+        if isinstance(result, collections.abc.Iterator):
+            for item in result:
+                print(item)
+            return None
+        return result
+
+    @classmethod
+    def main(cls,
+             argv: Sequence[str] = None,
+             manifest: Union[str, Iterable[Mapping[str, Any]]] = None) -> int:
+        """
+        Entry point for invoking commands from the shell, e.g.:
+
+            if __name__ == '__main__':
+                sys.exit(MyCmd.main())
+
+        Executes a single command given by ARGV (sys.argv[1:] by default) and
+        returns a process exit status: 0 on success, 2 if the command line was
+        invalid and 1 if the command failed. ARGV words are passed verbatim,
+        as they were already split by the shell. If ARGV is empty, starts an
+        interactive command loop instead.
+
+        If MANIFEST is given, commands are registered from it (see
+        `powercmd.lazy_command`) instead of collected from methods, which
+        avoids inspecting the class at startup. MANIFEST may be a path to
+        a file created by `powercmd.manifest`; if it is missing or outdated,
+        commands are collected from methods as usual.
+        """
+        if argv is None:
+            argv = sys.argv[1:]
+
+        if isinstance(manifest, str):
+            from powercmd.manifest import read_manifest
+            manifest = read_manifest(manifest, cls)
+
+        cmd = cls()
+        if manifest is not None:
+            cmd._commands = CommandsDict()  # pylint: disable=protected-access
+            cmd.add_manifest(manifest)
+
+        if not argv:
+            cmd.cmdloop()
+            return 0
+
+        # the output may be consumed by scripts, so matched names are not echoed
+        invoker = cmd._get_invoker(verbose=False)  # pylint: disable=protected-access
+        try:
+            invoker.invoke(cmd, cmdline=CommandLine.from_words(argv))
+        except InvalidInput as e:
+            print(e, file=sys.stderr)
+            return 2
+        except CommandCancelled as e:
+            print(e, file=sys.stderr)
+            return 1
+        # pylint: disable=broad-except
+        except Exception:
+            traceback.print_exc()
+            return 1
+        return 0
 
     def onecmd(self, cmdline):
         """
@@ -187,20 +592,56 @@ class Cmd:
         """
         return self.default(cmdline)
 
+    def _read_line(self) -> str:
+        """
+        Reads a single command line from stdin. prompt_toolkit, providing
+        completion and history, is only used if stdin is a terminal.
+        """
+        if not os.isatty(sys.stdin.fileno()):
+            return input(self.prompt)
+
+        from prompt_toolkit import PromptSession
+        from prompt_toolkit.patch_stdout import patch_stdout
+        from prompt_toolkit.styles import Style
+        from powercmd.completer import Completer
+
+        if self._session is None:
+            # histories may suggest completions of typed lines, e.g. MmapHistory
+            auto_suggest = getattr(self._history, 'powercmd_auto_suggest', None)
+            self._session = PromptSession(history=self._history,
+                                          auto_suggest=auto_suggest() if auto_suggest else None)
+            self._completer = Completer(self._get_all_commands(), file_args=self.FILE_ARGUMENTS)
+        if self.prompt_style is None:
+            self.prompt_style = Style.from_dict({'': 'bold'})
+
+        with patch_stdout():
+            return self._session.prompt(self.prompt, completer=self._completer, style=self.prompt_style)
+
+    def _read_command(self) -> str:
+        """
+        Reads a command line from stdin, followed by contents of heredocs it
+        starts, if any. Heredoc lines are read without completion and not
+        stored in history.
+        """
+        lines = [self._read_line()]
+        for tag in heredoc_tags(lines[0]):
+            while True:
+                lines.append(input(self.continuation_prompt))
+                if lines[-1] == tag:
+                    break
+        return '\n'.join(lines)
+
     def cmdloop(self):
         """
         Interprets commands read from stdin until a shutdown is requested or
-        EOF encountered.
+        EOF encountered. Ctrl-C discards the line being typed, or cancels the
+        running command.
         """
-        completer = Completer(self._get_all_commands())
         try:
             while self._loop:
-                if os.isatty(sys.stdin.fileno()):
-                    with patch_stdout():
-                        cmd = self._session.prompt(self.prompt, completer=completer, style=self.prompt_style)
-                else:
-                    cmd = input(self.prompt)
-
-                self.onecmd(cmd)
+                try:
+                    self.onecmd(self._read_command())
+                except KeyboardInterrupt:
+                    print()
         except EOFError:
             pass
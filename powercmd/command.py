@@ -4,15 +4,26 @@ Utility classes for accessing type hints of function arguments.
 
 import collections
 import inspect
+import sys
 import textwrap
+import types
+import weakref
+from typing import TYPE_CHECKING, Callable, ForwardRef, List, Optional, Sequence, Tuple, get_type_hints
 
+from powercmd.cancellation import CancellationToken
 from powercmd.extra_typing import OrderedMapping
 
+if TYPE_CHECKING:
+    # commands_dict imports this module
+    from powercmd.commands_dict import CommandsDict  # pylint: disable=unused-import
+
 
 class Parameter(collections.namedtuple('Parameter', ['name', 'type', 'default'])):
     """
     Type-annotated function parameter.
     """
+    __slots__ = ()
+
     def __new__(cls, *args, **kwargs):
         param = super().__new__(cls, *args, **kwargs)
         if param.type == inspect._empty:  # pylint: disable=protected-access
@@ -27,33 +38,114 @@ class Parameter(collections.namedtuple('Parameter', ['name', 'type', 'default'])
         return result
 
 
+# Parameters of a command handler. STAMP identifies the handler definition
+# they were computed for.
+_HandlerInfo = collections.namedtuple('_HandlerInfo', ['stamp', 'parameters', 'cancellation_param'])
+
+# handler -> _HandlerInfo
+_HANDLERS = weakref.WeakKeyDictionary()
+
+
+def _handler_stamp(handler: Callable) -> Tuple:
+    """
+    Returns objects that get replaced when HANDLER is redefined in place, e.g.
+    by a code reloader.
+    """
+    return (getattr(handler, '__code__', None), getattr(handler, '__annotations__', None))
+
+
+def _resolve_annotations(handler: Callable,
+                         params: Sequence[inspect.Parameter]) -> List[inspect.Parameter]:
+    """
+    Returns PARAMS with string and forward reference annotations, e.g. ones
+    created by `from __future__ import annotations`, replaced with the types
+    they name in the module HANDLER was defined in. The return annotation is
+    not resolved, so it may refer to names that are unavailable at runtime.
+    """
+    if not any(isinstance(param.annotation, (str, ForwardRef)) for param in params):
+        return list(params)
+
+    target = inspect.unwrap(handler)
+    annotations = types.SimpleNamespace(__annotations__={
+        param.name: param.annotation for param in params
+        if param.annotation is not inspect.Parameter.empty
+    })
+    try:
+        hints = get_type_hints(annotations, getattr(target, '__globals__', {}), include_extras=True)
+    except (NameError, SyntaxError, TypeError) as exc:
+        raise ValueError('cannot resolve annotations of %s: %s' % (target, exc)) from exc
+    return [param.replace(annotation=hints.get(param.name, param.annotation)) for param in params]
+
+
+def _make_handler_info(handler: Callable, stamp: Tuple) -> _HandlerInfo:
+    """
+    Returns a _HandlerInfo describing HANDLER parameters, excluding 'self' and
+    the one that receives a CancellationToken.
+    """
+    params = list(inspect.signature(handler).parameters.values())
+    if params and params[0].name == 'self':
+        params = params[1:]  # drop 'self'
+    params = _resolve_annotations(handler, params)
+
+    cancellation_param = next((param.name for param in params
+                               if param.annotation is CancellationToken), None)
+    return _HandlerInfo(stamp=stamp,
+                        parameters=collections.OrderedDict(
+                            (param.name, Parameter(name=param.name,
+                                                   type=param.annotation,
+                                                   default=param.default))
+                            for param in params if param.name != cancellation_param),
+                        cancellation_param=cancellation_param)
+
+
+def _inspect_handler(handler: Callable) -> _HandlerInfo:
+    """
+    Returns a _HandlerInfo describing HANDLER parameters. Signatures and
+    annotations are only inspected once per handler, unless it gets redefined.
+    """
+    stamp = _handler_stamp(handler)
+    try:
+        info = _HANDLERS.get(handler)
+    except TypeError:
+        # handler cannot be weakly referenced
+        return _make_handler_info(handler, stamp)
+
+    if info is None or any(old is not new for old, new in zip(info.stamp, stamp)):
+        info = _make_handler_info(handler, stamp)
+        _HANDLERS[handler] = info
+    return info
+
+
 class Command(collections.namedtuple('Command', ['name', 'handler'])):
     """
     Command handler: a powercmd.Cmd method with non-self parameters annotated
     with type hints.
+
+    Instances carry no per-instance dict and command names are interned, as
+    registries can hold many thousands of commands.
     """
-    def __new__(cls, *args, **kwargs):
-        cmd = super().__new__(cls, *args, **kwargs)
+    __slots__ = ()
+
+    def __new__(cls, name, handler):
+        cmd = super().__new__(cls, sys.intern(name), handler)
         cmd.get_parameters()
         return cmd
 
-    def _get_handler_params(self) -> OrderedMapping[str, inspect.Parameter]:
-        """Returns a list of command parameters for given HANDLER."""
-        params = inspect.signature(self.handler).parameters
-        params = list(params.items())
-        if params and params[0][0] == 'self':
-            params = params[1:]  # drop 'self'
-        params = collections.OrderedDict(params)  # drop 'self'
-        return params
+    @property
+    def cancellation_param(self) -> Optional[str]:
+        """
+        Returns the name of handler parameter annotated as CancellationToken,
+        or None if the handler does not accept one.
+        """
+        return _inspect_handler(self.handler).cancellation_param
 
     def get_parameters(self) -> OrderedMapping[str, Parameter]:
-        """Returns an OrderedDict of command parameters."""
+        """
+        Returns an OrderedDict of command parameters. It is shared by all
+        callers and must not be modified.
+        """
         try:
-            params = self._get_handler_params()
-            return collections.OrderedDict((name, Parameter(name=name,
-                                                            type=param.annotation,
-                                                            default=param.default))
-                                           for name, param in params.items())
+            return _inspect_handler(self.handler).parameters
         except ValueError as exc:
             raise ValueError('Unable to list parameters for handler: %s' % self.name) from exc
 
@@ -88,3 +180,37 @@ class Command(collections.namedtuple('Command', ['name', 'handler'])):
                 % (textwrap.dedent(self.description or 'No details available.').strip(),
                    self.name,
                    ' '.join(self._param_to_help_str(param) for param in self.parameters)))
+
+
+class CommandGroup(Command):
+    """
+    A group of subcommands: a nested powercmd.Cmd instance exposed as a command
+    of its parent. Typing "GROUP SUBCOMMAND ARGS..." invokes SUBCOMMAND defined
+    by the nested instance.
+    """
+    __slots__ = ()
+
+    def get_parameters(self) -> OrderedMapping[str, Parameter]:
+        """Returns an empty OrderedDict: groups take a subcommand instead."""
+        return collections.OrderedDict()
+
+    @property
+    def cancellation_param(self) -> Optional[str]:
+        return None
+
+    @property
+    def subcommands(self) -> 'CommandsDict':
+        """Returns all commands defined by the nested Cmd instance."""
+        return self.handler._get_all_commands()  # pylint: disable=protected-access
+
+    @property
+    def description(self) -> str:
+        """Returns the docstring of nested Cmd class."""
+        return type(self.handler).__doc__
+
+    @property
+    def help(self) -> str:
+        """Returns a help message listing available subcommands."""
+        return ('%s\n\nSUBCOMMANDS: %s\n'
+                % (textwrap.dedent(self.description or 'No details available.').strip(),
+                   ' '.join(sorted(self.subcommands))))
@@ -3,18 +3,52 @@ Utilities for constructing command arguments.
 """
 
 import collections
+import collections.abc
+import concurrent.futures
 import copy
-import enum
 import inspect
-from typing import Any, Callable, List, Mapping, Sequence, Tuple, Union, Optional
-
-from powercmd.command_line import CommandLine, MISSING_ARG
+import re
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple,
+                    Union)
+
+from powercmd.cache import get_cache, get_parse_cache, make_key
+from powercmd.cancellation import call_cancellable, run_coroutine
+from powercmd.command import Command, CommandGroup, Parameter
+from powercmd.command_line import CommandLine, FileArg, MISSING_ARG
 from powercmd.commands_dict import CommandsDict
-from powercmd.exceptions import InvalidInput
+from powercmd.concurrency import ConcurrencyLimit
+from powercmd.exceptions import CommandCancelled, InvalidInput
 from powercmd.extra_typing import OrderedMapping
+from powercmd.file_input import iter_list_items, map_file, read_bytes, read_text
 from powercmd.split_list import split_list
-from powercmd.utils import (is_generic_list, is_generic_tuple, is_generic_type,
-                            is_generic_union)
+from powercmd.type_info import TypeInfo, TypeKind, annotation_key, classify, type_name
+
+_NOT_CACHED = object()
+_NO_MATCH = object()
+
+# strings accepted by int(); float() only accepts strings matching the hint
+_INT_RE = re.compile(r'\s*[+-]?\d+(?:_\d+)*\s*\Z')
+_FLOAT_HINT_RE = re.compile(r'\d|inf|nan', re.IGNORECASE)
+
+# annotation key -> constructor, shared by all CommandInvoker instances
+_CONSTRUCTORS = {}
+
+
+def _construct_none(text: str) -> None:
+    """Parses the None member of Optional[...] annotations."""
+    if text != 'None':
+        raise ValueError('expected None, got %s' % (text,))
+
+
+def _literal_values(info: TypeInfo) -> Dict[str, Any]:
+    """
+    Returns a dict mapping string representations of Literal values described
+    by INFO to the values. The first one wins if representations collide.
+    """
+    values = {}
+    for value in info.args:
+        values.setdefault(str(value), value)
+    return values
 
 
 class CommandInvoker:
@@ -22,87 +56,260 @@ class CommandInvoker:
     Constructs command handler arguments and invokes appropriate handler with
     constructed argumnds.
     """
-    def __init__(self, commands: CommandsDict):
+    def __init__(self,
+                 commands: CommandsDict,
+                 verbose: bool = True,
+                 default_timeout: float = None,
+                 concurrency_limit: ConcurrencyLimit = None,
+                 file_args: bool = False,
+                 file_access: bool = True):
         self._cmds = commands
+        self._verbose = verbose
+        self._default_timeout = default_timeout
+        self._concurrency_limit = concurrency_limit
+        self._file_args = file_args
+        self._file_access = file_access
 
     @staticmethod
-    def _get_list_ctor(annotation: List) -> Callable[[str], List]:
+    def _get_list_ctor(info: TypeInfo) -> Callable[[str], List]:
         """
         Returns a function that parses a string representation of a list
-        defined by ANNOTATION.
+        described by INFO.
 
         Examples:
             "[1,2,3]" -> List[int]
             "1,2,3" -> List[int]
         """
-        if len(annotation.__args__) != 1:
+        if len(info.args) != 1:
             raise TypeError('List may only have one type parameter, got %s'
-                            % (annotation,))
-        internal_type = annotation.__args__[0]
-        internal_ctor = CommandInvoker.get_constructor(internal_type)
+                            % (info.args,))
+        internal_ctor = CommandInvoker.get_constructor(info.args[0])
 
         def construct_list(text):
-            if text[0] == '[' and text[-1] == ']':
+            if text[:1] == '[' and text[-1:] == ']':
                 text = text[1:-1]
             return [internal_ctor(txt) for txt in split_list(text)]
 
         return construct_list
 
     @staticmethod
-    def _get_tuple_ctor(annotation: Tuple) -> Callable[[str], Tuple]:
+    def _get_set_ctor(info: TypeInfo) -> Callable[[str], Set]:
+        """
+        Returns a function that parses a string representation of a set
+        described by INFO. Abstract set types are constructed as a set.
+
+        Examples:
+            "{1,2,3}" -> Set[int]
+            "1,2,3" -> FrozenSet[int]
+        """
+        if len(info.args) != 1:
+            raise TypeError('Set may only have one type parameter, got %s'
+                            % (info.args,))
+        internal_ctor = CommandInvoker.get_constructor(info.args[0])
+        container = frozenset if info.origin is frozenset else set
+
+        def construct_set(text):
+            if text[:1] == '{' and text[-1:] == '}':
+                text = text[1:-1]
+            return container(internal_ctor(txt) for txt in split_list(text))
+
+        return construct_set
+
+    @staticmethod
+    def _get_dict_ctor(info: TypeInfo) -> Callable[[str], Dict]:
+        """
+        Returns a function that parses a string representation of a dict
+        described by INFO. Abstract mapping types are constructed as a dict.
+
+        Examples:
+            "{foo:1,bar:2}" -> Dict[str, int]
+            "foo:1,bar:2" -> Dict[str, int]
+        """
+        if len(info.args) != 2:
+            raise TypeError('Dict must have key and value type parameters, got %s'
+                            % (info.args,))
+        key_ctor = CommandInvoker.get_constructor(info.args[0])
+        value_ctor = CommandInvoker.get_constructor(info.args[1])
+        container = collections.OrderedDict if info.origin is collections.OrderedDict else dict
+
+        def construct_dict(text):
+            if text[:1] == '{' and text[-1:] == '}':
+                text = text[1:-1]
+
+            items = []
+            for item in split_list(text):
+                key = split_list(item, separator=':')[0]
+                if len(key) == len(item):
+                    raise ValueError('missing value for key: %s' % (key,))
+                items.append((key_ctor(key), value_ctor(item[len(key) + 1:])))
+            return container(items)
+
+        return construct_dict
+
+    @staticmethod
+    def _get_tuple_ctor(info: TypeInfo) -> Callable[[str], Tuple]:
         """
         Returns a function that parses a string representation of a tuple
-        defined by ANNOTATION.
+        described by INFO.
 
         Examples:
             "(1,foo)" -> Tuple[int, str]
         """
-        internal_types = getattr(annotation, '__args__', None)
-        if internal_types is None:
-            raise TypeError('%s is not a tuple type' % (repr(annotation),))
+        internal_ctors = [CommandInvoker.get_constructor(cls) for cls in info.args]
 
         def construct_tuple(text):
-            if text[0] == '(' and text[-1] == ')':
+            if text[:1] == '(' and text[-1:] == ')':
                 text = text[1:-1]
 
             sub_txts = list(split_list(text))
-            if len(sub_txts) != len(internal_types):
-                raise TypeError('mismatched lengths: %d strings, %d tuple types' % (len(sub_txts), len(internal_types)))
-
-            tuple_list = []
-            for cls, txt in zip(internal_types, sub_txts):
-                tuple_list.append(CommandInvoker.get_constructor(cls)(txt))
+            if len(sub_txts) != len(internal_ctors):
+                raise TypeError('mismatched lengths: %d strings, %d tuple types' % (len(sub_txts), len(internal_ctors)))
 
-            return tuple(tuple_list)
+            return tuple(ctor(txt) for ctor, txt in zip(internal_ctors, sub_txts))
 
         return construct_tuple
 
     @staticmethod
-    def _get_union_ctor(annotation: Union):
+    def _get_union_member_parser(annotation: Any) -> Callable[[str], Any]:
+        """
+        Returns a function that parses a string into a type described by
+        ANNOTATION, or returns _NO_MATCH if the string does not represent such
+        value. Wherever possible, the string is checked without attempting to
+        construct the value and catching an exception.
+        """
+        info = classify(annotation)
+        if info.kind is TypeKind.ENUM:
+            members = dict(annotation.__members__)
+            return lambda text: members.get(text, _NO_MATCH)
+        if info.kind is TypeKind.LITERAL:
+            values = _literal_values(info)
+            return lambda text: values.get(text, _NO_MATCH)
+        if annotation is type(None):
+            return lambda text: None if text == 'None' else _NO_MATCH
+        if annotation is int:
+            return lambda text: int(text) if text.isdecimal() or _INT_RE.match(text) else _NO_MATCH
+
+        ctor = CommandInvoker.get_constructor(annotation)
+        if annotation is str:
+            return ctor
+        hint = _FLOAT_HINT_RE if annotation is float else None
+
+        def parse_member(text):
+            if hint is not None and not hint.search(text):
+                return _NO_MATCH
+            try:
+                return ctor(text)
+            except (ValueError, TypeError, KeyError):
+                return _NO_MATCH
+
+        return parse_member
+
+    @staticmethod
+    def _get_union_ctor(info: TypeInfo):
         """
-        Returns a function that parses a string into the first matching type of
-        ANNOTATION.
+        Returns a function that parses a string into the first matching type
+        described by INFO.
+
+        Plain types, enums and literals are matched by looking at the string
+        first, so that most strings are parsed without trying types that are
+        bound to fail. Members following str or bool, which accept any string,
+        are never tried.
         """
-        internal_types = (getattr(annotation, '__args__', None)
-                          or getattr(annotation, '__union_types__', None))
-        if internal_types is None:
-            raise TypeError('%s is not a union type' % (repr(annotation),))
+        parsers = []
+        for annotation in info.args:
+            parsers.append(CommandInvoker._get_union_member_parser(annotation))
+            if annotation in (str, bool):
+                break
+        type_names = ', '.join(type_name(annotation) for annotation in info.args)
 
         def construct_union(text):
-            for internal_type in internal_types:
-                ctor = CommandInvoker.get_constructor(internal_type)
-                try:
-                    return ctor(text)
-                except ValueError:
-                    pass
+            for parser in parsers:
+                value = parser(text)
+                if value is not _NO_MATCH:
+                    return value
+            raise InvalidInput('%s does not match any of: %s' % (text, type_names))
 
         return construct_union
 
+    @staticmethod
+    def _get_literal_ctor(info: TypeInfo) -> Callable[[str], Any]:
+        """
+        Returns a function that parses a string into one of Literal values
+        described by INFO, matching their string representations.
+        """
+        values = _literal_values(info)
+
+        def construct_literal(text):
+            try:
+                return values[text]
+            except KeyError:
+                raise ValueError('%s is not one of: %s' % (text, ', '.join(values))) from None
+
+        return construct_literal
+
+    @staticmethod
+    def _get_annotated_ctor(info: TypeInfo) -> Callable[[str], Any]:
+        """
+        Returns the constructor of the type wrapped in Annotated[...] described
+        by INFO. If any metadata object defines a powercmd_parse(text, target)
+        method, e.g. extra_typing.Hex, it is used to construct the wrapped
+        type instead. Other metadata is ignored.
+        """
+        target = info.args[0]
+        for metadata in info.args[1:]:
+            if hasattr(metadata, 'powercmd_parse'):
+                return lambda text, parse=metadata.powercmd_parse: parse(text, target)
+        return CommandInvoker.get_constructor(target)
+
     @staticmethod
     def get_constructor(annotation: Any) -> Callable[[str], Any]:
         """
         Returns a callable that parses a string and returns an object of an
         appropriate type defined by the ANNOTATION.
+
+        Constructors are cached, so that the annotation is only analyzed once
+        per process.
+        """
+        key = annotation_key(annotation)
+        try:
+            return _CONSTRUCTORS[key]
+        except KeyError:
+            ctor = CommandInvoker._make_constructor(annotation)
+            _CONSTRUCTORS[key] = ctor
+            return ctor
+        except TypeError:
+            # unhashable annotation
+            return CommandInvoker._make_constructor(annotation)
+
+    @staticmethod
+    def _make_constructor(annotation: Any) -> Callable[[str], Any]:
+        """
+        Creates a callable that parses a string and returns an object of an
+        appropriate type defined by the ANNOTATION. If the type is marked as
+        cacheable, parsed values are reused.
+        """
+        if classify(annotation).kind not in (TypeKind.PLAIN, TypeKind.ENUM):
+            return CommandInvoker.get_generic_constructor(annotation)
+
+        ctor = CommandInvoker._make_plain_constructor(annotation)
+        cache = get_parse_cache(annotation)
+        if cache is None:
+            return ctor
+
+        def construct_cached(text):
+            value = cache.get(text, _NOT_CACHED)
+            if value is _NOT_CACHED:
+                value = ctor(text)
+                cache.put(text, value)
+            return value
+
+        return construct_cached
+
+    @staticmethod
+    def _make_plain_constructor(annotation: Any) -> Callable[[str], Any]:
+        """
+        Creates a callable that parses a string into an object of non-generic
+        type ANNOTATION.
         """
         def ensure_callable(arg):
             """Raises an exception if the argument is not callable."""
@@ -110,9 +317,7 @@ class CommandInvoker:
                 raise TypeError('invalid type: ' + repr(arg))
             return arg
 
-        if is_generic_type(annotation):
-            return CommandInvoker.get_generic_constructor(annotation)
-        if issubclass(annotation, enum.Enum):
+        if classify(annotation).kind is TypeKind.ENUM:
             # Enum class allows accessing values by string via [] operator
             return annotation.__getitem__
         if hasattr(annotation, 'powercmd_parse'):
@@ -126,6 +331,9 @@ class CommandInvoker:
 
         return {
             bytes: lambda text: bytes(text, 'ascii'),
+            bytearray: lambda text: bytearray(text, 'ascii'),
+            memoryview: lambda text: memoryview(bytes(text, 'ascii')),
+            type(None): _construct_none,
         }.get(annotation, ensure_callable(annotation))
 
     @staticmethod
@@ -135,15 +343,13 @@ class CommandInvoker:
         It is used for types like List[Foo] to apply a Foo constructor for each
         list element.
         """
-        if is_generic_list(annotation):
-            return CommandInvoker._get_list_ctor(annotation)
-        if is_generic_tuple(annotation):
-            return CommandInvoker._get_tuple_ctor(annotation)
-        if is_generic_union(annotation):
-            return CommandInvoker._get_union_ctor(annotation)
-
-        raise NotImplementedError('generic constructor for %s not implemented'
-                                  % (annotation,))
+        info = classify(annotation)
+        try:
+            factory = _GENERIC_CONSTRUCTORS[info.kind]
+        except KeyError:
+            raise NotImplementedError('generic constructor for %s not implemented'
+                                      % (annotation,)) from None
+        return factory(info)
 
     @staticmethod
     def _construct_arg(formal_param: inspect.Parameter,
@@ -152,12 +358,62 @@ class CommandInvoker:
         Constructs an argument from string VALUE, with the type defined by an
         annotation to the FORMAL_PARAM.
         """
+        if isinstance(value, FileArg):
+            return CommandInvoker._construct_file_arg(formal_param, value)
+
         ctor = CommandInvoker.get_constructor(formal_param.type)
         try:
             return ctor(value)
         except ValueError as exc:
             raise InvalidInput(exc)
 
+    @staticmethod
+    def _construct_file_arg(formal_param: inspect.Parameter,
+                            arg: FileArg) -> Any:
+        """
+        Constructs an argument from the contents of a file given as @path, with
+        the type defined by an annotation to the FORMAL_PARAM. See
+        powercmd.file_input for details.
+        """
+        annotation = formal_param.type
+        info = classify(annotation)
+        # Annotated[...] with metadata that parses values, like extra_typing.Hex,
+        # is constructed from the file contents as text
+        if (info.kind is TypeKind.ANNOTATED
+                and not any(hasattr(metadata, 'powercmd_parse') for metadata in info.args[1:])):
+            annotation = info.args[0]
+            info = classify(annotation)
+
+        try:
+            if annotation is memoryview:
+                return map_file(arg.path)
+            if annotation in (bytes, bytearray):
+                return read_bytes(arg.path, annotation)
+            if info.kind not in (TypeKind.LIST, TypeKind.SET, TypeKind.ITERABLE):
+                text = read_text(arg.path)
+                try:
+                    return CommandInvoker.get_constructor(annotation)(text)
+                except ValueError as exc:
+                    raise InvalidInput('%s: %s' % (arg.path, exc))
+
+            item_ctor = CommandInvoker.get_constructor(info.args[0])
+
+            def construct_item(text):
+                try:
+                    return item_ctor(text)
+                except ValueError as exc:
+                    raise InvalidInput('%s: %s' % (arg.path, exc))
+
+            items = map(construct_item, iter_list_items(arg.path))
+        except OSError as exc:
+            raise InvalidInput('cannot read %s: %s' % (arg.path, exc))
+
+        if info.kind is TypeKind.ITERABLE:
+            return items
+        if info.kind is TypeKind.SET:
+            return (frozenset if info.origin is frozenset else set)(items)
+        return list(items)
+
     @staticmethod
     def _fill_default_args(formal: Mapping[str, inspect.Parameter],
                            actual: Mapping[str, str]):
@@ -194,6 +450,136 @@ class CommandInvoker:
         constructed_args = CommandInvoker._fill_default_args(formal, constructed_args)
         return constructed_args
 
+    def _assign_args(self,
+                     cmd: Command,
+                     cmdline: CommandLine,
+                     exclude: Sequence[str] = ()) -> Mapping[str, Any]:
+        """
+        Assigns CMDLINE arguments to CMD parameters, see
+        CommandLine.assign_args. If this invoker does not allow reading
+        arguments from files, @path values are used as typed.
+        """
+        assigned_args = cmdline.assign_args(cmd, exclude=exclude)
+        if not self._file_args:
+            for name, value in assigned_args.items():
+                if isinstance(value, FileArg):
+                    assigned_args[name] = value.text
+        return assigned_args
+
+    def _resolve(self,
+                 args: Tuple,
+                 cmdline: CommandLine,
+                 exact: bool = False) -> Tuple[Command, Tuple, CommandLine]:
+        """
+        Returns a (command, args, cmdline) tuple, where COMMAND is the handler
+        selected by CMDLINE. If it is a subcommand of a group, returned ARGS
+        have the first element replaced with the nested Cmd instance, and
+        returned CMDLINE starts at the subcommand. If EXACT is set, command
+        names are not matched partially.
+        """
+        commands = self._cmds
+        while True:
+            if exact:
+                cmd = commands.get(cmdline.command)
+                if cmd is None:
+                    raise InvalidInput('no such command: %s (commands in a pipeline need full names)'
+                                       % (cmdline.command,))
+            else:
+                cmd = commands.choose(cmdline.command, verbose=self._verbose)
+            if not isinstance(cmd, CommandGroup):
+                self._check_file_access(cmd)
+                return cmd, args, cmdline
+
+            sub_cmdline = cmdline.subcommand_line()
+            if not sub_cmdline.command:
+                raise InvalidInput('missing subcommand for %s (possible: %s)'
+                                   % (cmd.name, ' '.join(sorted(cmd.subcommands))))
+            commands, args, cmdline = cmd.subcommands, (cmd.handler,) + args[1:], sub_cmdline
+
+    def _run_handler(self,
+                     cmd: Command,
+                     args: Tuple,
+                     typed_args: Mapping[str, Any]) -> Any:
+        """
+        Calls CMD handler with ARGS and TYPED_ARGS. Handlers with a time limit
+        or accepting a CancellationToken are run in a worker thread; results
+        of async ones are awaited. KeyboardInterrupt raised while the handler
+        runs is reported as CommandCancelled.
+
+        The handler only starts once allowed by its @concurrency_limit and the
+        limit shared by all commands; either may raise CommandRejected.
+        """
+        limit = getattr(cmd.handler, 'powercmd_timeout', self._default_timeout)
+        token_param = cmd.cancellation_param
+        release = self._acquire_slots(cmd)
+        try:
+            if limit is not None or token_param is not None:
+                # the handler may outlive the call, slots are released once it returns
+                release, release_later = None, release
+                return call_cancellable(cmd.handler, args, typed_args, limit, token_param,
+                                        on_exit=release_later)
+
+            try:
+                result = cmd.handler(*args, **typed_args)
+                if inspect.iscoroutine(result):
+                    result = run_coroutine(result)
+            except KeyboardInterrupt:
+                raise CommandCancelled() from None
+            return result
+        except CommandCancelled as e:
+            e.command = cmd.name
+            raise
+        finally:
+            if release is not None:
+                release()
+
+    def _acquire_slots(self, cmd: Command) -> Callable[[], None]:
+        """
+        Takes slots of concurrency limits applying to CMD, returns a function
+        that releases them. The command limit is taken first, so that commands
+        waiting for it do not hold slots of the shared limit. Built-in
+        commands of Cmd are not subject to the shared limit.
+        """
+        shared_limit = self._concurrency_limit
+        if getattr(cmd.handler, 'powercmd_builtin', False):
+            shared_limit = None
+        limits = [limit for limit in (getattr(cmd.handler, 'powercmd_concurrency', None), shared_limit)
+                  if limit is not None]
+        acquired = []
+
+        def release():
+            for limit in reversed(acquired):
+                limit.release()
+
+        try:
+            for limit in limits:
+                limit.acquire()
+                acquired.append(limit)
+        except BaseException:
+            release()
+            raise
+        return release
+
+    def _call_handler(self,
+                      cmd: Command,
+                      args: Tuple,
+                      typed_args: Mapping[str, Any]) -> Any:
+        """
+        Calls CMD handler with ARGS and TYPED_ARGS, reusing a previous result
+        if the handler is marked as @cached.
+        """
+        cache = get_cache(cmd.handler)
+        key = make_key(typed_args) if cache is not None else None
+        if key is None:
+            return self._run_handler(cmd, args, typed_args)
+
+        result = cache.get(key, _NOT_CACHED)
+        if result is _NOT_CACHED:
+            result = self._run_handler(cmd, args, typed_args)
+            if not isinstance(result, collections.abc.Iterator):
+                cache.put(key, result)
+        return result
+
     def invoke(self,
                *args,
                cmdline: CommandLine):
@@ -201,8 +587,236 @@ class CommandInvoker:
         Parses CMDLINE and invokes appropriate command handler. Any additional
         ARGS are passed to the handler.
         """
-        cmd = self._cmds.choose(cmdline.command, verbose=True)
-        assigned_args = cmdline.assign_args(cmd)
+        cmd, args, cmdline = self._resolve(args, cmdline)
+        assigned_args = self._assign_args(cmd, cmdline)
         typed_args = self._construct_args(cmd.parameters, assigned_args)
 
-        return cmd.handler(*args, **typed_args)
+        return self._call_handler(cmd, args, typed_args)
+
+    @staticmethod
+    def get_input_param(cmd: Command) -> Optional[Parameter]:
+        """
+        Returns the parameter of CMD that receives items produced by previous
+        command in a pipeline, i.e. the first one annotated as Iterable[T] or
+        Iterator[T]. Returns None if there is no such parameter.
+        """
+        for param in cmd.parameters.values():
+            if classify(param.type).kind is TypeKind.ITERABLE:
+                return param
+        return None
+
+    @staticmethod
+    def _as_stream(result: Any) -> Iterator:
+        """
+        Returns an iterator over items produced by a command that returned
+        RESULT. Strings and non-iterable objects are treated as single items.
+        """
+        if isinstance(result, (str, bytes)) or not hasattr(result, '__iter__'):
+            return iter([result])
+        return iter(result)
+
+    @staticmethod
+    def _convert_stream(param: Parameter,
+                        stream: Iterator) -> Iterator:
+        """
+        Returns an iterator lazily converting string items of STREAM into the
+        type of elements expected by PARAM. Other items are passed through.
+        """
+        item_type = classify(param.type).args[0]
+        if item_type in (str, Any):
+            return stream
+
+        ctor = CommandInvoker.get_constructor(item_type)
+
+        def convert(item):
+            if isinstance(item, str):
+                try:
+                    return ctor(item)
+                except ValueError as exc:
+                    raise InvalidInput(exc)
+            return item
+
+        return map(convert, stream)
+
+    def invoke_pipeline(self,
+                        *args,
+                        cmdlines: Sequence[CommandLine]):
+        """
+        Invokes commands described by CMDLINES, passing the output of each one
+        to the input parameter (see get_input_param) of the next one. Items are
+        passed lazily: if handlers return generators, none of them needs to
+        hold all the items in memory. Returns the result of the last command.
+
+        Only the first command may be given by a partial name.
+        """
+        result = None
+        for idx, cmdline in enumerate(cmdlines):
+            cmd, cmd_args, cmdline = self._resolve(args, cmdline, exact=idx > 0)
+            if idx == 0:
+                typed_args = self._construct_args(cmd.parameters, self._assign_args(cmd, cmdline))
+            else:
+                input_param = self.get_input_param(cmd)
+                if input_param is None:
+                    raise InvalidInput('%s does not accept piped input' % (cmd.name,))
+                if result is None:
+                    raise InvalidInput('%s did not produce any output to pipe'
+                                       % (cmdlines[idx - 1].command,))
+
+                assigned_args = self._assign_args(cmd, cmdline, exclude=(input_param.name,))
+                if input_param.name in assigned_args:
+                    raise InvalidInput('cannot assign argument to %s: value is piped from %s'
+                                       % (input_param.name, cmdlines[idx - 1].command))
+                typed_args = self._construct_args(cmd.parameters, assigned_args)
+                typed_args[input_param.name] = self._convert_stream(input_param,
+                                                                    self._as_stream(result))
+
+            result = self._call_handler(cmd, cmd_args, typed_args)
+
+        return result
+
+    def _resolve_name(self,
+                      args: Tuple,
+                      command: str) -> Tuple[Command, Tuple]:
+        """
+        Returns a (command, args) pair, where COMMAND is the handler selected by
+        COMMAND name, which may contain multiple words to select a subcommand
+        of a group. In such case, returned ARGS have the first element replaced
+        with the nested Cmd instance.
+        """
+        group_path = command.split()
+        commands = self._cmds
+        for name in group_path[:-1]:
+            group = commands.choose(name, verbose=self._verbose)
+            if not isinstance(group, CommandGroup):
+                raise InvalidInput('not a command group: %s' % (name,))
+            commands = group.subcommands
+            args = (group.handler,) + args[1:]
+
+        cmd = commands.choose(group_path[-1] if group_path else '', verbose=self._verbose)
+        if isinstance(cmd, CommandGroup):
+            raise InvalidInput('missing subcommand for %s' % (cmd.name,))
+        self._check_file_access(cmd)
+        return cmd, args
+
+    def _check_file_access(self, cmd: Command):
+        """
+        Raises InvalidInput if CMD, at any level of command groups, reads files
+        and file access is disabled.
+        """
+        if not self._file_access and getattr(cmd.handler, 'powercmd_reads_files', False):
+            raise InvalidInput('%s is not available: file access is disabled' % (cmd.name,))
+
+    def invoke_args(self,
+                    *args,
+                    command: str,
+                    positional_args: Sequence[Any] = (),
+                    named_args: Mapping[str, Any] = None):
+        """
+        Invokes COMMAND handler with POSITIONAL_ARGS and NAMED_ARGS, which may
+        either be strings, parsed the same way as if they were typed in the
+        command line, or objects of appropriate types, passed to the handler
+        as they are. Any additional ARGS are passed to the handler.
+
+        COMMAND may contain multiple words to select a subcommand of a group.
+        """
+        cmd, args = self._resolve_name(args, command)
+        formal = cmd.parameters
+        if len(positional_args) > len(formal):
+            raise InvalidInput('cannot assign positional argument: no more expected parameters')
+
+        assigned_args = collections.OrderedDict(zip(formal, positional_args))
+        for name, value in (named_args or {}).items():
+            if name in assigned_args:
+                raise InvalidInput('duplicate value for argument: %s' % (name,))
+            assigned_args[name] = value
+
+        typed_args = {}
+        for name, value in assigned_args.items():
+            if name not in formal:
+                raise InvalidInput('unrecognized argument: %s' % (name,))
+            if isinstance(value, str):
+                value = self._construct_arg(formal[name], value)
+            typed_args[name] = value
+
+        for name, param in formal.items():
+            if name not in typed_args and param.default is inspect.Parameter.empty:
+                raise InvalidInput('missing value for argument: %s' % (name,))
+
+        typed_args = self._fill_default_args(formal, typed_args)
+        return self._call_handler(cmd, args, typed_args)
+
+    def invoke_many(self,
+                    *args,
+                    command: str,
+                    rows: Iterable[Union[Sequence[Any], Mapping[str, Any]]],
+                    workers: int = 1) -> Iterator[Any]:
+        """
+        Invokes COMMAND handler once for each of ROWS, yielding results in
+        order. Each row is either a sequence of positional arguments or a
+        mapping of parameter names to values. String values are parsed as if
+        they were typed in the command line. Any additional ARGS are passed to
+        the handler.
+
+        The command and argument constructors are only looked up once. ROWS
+        are consumed lazily; if WORKERS > 1, up to that many rows are
+        processed concurrently.
+        """
+        cmd, args = self._resolve_name(args, command)
+        formal = cmd.parameters
+        names = list(formal)
+        ctors = {name: self.get_constructor(param.type) for name, param in formal.items()}
+        defaults = {name: param.default for name, param in formal.items()
+                    if param.default is not inspect.Parameter.empty}
+        required = [name for name in names if name not in defaults]
+
+        def invoke_row(row_idx, row):
+            if isinstance(row, Mapping):
+                values = row.items()
+            elif len(row) > len(names):
+                raise InvalidInput('row %d: too many values: %d, expected at most %d'
+                                   % (row_idx, len(row), len(names)))
+            else:
+                values = zip(names, row)
+
+            typed_args = dict(defaults)
+            for name, value in values:
+                ctor = ctors.get(name)
+                if ctor is None:
+                    raise InvalidInput('row %d: unrecognized argument: %s' % (row_idx, name))
+                try:
+                    typed_args[name] = ctor(value) if isinstance(value, str) else value
+                except ValueError as exc:
+                    raise InvalidInput('row %d: %s' % (row_idx, exc))
+
+            for name in required:
+                if name not in typed_args:
+                    raise InvalidInput('row %d: missing value for argument: %s' % (row_idx, name))
+
+            return self._call_handler(cmd, args, typed_args)
+
+        if workers <= 1:
+            for row_idx, row in enumerate(rows, start=1):
+                yield invoke_row(row_idx, row)
+            return
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = collections.deque()
+            for row_idx, row in enumerate(rows, start=1):
+                pending.append(executor.submit(invoke_row, row_idx, row))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+
+# TypeInfo.kind -> function creating a constructor for annotations of that kind
+_GENERIC_CONSTRUCTORS = {
+    TypeKind.LIST: CommandInvoker._get_list_ctor,
+    TypeKind.ITERABLE: CommandInvoker._get_list_ctor,
+    TypeKind.TUPLE: CommandInvoker._get_tuple_ctor,
+    TypeKind.SET: CommandInvoker._get_set_ctor,
+    TypeKind.DICT: CommandInvoker._get_dict_ctor,
+    TypeKind.UNION: CommandInvoker._get_union_ctor,
+    TypeKind.LITERAL: CommandInvoker._get_literal_ctor,
+    TypeKind.ANNOTATED: CommandInvoker._get_annotated_ctor,
+}
@@ -1,12 +1,29 @@
 """
 Utility class for parsing command lines.
+
+An argument value of the form `<<TAG` is a heredoc: its value consists of
+lines following the command line, up to a line containing just TAG. If
+there are multiple heredocs, their lines follow one another, in order:
+
+    upload name=<<NAME data=<<DATA
+    report.txt
+    NAME
+    first line
+    second line
+    DATA
+
+Unquoted values of the form `@path` are read from files, if the command
+interpreter allows that, see `powercmd.file_input`. Quoted ones, like "@foo",
+are always taken literally.
 """
 
 import collections
 import copy
+import os
 import re
+import sys
 
-from typing import Mapping, Sequence, Optional, Union, List
+from typing import Iterator, Mapping, Sequence, Optional, Tuple, Union, List
 
 from powercmd.command import Command, Parameter
 from powercmd.exceptions import InvalidInput
@@ -17,12 +34,94 @@ from powercmd.split_list import split_cmdline, drop_enclosing_quotes
 IncompleteArg = collections.namedtuple('IncompleteArg', ['param', 'value'])
 NamedArg = collections.namedtuple('NamedArg', ['name', 'value'])
 PositionalArg = collections.namedtuple('PositionalArg', ['value'])
+# Argument value to be read from a file at PATH, given as @PATH. TEXT is the
+# value as typed, used instead if reading files is not allowed.
+FileArg = collections.namedtuple('FileArg', ['path', 'text'])
+
+
+_NAMED_ARG_RE = re.compile(r'^([a-zA-Z0-9_]+)=')
+_HEREDOC_RE = re.compile(r'<<([a-zA-Z_][a-zA-Z0-9_]*)\Z')
 
 
 class MissingArg: pass
 MISSING_ARG = MissingArg
 
 
+def _heredoc_tag(word: str) -> Optional[str]:
+    """
+    Returns the TAG if WORD, as typed in the command line, is a <<TAG or
+    name=<<TAG heredoc argument, None otherwise.
+    """
+    match = _NAMED_ARG_RE.match(word)
+    value = word[match.end():] if match else word
+    match = _HEREDOC_RE.match(value)
+    return match.group(1) if match else None
+
+
+def heredoc_tags(line: str) -> List[str]:
+    """Returns tags of heredocs started by command LINE, in order."""
+    if '<<' not in line:
+        return []
+    tags = (_heredoc_tag(word) for word in split_cmdline(line, allow_unmatched=True))
+    return [tag for tag in tags if tag is not None]
+
+
+def split_heredocs(text: str) -> Tuple[str, List[str]]:
+    """
+    Returns a (line, bodies) tuple, where LINE is the first line of TEXT and
+    BODIES are contents of heredocs it starts, in order. If it does not start
+    any, TEXT is returned whole as LINE.
+    """
+    line, _, rest = text.partition('\n')
+    tags = heredoc_tags(line)
+    if not tags:
+        return text, []
+
+    lines = rest.split('\n')
+    bodies = []
+    start = 0
+    for tag in tags:
+        try:
+            end = lines.index(tag, start)
+        except ValueError:
+            raise InvalidInput('missing heredoc terminator: %s' % (tag,)) from None
+        bodies.append('\n'.join(lines[start:end]))
+        start = end + 1
+
+    if any(extra.strip() for extra in lines[start:]):
+        raise InvalidInput('unexpected text after heredoc %s' % (tags[-1],))
+    return line, bodies
+
+
+def split_pipeline(line: str) -> List[str]:
+    """
+    Splits command LINE into pipeline stages, separated by `|` words. A `|`
+    that is quoted or part of a longer word, like in `say a|b`, does not
+    separate stages.
+    """
+    stages = []
+    start = end = 0
+    for word in split_cmdline(line, allow_unmatched=True):
+        end = line.index(word, end)
+        if word == '|':
+            stages.append(line[start:end])
+            start = end + 1
+        end += len(word)
+    stages.append(line[start:])
+    return stages
+
+
+def _parse_value(value: str,
+                 quoted: bool) -> Union[str, FileArg]:
+    """
+    Returns a FileArg if VALUE refers to a file as @path and is not QUOTED,
+    or VALUE itself.
+    """
+    if quoted or value[:1] != '@' or len(value) == 1:
+        return value
+    return FileArg(os.path.expanduser(drop_enclosing_quotes(value[1:])), value)
+
+
 class CommandLine:
     """
     Partially parsed command line.
@@ -30,23 +129,87 @@ class CommandLine:
     The command line is split into base command, named and free arguments for
     easier handling.
     """
+    __slots__ = ('raw_text', 'quoted_words', 'command', 'args', 'heredocs', '_verbatim')
 
-    def __init__(self, cmdline: str):
+    def __init__(self,
+                 cmdline: str,
+                 heredocs: Iterator[str] = None):
+        """
+        Parses CMDLINE. Contents of heredocs are taken from lines following
+        the first one, unless an iterator over HEREDOCS is given; the latter
+        is used for command lines that are parts of a longer one, like
+        pipeline stages.
+        """
+        if heredocs is None:
+            cmdline, bodies = split_heredocs(cmdline)
+            heredocs = iter(bodies)
         self.raw_text = cmdline
         self.quoted_words = split_cmdline(cmdline, allow_unmatched=True)
-        self.words = [drop_enclosing_quotes(word) for word in self.quoted_words]
-        words = self.words
+        self.heredocs = ()
+        self._verbatim = False
+        self._parse_words(self.quoted_words, heredocs)
+
+    @classmethod
+    def from_words(cls, words: Sequence[str]) -> 'CommandLine':
+        """
+        Creates a CommandLine from WORDS that were already split, e.g. by the
+        shell into sys.argv. WORDS are used verbatim, without splitting them
+        on whitespace or dropping quotes.
+        """
+        cmdline = cls.__new__(cls)
+        cmdline.raw_text = ' '.join(words)
+        cmdline.quoted_words = list(words)
+        cmdline.heredocs = ()
+        cmdline._verbatim = True
+        cmdline._parse_words(cmdline.quoted_words)
+        return cmdline
+
+    def _parse_words(self,
+                     quoted_words: List[str],
+                     heredocs: Iterator[str] = None):
+        """
+        Splits QUOTED_WORDS into the command and its arguments. Values of
+        heredoc arguments are taken from HEREDOCS, and stored in `heredocs`.
+        """
+        words = quoted_words if self._verbatim else [drop_enclosing_quotes(word) for word in quoted_words]
         self.command = words[0] if words else ''
         self.args = []
 
-        for word in words[1:]:
-            if re.match(r'^[a-zA-Z0-9_]+=', word):
-                name, value = word.split('=', maxsplit=1)
-                if name in self.named_args:
+        names = set()
+        bodies = []
+        for quoted, word in zip(quoted_words[1:], words[1:]):
+            tag = _heredoc_tag(quoted) if heredocs is not None else None
+            match = _NAMED_ARG_RE.match(word)
+            value = word[match.end():] if match else word
+            quoted_match = _NAMED_ARG_RE.match(quoted)
+            quoted_value = quoted[quoted_match.end():] if quoted_match else quoted
+            if tag is not None:
+                try:
+                    value = next(heredocs)
+                except StopIteration:
+                    raise InvalidInput('missing heredoc: %s' % (tag,)) from None
+                bodies.append(value)
+            else:
+                value = _parse_value(value, quoted=value != quoted_value)
+
+            if match:
+                name = sys.intern(match.group(1))
+                if name in names:
                     raise ValueError('multiple values for key: %s' % (name,))
+                names.add(name)
                 self.args.append(NamedArg(name, value))
             else:
-                self.args.append(PositionalArg(word))
+                self.args.append(PositionalArg(value))
+
+        if bodies:
+            self.heredocs = tuple(bodies)
+
+    @property
+    def words(self) -> List[str]:
+        """Returns command line words, with enclosing quotes dropped."""
+        if self._verbatim:
+            return self.quoted_words
+        return [drop_enclosing_quotes(word) for word in self.quoted_words]
 
     def __eq__(self, other):
         return (self.command, self.args) == (other.command, other.args)
@@ -78,11 +241,25 @@ class CommandLine:
         return ('CommandLine(raw_text=%s,quoted_words=%s,command=%s,args=%s)'
                 % (repr(self.raw_text), repr(self.quoted_words), repr(self.command), repr(self.args)))
 
+    def subcommand_line(self) -> 'CommandLine':
+        """
+        Returns the command line with the command dropped, i.e. starting at
+        the first argument, which is treated as a subcommand name.
+        """
+        if not self.quoted_words:
+            return CommandLine('')
+        if self._verbatim:
+            return CommandLine.from_words(self.words[1:])
+        text = self.raw_text.lstrip()
+        return CommandLine(text[len(self.quoted_words[0]):], heredocs=iter(self.heredocs))
+
     def assign_args(self,
-                    cmd: Command) -> OrderedMapping[str, Union[str, MissingArg]]:
+                    cmd: Command,
+                    exclude: Sequence[str] = ()) -> OrderedMapping[str, Union[str, MissingArg]]:
         """
         Assigns arguments to named command parameters. Does not handle default
-        arguments.
+        arguments. Parameters listed in EXCLUDE are neither assigned positional
+        arguments nor included in the result, unless explicitly named.
         """
 
         assigned_args = collections.OrderedDict()
@@ -90,7 +267,7 @@ class CommandLine:
 
         def find_first_unassigned_param():
             for name in cmd.parameters:
-                if name not in assigned_args:
+                if name not in assigned_args and name not in exclude:
                     return name
 
             raise InvalidInput('cannot assign positional argument: no more expected parameters')
@@ -114,7 +291,7 @@ class CommandLine:
                 assert False, 'unexpected argument type: %r' % arg
 
         for name in cmd.parameters:
-            if name not in assigned_args:
+            if name not in assigned_args and name not in exclude:
                 assigned_args[name] = MISSING_ARG
 
         return assigned_args
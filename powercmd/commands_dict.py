@@ -3,27 +3,165 @@ Command name -> Command object dictionary able to choose most appropriate
 command by partial name.
 """
 
+import bisect
+import threading
+from typing import List, Mapping
 
+from powercmd.bk_tree import BKTree
 from powercmd.command import Command
 from powercmd.exceptions import InvalidInput
-from powercmd.match_string import match_string
+from powercmd.match_string import TextMatchStrategy, fuzzy_match_string
 
 
 class CommandsDict(dict):
     """
     A container for Command objects that allows accessing them by name.
 
-    Functionally, Mapping[str, Command].
+    Functionally, Mapping[str, Command]. Indexes used for matching partial
+    names are updated incrementally whenever a command is added or removed.
+
+    Safe to use from multiple threads. Modifications are serialized, while
+    lookups take no locks: the sorted name list is replaced rather than
+    modified in place, so readers always see a consistent snapshot of it.
     """
+    MAX_SUGGESTIONS = 5
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self._sorted_names = []
+        self._names_index = BKTree()
+        self._write_lock = threading.RLock()
+        self.update(*args, **kwargs)
+
+    def __setitem__(self, name: str, cmd: Command):
+        with self._write_lock:
+            if name not in self:
+                sorted_names = list(self._sorted_names)
+                bisect.insort(sorted_names, name)
+                self._sorted_names = sorted_names
+                self._names_index.add(name)
+            super().__setitem__(name, cmd)
+
+    def __delitem__(self, name: str):
+        with self._write_lock:
+            super().__delitem__(name)
+            self._remove_name(name)
+
+    def _remove_name(self, name: str):
+        """Removes NAME of a deleted command from indexes."""
+        sorted_names = list(self._sorted_names)
+        del sorted_names[bisect.bisect_left(sorted_names, name)]
+        self._sorted_names = sorted_names
+        self._names_index.remove(name)
+
+    def pop(self, name: str, *default):
+        with self._write_lock:
+            if name not in self:
+                return super().pop(name, *default)
+            cmd = super().pop(name)
+            self._remove_name(name)
+            return cmd
+
+    def popitem(self):
+        with self._write_lock:
+            name, cmd = super().popitem()
+            self._remove_name(name)
+            return name, cmd
+
+    def setdefault(self, name: str, cmd: Command = None):
+        with self._write_lock:
+            if name not in self:
+                self[name] = cmd
+            return self[name]
+
+    def clear(self):
+        with self._write_lock:
+            super().clear()
+            self._sorted_names = []
+            self._names_index = BKTree()
+
+    def update(self, *args, **kwargs):
+        """Inserts multiple commands at once, updating indexes only once."""
+        commands = dict(*args, **kwargs)
+        with self._write_lock:
+            new_names = [name for name in commands if name not in self]
+            super().update(commands)
+            if new_names:
+                self._sorted_names = sorted(self._sorted_names + new_names)
+                for name in new_names:
+                    self._names_index.add(name)
+
+    def add_all(self, commands: Mapping[str, Command]):
+        """
+        Inserts COMMANDS at once. Raises ValueError without inserting any of
+        them if some of the names are already used.
+        """
+        with self._write_lock:
+            duplicates = sorted(name for name in commands if name in self)
+            if duplicates:
+                raise ValueError('command already exists: %s' % (', '.join(duplicates),))
+            self.update(commands)
+
+    def _prefix_matches(self, prefix: str) -> List[str]:
+        """Returns all command names starting with PREFIX, sorted."""
+        sorted_names = self._sorted_names
+        start = bisect.bisect_left(sorted_names, prefix)
+        end = start
+        while (end < len(sorted_names)
+               and sorted_names[end].startswith(prefix)):
+            end += 1
+        return sorted_names[start:end]
+
+    def match(self,
+              short_cmd: str,
+              verbose: bool = False) -> List[str]:
+        """
+        Returns a sorted list of command names matching SHORT_CMD. Equivalent
+        to match_string(SHORT_CMD, self), but exact and prefix matches are
+        found without looking at every command name.
+        """
+        if short_cmd in self:
+            strategy, matches = TextMatchStrategy.Exact, [short_cmd]
+        else:
+            strategy, matches = TextMatchStrategy.Prefix, self._prefix_matches(short_cmd)
+
+        if not matches:
+            return fuzzy_match_string(short_cmd, self._sorted_names, verbose=verbose)
+
+        if verbose:
+            print('* %s: %s' % (strategy.name, ' '.join(matches)))
+        return matches
+
+    def suggest(self,
+                short_cmd: str,
+                max_distance: int = None) -> List[str]:
+        """
+        Returns names of commands similar to SHORT_CMD, i.e. within
+        MAX_DISTANCE edits of it, closest first.
+        """
+        if max_distance is None:
+            max_distance = max(1, min(2, len(short_cmd) // 2))
+
+        matches = self._names_index.find(short_cmd, max_distance)
+        return [name for _, name in matches[:self.MAX_SUGGESTIONS]]
+
     def choose(self,
                short_cmd: str,
                verbose: bool = False) -> Command:
         """Returns a command handler that matches SHORT_CMD."""
-        matches = match_string(short_cmd, self, verbose=verbose)
+        matches = self.match(short_cmd, verbose=verbose)
 
         if not matches:
+            suggestions = self.suggest(short_cmd)
+            if suggestions:
+                raise InvalidInput('no such command: %s (did you mean: %s?)'
+                                   % (short_cmd, ', '.join(suggestions)))
             raise InvalidInput('no such command: %s' % (short_cmd,))
         if len(matches) > 1:
             raise InvalidInput('ambigious command: %s (possible: %s)'
                                % (short_cmd, ' '.join(matches)))
-        return self[matches[0]]
+
+        cmd = self.get(matches[0])
+        if cmd is None:  # removed by another thread in the meantime
+            raise InvalidInput('no such command: %s' % (short_cmd,))
+        return cmd
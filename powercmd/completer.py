@@ -2,21 +2,19 @@
 Command line completion box hints implementation.
 """
 
-import enum
-from typing import Sequence
+from typing import Any, Sequence
 
 import prompt_toolkit.completion
-from prompt_toolkit.completion import Completion
+from prompt_toolkit.completion import Completion, PathCompleter
 from prompt_toolkit.completion.base import CompleteEvent
 from prompt_toolkit.document import Document
 
-from powercmd.command import Command
-from powercmd.command_line import CommandLine
+from powercmd.command import Command, CommandGroup
+from powercmd.command_line import CommandLine, FileArg, split_pipeline
 from powercmd.commands_dict import CommandsDict
 from powercmd.match_string import match_string
 from powercmd.split_list import split_list
-from powercmd.utils import (is_generic_list, is_generic_tuple, is_generic_type,
-                            is_generic_union)
+from powercmd.type_info import TypeInfo, TypeKind, classify, type_name
 
 
 class Completer(prompt_toolkit.completion.Completer):
@@ -24,14 +22,17 @@ class Completer(prompt_toolkit.completion.Completer):
     Auto-completion suggestion provider.
     """
 
-    def __init__(self, commands: CommandsDict):
+    def __init__(self,
+                 commands: CommandsDict,
+                 file_args: bool = False):
         self._cmds = commands
+        self._file_args = file_args
 
     def _complete_commands(self, incomplete_cmd: str) -> Sequence[Completion]:
         """
         Returns a sequence of command completions matching INCOMPLETE_CMD prefix.
         """
-        matching_cmds = (self._cmds[cmd] for cmd in match_string(incomplete_cmd, self._cmds))
+        matching_cmds = (self._cmds[cmd] for cmd in self._cmds.match(incomplete_cmd))
         yield from (Completion(cmd.name,
                                start_position=-len(incomplete_cmd),
                                display_meta=cmd.short_description)
@@ -52,47 +53,85 @@ class Completer(prompt_toolkit.completion.Completer):
                            for param in match_string(incomplete_param, unassigned_param_names))
         yield from (Completion(param.name,
                                start_position=-len(incomplete_param),
-                               display_meta=str(param.type.__name__ if hasattr(param.type, '__name__') else str(param.type)))
+                               display_meta=type_name(param.type))
                     for param in matching_params)
 
     def _complete_generic_list(self,
-                               inner_type: type,
+                               info: TypeInfo,
                                incomplete_value: str):
         """
-        Returns completions for a list of values of INNER_TYPE.
+        Returns completions for a list or set of values of type described by
+        INFO.
         """
         args = list(split_list(incomplete_value, allow_unmatched=True))
-        return self._complete_value(inner_type, args[-1])
+        return self._complete_value(info.args[0], args[-1])
 
     def _complete_generic_tuple(self,
-                                inner_types: Sequence[type],
+                                info: TypeInfo,
                                 incomplete_value: str):
         """
-        Returns completions for one of tuple values matching one of INNER_TYPES.
+        Returns completions for one of tuple values matching one of types
+        described by INFO.
         """
         args = list(split_list(incomplete_value, allow_unmatched=True))
-        if len(args) > len(inner_types):
+        if len(args) > len(info.args):
             return []
-        return self._complete_value(inner_types[len(args) - 1], args[-1])
+        return self._complete_value(info.args[len(args) - 1], args[-1])
+
+    def _complete_generic_dict(self,
+                               info: TypeInfo,
+                               incomplete_value: str):
+        """
+        Returns completions for a key or a value of the last dict item, with
+        types described by INFO.
+        """
+        item = list(split_list(incomplete_value, allow_unmatched=True))[-1]
+        key = split_list(item, separator=':', allow_unmatched=True)[0]
+        if len(key) == len(item):
+            return self._complete_value(info.args[0], key)
+        return self._complete_value(info.args[1], item[len(key) + 1:])
 
     def _complete_generic_union(self,
-                                inner_types: Sequence[type],
+                                info: TypeInfo,
                                 incomplete_value: str):
         """
-        Returns completions for any of INNER_TYPES.
+        Returns completions for any of types described by INFO.
         """
-        for inner_type in inner_types:
+        for inner_type in info.args:
             try:
                 yield from self._complete_value(inner_type, incomplete_value)
             except ValueError:
                 pass
 
     @staticmethod
-    def _complete_enum(enum_hint: type,
+    def _complete_literal(info: TypeInfo,
+                          incomplete_value: str):
+        """
+        Returns completions for one of Literal values described by INFO.
+        """
+        names = [str(value) for value in info.args]
+        yield from (Completion(name, start_position=-len(incomplete_value))
+                    for name in match_string(incomplete_value, names))
+
+    def _complete_annotated(self,
+                            info: TypeInfo,
+                            incomplete_value: str):
+        """
+        Returns completions for the type wrapped in Annotated[...] described
+        by INFO, or ones provided by metadata that defines powercmd_complete.
+        """
+        for metadata in info.args[1:]:
+            if hasattr(metadata, 'powercmd_complete'):
+                return self._complete_with(metadata, incomplete_value)
+        return self._complete_value(info.args[0], incomplete_value)
+
+    @staticmethod
+    def _complete_enum(info: TypeInfo,
                        incomplete_value: str):
         """
         Returns completions for an class derived from enum.Enum type.
         """
+        enum_hint = info.origin
         matching_names = match_string(incomplete_value, (val.name for val in list(enum_hint)))
         matching_vals = (enum_hint[name] for name in matching_names)
         yield from (Completion(val.name,
@@ -101,12 +140,25 @@ class Completer(prompt_toolkit.completion.Completer):
                     for val in matching_vals)
 
     @staticmethod
-    def _complete_custom(type_hint: type,
+    def _complete_custom(info: TypeInfo,
                          incomplete_value: str):
         """
-        Returns a list of completion using type.powercmd_complete method.
+        Returns a list of completion using type.powercmd_complete method, if
+        the type defines one.
+        """
+        return Completer._complete_with(info.origin, incomplete_value)
+
+    @staticmethod
+    def _complete_with(provider: Any,
+                       incomplete_value: str):
         """
-        completions = type_hint.powercmd_complete(incomplete_value)
+        Returns a list of completions using PROVIDER.powercmd_complete
+        method, if there is one. PROVIDER is a type or Annotated[...] metadata.
+        """
+        if not hasattr(provider, 'powercmd_complete'):
+            return []
+
+        completions = provider.powercmd_complete(incomplete_value)
         # allow powercmd_complete to return lists of strings for backward compatibility
         if completions and not isinstance(completions[0], Completion):
             completions = (Completion(cpl,
@@ -121,24 +173,30 @@ class Completer(prompt_toolkit.completion.Completer):
         Returns a sequence of parameter value completions matching
         INCOMPLETE_VALUE prefix for given CMD.
         """
-        if is_generic_type(type_hint):
-            if is_generic_list(type_hint):
-                return self._complete_generic_list(type_hint.__args__[0], incomplete_value)
-            if is_generic_tuple(type_hint):
-                return self._complete_generic_tuple(type_hint.__args__, incomplete_value)
-            if is_generic_union(type_hint):
-                return self._complete_generic_union(getattr(type_hint, '__args__',
-                                                            getattr(type_hint, '__union_types__', None)),
-                                                    incomplete_value)
-            raise NotImplementedError('generic constructor for %s not implemented'
-                                      % (type_hint,))
-
-        if isinstance(type_hint, type) and issubclass(type_hint, enum.Enum):
-            return self._complete_enum(type_hint, incomplete_value)
-        if hasattr(type_hint, 'powercmd_complete'):
-            return self._complete_custom(type_hint, incomplete_value)
-
-        return []
+        info = classify(type_hint)
+        return getattr(self, _VALUE_COMPLETERS[info.kind])(info, incomplete_value)
+
+    @staticmethod
+    def _complete_path(cmdline: CommandLine) -> Sequence[Completion]:
+        """
+        Returns completions of a file path given as @path in the last word of
+        CMDLINE.
+        """
+        word = cmdline.quoted_words[-1]
+        path = word[word.index('@') + 1:]
+        return PathCompleter(expanduser=True).get_completions(Document(path, len(path)), CompleteEvent())
+
+    def _complete_subcommand(self,
+                             group: CommandGroup,
+                             document: Document) -> Sequence[Completion]:
+        """
+        Returns completions for a command line starting with GROUP name,
+        considering only commands defined within that group.
+        """
+        text = document.text_before_cursor.lstrip()
+        text = text[len(text.split(maxsplit=1)[0]):]
+        completer = Completer(group.subcommands, file_args=self._file_args)
+        return completer.get_completions(Document(text=text, cursor_position=len(text)))
 
     def get_completions(self,
                         document: Document,
@@ -146,6 +204,12 @@ class Completer(prompt_toolkit.completion.Completer):
         """
         Returns a sequence of completions for given command line.
         """
+        if '|' in document.text_before_cursor:
+            # only complete the last command of a pipeline
+            stages = split_pipeline(document.text_before_cursor)
+            if len(stages) > 1:
+                return self.get_completions(Document(text=stages[-1], cursor_position=len(stages[-1])))
+
         incomplete_cmd = ''
         if document.text.strip():
             incomplete_cmd = document.text.strip().split(maxsplit=1)[0]
@@ -165,6 +229,9 @@ class Completer(prompt_toolkit.completion.Completer):
             # invalid command
             return []
 
+        if isinstance(cmd, CommandGroup):
+            return self._complete_subcommand(cmd, document)
+
         cmdline = CommandLine(document.text)
         incomplete_arg = cmdline.get_current_arg(cmd)
         completions = []
@@ -176,7 +243,27 @@ class Completer(prompt_toolkit.completion.Completer):
 
         completions += self._complete_params(cmd, cmdline)
 
-        if incomplete_arg is not None:
-            completions += self._complete_value(incomplete_arg.param.type, incomplete_arg.value)
+        value = incomplete_arg.value
+        if isinstance(value, FileArg) and self._file_args:
+            completions += self._complete_path(cmdline)
+        else:
+            if isinstance(value, FileArg):
+                value = value.text
+            completions += self._complete_value(incomplete_arg.param.type, value)
 
         return completions
+
+
+# TypeInfo.kind -> name of the Completer method returning completions for values of that kind
+_VALUE_COMPLETERS = {
+    TypeKind.PLAIN: '_complete_custom',
+    TypeKind.ENUM: '_complete_enum',
+    TypeKind.LIST: '_complete_generic_list',
+    TypeKind.ITERABLE: '_complete_generic_list',
+    TypeKind.SET: '_complete_generic_list',
+    TypeKind.TUPLE: '_complete_generic_tuple',
+    TypeKind.DICT: '_complete_generic_dict',
+    TypeKind.UNION: '_complete_generic_union',
+    TypeKind.LITERAL: '_complete_literal',
+    TypeKind.ANNOTATED: '_complete_annotated',
+}
@@ -0,0 +1,133 @@
+"""
+Limiting the number of concurrently running commands.
+
+Commands executed from multiple threads (server sessions, the JSON protocol
+with several workers, bulk invocations) may overload resources they share.
+A command can be limited with a decorator:
+
+    class MyCmd(powercmd.Cmd):
+        @powercmd.concurrency_limit(2, max_queued=8)
+        def do_build(self, target: str):
+            ...
+
+and all commands of a Cmd class with a global limit:
+
+    class MyCmd(powercmd.Cmd):
+        CONCURRENCY_LIMIT = ConcurrencyLimit(16)
+
+A command that cannot start immediately waits for a slot, or fails with
+CommandRejected if the limit does not allow waiting or too many commands are
+waiting already. Limits are held until the handler returns, even if the
+command timed out in the meantime; iterators returned by handlers are
+consumed outside of the limit.
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+from powercmd.exceptions import CommandRejected
+
+
+class ConcurrencyLimit:
+    """
+    Allows at most MAX_CONCURRENT holders at the same time. If WAIT is set,
+    up to MAX_QUEUED (any number if None) callers wait for a free slot.
+    Otherwise, callers are rejected as soon as all slots are taken.
+    """
+    def __init__(self,
+                 max_concurrent: int,
+                 max_queued: int = None,
+                 wait: bool = True):
+        if max_concurrent <= 0:
+            raise ValueError('max_concurrent must be positive, got %d' % (max_concurrent,))
+
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued if wait else 0
+        self.running = 0
+        self.queued = 0
+        self.rejected = 0
+        self.waits = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """
+        Takes a slot, waiting for one to be released if needed. Raises
+        CommandRejected if the caller is not allowed to wait.
+        """
+        with self._cond:
+            if self.running < self.max_concurrent:
+                self.running += 1
+                return
+
+            if self.max_queued is not None and self.queued >= self.max_queued:
+                self.rejected += 1
+                raise CommandRejected('concurrency limit reached: %d running, %d queued'
+                                      % (self.running, self.queued))
+
+            self.queued += 1
+            start = time.perf_counter()
+            try:
+                self._cond.wait_for(lambda: self.running < self.max_concurrent)
+            finally:
+                self.queued -= 1
+
+            wait_time = time.perf_counter() - start
+            self.waits += 1
+            self.total_wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+            self.running += 1
+
+    def release(self):
+        """Frees a slot taken by `acquire`."""
+        with self._cond:
+            self.running -= 1
+            self._cond.notify()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    @property
+    def average_wait_time(self) -> float:
+        """Returns the average time callers waited for a slot, in seconds."""
+        return self.total_wait_time / self.waits if self.waits else 0.0
+
+    def __str__(self):
+        return ('%d/%d running, %d queued, %d rejected, %d waited (avg %.1fms, max %.1fms)'
+                % (self.running, self.max_concurrent, self.queued, self.rejected, self.waits,
+                   self.average_wait_time * 1000, self.max_wait_time * 1000))
+
+
+def get_concurrency_limit(handler: Callable) -> Optional[ConcurrencyLimit]:
+    """
+    Returns the limit of HANDLER decorated with @concurrency_limit, or None
+    if it has none. Lazily loaded handlers that were not loaded yet are not
+    imported and considered unlimited.
+    """
+    if getattr(handler, 'loaded', True) is False:
+        return None
+    return getattr(handler, 'powercmd_concurrency', None)
+
+
+def concurrency_limit(max_concurrent: int,
+                      max_queued: int = None,
+                      wait: bool = True) -> Callable[[Callable], Callable]:
+    """
+    Allows at most MAX_CONCURRENT instances of a command to run at the same
+    time. Further ones wait for a free slot if WAIT is set, unless there are
+    already MAX_QUEUED of them waiting; otherwise they fail with
+    CommandRejected.
+
+    Current state and wait times can be displayed with the `stats` command.
+    """
+    def decorator(handler: Callable) -> Callable:
+        handler.powercmd_concurrency = ConcurrencyLimit(max_concurrent, max_queued, wait)
+        return handler
+
+    return decorator
@@ -5,3 +5,22 @@ Exception types used by powercmd module.
 
 class InvalidInput(ValueError):
     """An error raised if the input cannot be parsed as a valid command."""
+
+
+class CommandCancelled(Exception):
+    """An error raised if a command was cancelled before it completed."""
+    def __init__(self, message: str = 'command cancelled'):
+        super().__init__(message)
+        # name of the cancelled command, filled in by CommandInvoker
+        self.command = None
+
+
+class CommandTimeout(CommandCancelled):
+    """An error raised if a command did not complete within its time limit."""
+    def __init__(self, timeout: float):
+        super().__init__('command timed out after %gs' % (timeout,))
+        self.timeout = timeout
+
+
+class CommandRejected(Exception):
+    """An error raised if a command cannot start because of concurrency limits."""
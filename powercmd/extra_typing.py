@@ -2,7 +2,9 @@
 Utility classes intended for use as generic type hints.
 """
 
-from typing import Mapping, TypeVar
+import binascii
+import string
+from typing import Annotated, Any, Mapping, Sequence, TypeVar
 
 
 # pylint: disable=R0903
@@ -12,3 +14,117 @@ class OrderedMapping(Mapping[TypeVar('T'), TypeVar('S')]):
     (insertion order). Intended for use in type annotations, where a
     collections.OrderedDict with specific element types is expected.
     """
+
+
+class BinaryFormat:
+    """
+    Base class of Annotated[...] metadata describing a text encoding of
+    binary data. The annotated type (bytes, bytearray or memoryview) is the
+    type of the argument passed to the handler. If LENGTH is given, decoded
+    data must be exactly LENGTH bytes long.
+
+    Example:
+        def do_write(self, key: Annotated[bytearray, Hex(16)]):
+            ...
+    """
+    # name of the encoding, displayed in completion hints
+    name = None
+    # characters that encode data
+    alphabet = ''
+
+    def __init__(self, length: int = None):
+        self.length = length
+
+    def decode(self, text: str, target: type) -> Any:
+        """Returns data encoded in TEXT, as an object of type TARGET."""
+        raise NotImplementedError()
+
+    def powercmd_parse(self, text: str, target: type = bytes) -> Any:
+        """
+        Returns data encoded in TEXT as an object of type TARGET. Raises
+        ValueError if TEXT is not valid or the data has unexpected length.
+        """
+        data = self.decode(text, target)
+        if self.length is not None and len(data) != self.length:
+            raise ValueError('expected %d bytes of %s data, got %d' % (self.length, self.name, len(data)))
+        return data
+
+    def encoded_length(self, text: str) -> int:
+        """Returns the number of bytes encoded in TEXT so far."""
+        raise NotImplementedError()
+
+    def powercmd_complete(self, text: str) -> Sequence[Any]:
+        """
+        Returns a hint showing how many bytes TEXT encodes, and how many are
+        expected.
+        """
+        from prompt_toolkit.completion import Completion  # interactive use only
+
+        size = self.encoded_length(text)
+        if self.length is None:
+            hint = '%d bytes' % (size,)
+        else:
+            hint = '%d/%d bytes' % (size, self.length)
+        return [Completion(text, start_position=-len(text), display=hint, display_meta=self.name)]
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.length == other.length
+
+    def __hash__(self):
+        return hash((type(self), self.length))
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__, '' if self.length is None else self.length)
+
+
+class Hex(BinaryFormat):
+    """
+    Binary data encoded as hex digits. Digits may be grouped with whitespace
+    or any of SEPARATORS, e.g. `de:ad:be:ef` or `dead beef`.
+    """
+    name = 'hex'
+    alphabet = string.hexdigits
+    separators = ':-_,'
+
+    def __init__(self, length: int = None):
+        super().__init__(length)
+        self._drop_separators = str.maketrans('', '', self.separators)
+
+    def decode(self, text: str, target: type) -> Any:
+        # fromhex skips whitespace itself and decodes straight into the result;
+        # other separators are only removed if the text turns out to use them
+        ctor = bytearray if target is bytearray else bytes
+        try:
+            data = ctor.fromhex(text)
+        except ValueError:
+            data = ctor.fromhex(text.translate(self._drop_separators))
+        return memoryview(data) if target is memoryview else data
+
+    def encoded_length(self, text: str) -> int:
+        return sum(c in self.alphabet for c in text) // 2
+
+
+class Base64(BinaryFormat):
+    """
+    Binary data encoded in base64. Whitespace and other characters outside
+    of the base64 alphabet are ignored.
+    """
+    name = 'base64'
+    alphabet = string.ascii_letters + string.digits + '+/'
+
+    def decode(self, text: str, target: type) -> Any:
+        try:
+            data = binascii.a2b_base64(text)
+        except binascii.Error as exc:
+            raise ValueError('invalid base64 data: %s' % (exc,)) from None
+        if target is bytearray:
+            # binascii cannot decode into an existing buffer
+            return bytearray(data)
+        return memoryview(data) if target is memoryview else data
+
+    def encoded_length(self, text: str) -> int:
+        return sum(c in self.alphabet for c in text) * 3 // 4
+
+
+HexBytes = Annotated[bytes, Hex()]
+Base64Bytes = Annotated[bytes, Base64()]
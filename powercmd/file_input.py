@@ -0,0 +1,95 @@
+"""
+Reading command arguments from files.
+
+If enabled with `Cmd.FILE_ARGUMENTS`, an argument written as `@path` (or
+`name=@path`) in the command line is read from the file at PATH instead of
+being typed inline. Quoted arguments, like "@foo", are taken literally. Paths
+containing whitespace can be quoted after the `@`: `name=@"my file.txt"`.
+
+Large payloads are not copied more than necessary:
+* `memoryview` parameters get the file mapped into memory,
+* `bytes` and `bytearray` parameters get the file contents read directly,
+* `List[T]`, `Set[T]` and `Iterable[T]` parameters get their items parsed
+  one by one while the file is read, without building a string holding all
+  of them. Items may be separated with commas or newlines, and enclosed in
+  brackets. Iterables are read lazily, while the handler consumes them.
+
+Other parameters are parsed from the file contents, with a single trailing
+newline removed, as if they were typed inline.
+"""
+
+import itertools
+import mmap
+import os
+from typing import IO, Iterator, Union
+
+from powercmd.split_list import split_list_stream
+
+# number of characters read from list files at once
+CHUNK_SIZE = 1 << 16
+
+
+def map_file(path: str) -> memoryview:
+    """Returns a read-only view of the contents of the file at PATH."""
+    with open(path, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped
+            return memoryview(b'')
+    # the mapping stays open as long as the view is referenced
+    return memoryview(data)
+
+
+def read_bytes(path: str,
+               target: type = bytes) -> Union[bytes, bytearray]:
+    """Returns the contents of the file at PATH as TARGET: bytes or bytearray."""
+    with open(path, 'rb') as f:
+        if target is bytes:
+            return f.read()
+        data = bytearray(os.fstat(f.fileno()).st_size)
+        del data[f.readinto(data):]
+        return data
+
+
+def read_text(path: str) -> str:
+    """Returns the text stored in the file at PATH, without a trailing newline."""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    return text[:-1] if text.endswith('\n') else text
+
+
+def _iter_items(f: IO[str]) -> Iterator[str]:
+    """Yields non-empty list items read from text file F, then closes it."""
+    with f:
+        chunks = iter(lambda: f.read(CHUNK_SIZE), '')
+        first = next(chunks, '').lstrip()
+        enclosed = first.startswith('[')
+        if enclosed:
+            first = first[1:]
+
+        last = None
+        for item in split_list_stream(itertools.chain([first], chunks), separators=',\n'):
+            if not item.strip():
+                continue
+            if last is not None:
+                yield last
+            last = item
+
+    if enclosed:
+        last = (last or '').rstrip()
+        if not last.endswith(']'):
+            raise ValueError('unmatched [ in list file: %s' % (f.name,))
+        last = last[:-1]
+        if not last.strip():
+            return
+    if last is not None:
+        yield last
+
+
+def iter_list_items(path: str) -> Iterator[str]:
+    """
+    Returns an iterator over string representations of list items stored in
+    the file at PATH. The file is opened immediately, but read lazily.
+    """
+    return _iter_items(open(path, encoding='utf-8'))
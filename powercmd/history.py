@@ -0,0 +1,313 @@
+"""
+Persistent command history suitable for huge, shared history files.
+
+MmapHistory memory-maps the history file and decodes entries straight from
+the mapping, most recent first, instead of reading the whole file first like
+prompt_toolkit FileHistory does. prompt_toolkit keeps every entry it loads in
+memory, so LOAD_LIMIT can restrict it to the most recent ones.
+
+`MmapHistory.search` finds entries containing some text, or starting with it,
+in the whole file, however many of them were loaded. It does not keep a
+separate index: the mapping itself is scanned from the end for the encoded
+text, and only matching entries are decoded. Cmd uses prefix searches to
+suggest completions of the line being typed (accepted with the right arrow
+key). prompt_toolkit reverse search (Ctrl-R) still only sees loaded entries.
+
+New entries are buffered and appended in bulk, and duplicate entries are
+removed from the file in the background.
+
+Multiple processes may share a history file: appends and compactions hold an
+exclusive lock on it (on platforms supporting `fcntl.flock`).
+
+This module requires prompt_toolkit, so it is not imported by powercmd itself:
+
+    from powercmd.history import MmapHistory
+
+    MyCmd(history=MmapHistory('~/.mycmd_history')).cmdloop()
+
+The file stores one entry per line, with backslashes and newlines escaped.
+"""
+
+import atexit
+import contextlib
+import itertools
+import mmap
+import os
+import tempfile
+import threading
+import weakref
+from typing import BinaryIO, Iterator, Optional
+
+from prompt_toolkit.auto_suggest import AutoSuggest, Suggestion, ThreadedAutoSuggest
+from prompt_toolkit.buffer import Buffer
+from prompt_toolkit.document import Document
+from prompt_toolkit.history import History
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def _escape(text: str) -> bytes:
+    """Encodes TEXT as a single line of the history file."""
+    return text.replace('\\', '\\\\').replace('\n', '\\n').encode('utf-8')
+
+
+def _unescape(line: bytes) -> str:
+    """Decodes a history file LINE encoded with `_escape`."""
+    text = line.decode('utf-8', errors='replace')
+    if '\\' not in text:
+        return text
+    return '\\'.join(part.replace('\\n', '\n') for part in text.split('\\\\'))
+
+
+@contextlib.contextmanager
+def _locked(path: str) -> Iterator[BinaryIO]:
+    """
+    Opens the file at PATH for reading and appending, creating it if needed,
+    and holds an exclusive lock on it until the context is left. If the file
+    gets replaced by a compaction while waiting for the lock, the new one is
+    opened instead.
+    """
+    while True:
+        f = open(path, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            if os.path.samestat(os.fstat(f.fileno()), os.stat(path)):
+                break
+        except FileNotFoundError:
+            pass
+        f.close()
+
+    try:
+        yield f
+    finally:
+        f.close()
+
+
+# MmapHistory instances with entries to be flushed at exit
+_INSTANCES = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all():
+    """Writes buffered entries of all MmapHistory instances."""
+    for history in list(_INSTANCES):
+        history.flush()
+
+
+class MmapHistory(History):
+    """
+    Command history stored in a file at PATH.
+
+    Entries are written in batches of FLUSH_EVERY, when the instance is
+    garbage collected and when the process exits. After every COMPACT_EVERY
+    entries appended by this instance, duplicate entries are removed from the
+    file by a background thread; 0 disables automatic compaction.
+
+    If LOAD_LIMIT is given, the prompt only loads that many most recent
+    entries. Older ones can still be found with `search`.
+    """
+    def __init__(self,
+                 path: str,
+                 flush_every: int = 16,
+                 compact_every: int = 10000,
+                 load_limit: Optional[int] = None):
+        super().__init__()
+        self.path = os.path.expanduser(path)
+        self._flush_every = flush_every
+        self._compact_every = compact_every
+        self._load_limit = load_limit
+        self._pending = []
+        self._appended = 0
+        self._lock = threading.Lock()
+        self._map = None
+        self._map_stat = None
+        self._compaction = None
+
+        _INSTANCES.add(self)
+
+    def __del__(self):
+        self.flush()
+
+    def _mapped(self) -> Optional[mmap.mmap]:
+        """
+        Returns the history file mapped into memory, or None if it is empty.
+        The file is remapped if it changed since last call.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+
+        if (stat.st_ino, stat.st_size) != self._map_stat:
+            # the old mapping is not closed explicitly: it may still be used by
+            # a generator returned earlier, and gets closed once unreferenced
+            self._map = None
+            if stat.st_size:
+                with open(self.path, 'rb') as f:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._map_stat = (stat.st_ino, stat.st_size)
+        return self._map
+
+    @staticmethod
+    def _complete_size(data: mmap.mmap) -> int:
+        """Returns the length of DATA up to the end of last complete entry."""
+        return data.rfind(b'\n') + 1
+
+    def load_history_strings(self) -> Iterator[str]:
+        """Yields up to LOAD_LIMIT stored entries, most recent first."""
+        return itertools.islice(self._entries(), self._load_limit)
+
+    def _entries(self) -> Iterator[str]:
+        """Yields all stored entries, most recent first."""
+        with self._lock:
+            pending = list(self._pending)
+            data = self._mapped()
+
+        yield from reversed(pending)
+        if data is None:
+            return
+
+        end = self._complete_size(data)
+        while end > 0:
+            start = data.rfind(b'\n', 0, end - 1) + 1
+            yield _unescape(data[start:end - 1])
+            end = start
+
+    def store_string(self, string: str):
+        """Adds STRING to the history. It is written to file in batches."""
+        with self._lock:
+            self._pending.append(string)
+            if len(self._pending) >= self._flush_every:
+                self._flush_locked()
+
+    def flush(self):
+        """Writes all buffered entries to the history file."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+
+        data = b''.join(_escape(text) + b'\n' for text in self._pending)
+        with _locked(self.path) as f:
+            f.write(data)
+        self._appended += len(self._pending)
+        self._pending = []
+
+        if self._compact_every and self._appended >= self._compact_every:
+            self._appended = 0
+            if self._compaction is None or not self._compaction.is_alive():
+                self._compaction = threading.Thread(target=self.compact, daemon=True)
+                self._compaction.start()
+
+    def search(self,
+               text: str,
+               prefix: bool = False) -> Iterator[str]:
+        """
+        Yields distinct entries containing TEXT, or starting with it if PREFIX
+        is set, most recent first.
+        """
+        def matches(entry):
+            return entry.startswith(text) if prefix else text in entry
+
+        seen = set()
+        if not text:
+            for entry in self._entries():
+                if entry not in seen:
+                    seen.add(entry)
+                    yield entry
+            return
+
+        with self._lock:
+            pending = list(self._pending)
+            data = self._mapped()
+
+        for entry in reversed(pending):
+            if matches(entry) and entry not in seen:
+                seen.add(entry)
+                yield entry
+        if data is None:
+            return
+
+        # escaped TEXT may also match inside an escape sequence, so every
+        # candidate is decoded and checked again
+        needle = (b'\n' if prefix else b'') + _escape(text)
+        end = self._complete_size(data)
+        while end > 0:
+            pos = data.rfind(needle, 0, end)
+            if pos < 0:
+                if prefix and data[:len(needle) - 1] == needle[1:]:
+                    pos = -1
+                else:
+                    return
+
+            start = pos + 1 if prefix else data.rfind(b'\n', 0, pos) + 1
+            stop = data.find(b'\n', start)
+            entry = _unescape(data[start:stop])
+            if matches(entry) and entry not in seen:
+                seen.add(entry)
+                yield entry
+            end = max(start - 1, 0)
+
+    def powercmd_auto_suggest(self) -> AutoSuggest:
+        """
+        Returns an AutoSuggest used by Cmd, suggesting the most recent entry
+        starting with the line typed so far. Searches run in a background
+        thread, so that they do not slow down typing.
+        """
+        return ThreadedAutoSuggest(HistorySuggest(self))
+
+    def compact(self):
+        """
+        Rewrites the history file, keeping only the most recent occurrence of
+        every entry.
+        """
+        with _locked(self.path) as f:
+            if not os.fstat(f.fileno()).st_size:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                seen = set()
+                kept = []
+                end = self._complete_size(data)
+                while end > 0:
+                    start = data.rfind(b'\n', 0, end - 1) + 1
+                    line = data[start:end]
+                    if line not in seen:
+                        seen.add(line)
+                        kept.append(line)
+                    end = start
+
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or '.',
+                                            prefix='.history-')
+            try:
+                with os.fdopen(fd, 'wb') as tmp:
+                    tmp.writelines(reversed(kept))
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+
+class HistorySuggest(AutoSuggest):
+    """
+    Suggests the rest of the most recent MmapHistory entry starting with the
+    text typed so far.
+    """
+    def __init__(self, history: MmapHistory):
+        self.history = history
+
+    def get_suggestion(self,
+                       buffer: Buffer,
+                       document: Document) -> Optional[Suggestion]:
+        text = document.text
+        if not text.strip():
+            return None
+        for entry in self.history.search(text, prefix=True):
+            if entry != text:
+                return Suggestion(entry[len(text):])
+        return None
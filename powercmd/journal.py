@@ -0,0 +1,222 @@
+"""
+Recording command sessions and replaying them for load and regression tests.
+
+A Cmd created with a `journal` appends every executed command line to it,
+along with the time it was issued, how long it took and the error it raised,
+if any:
+
+    with Journal('session.journal') as journal:
+        MyCmd(journal=journal).cmdloop()
+
+Each entry is stored as a single compact JSON array line:
+
+    [1700000000.25,0.0012,null,"sum 1 2"]
+
+A journal can be replayed against a Cmd subclass as fast as possible, at
+its original pace or N times faster than that, reporting throughput, latency
+percentiles and commands whose outcome differs from the recorded one:
+
+    python -m powercmd.journal mymodule:MyCmd session.journal --speed 10
+"""
+
+import argparse
+import collections
+import importlib
+import io
+import json
+import math
+import sys
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence
+
+from powercmd.cmd import Cmd
+from powercmd.output_capture import capture_output
+
+
+# A single command line executed during a recorded session
+JournalEntry = collections.namedtuple('JournalEntry', ['timestamp', 'duration', 'error', 'line'])
+
+
+class Journal:
+    """An append-only log of command lines, stored in a file at PATH."""
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def record(self,
+               line: str,
+               timestamp: float,
+               duration: float,
+               error: Optional[str] = None):
+        """
+        Appends an entry for LINE executed at TIMESTAMP (seconds since epoch),
+        that took DURATION seconds and failed with ERROR, unless it's None.
+        """
+        data = json.dumps([timestamp, duration, error, line], separators=(',', ':'))
+        with self._lock:
+            self._file.write(data + '\n')
+
+    def flush(self):
+        """Writes all recorded entries to the journal file."""
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        """Flushes and closes the journal file."""
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_journal(path: str) -> Iterator[JournalEntry]:
+    """Yields entries recorded in a journal file at PATH, one at a time."""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield JournalEntry(*json.loads(line))
+
+
+def _percentile(sorted_values: Sequence[float],
+                percent: float) -> float:
+    """Returns PERCENT-th percentile of SORTED_VALUES, using the nearest rank method."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class ReplayStats:
+    """Results of a journal replay."""
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.mismatches = []
+        self.elapsed = 0.0
+
+    @property
+    def count(self) -> int:
+        """Returns the number of replayed commands."""
+        return len(self.latencies)
+
+    @property
+    def throughput(self) -> float:
+        """Returns the number of commands executed per second."""
+        return self.count / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """Returns PERCENT-th percentile of command latencies, in seconds."""
+        return _percentile(sorted(self.latencies), percent)
+
+    def __str__(self):
+        latencies = sorted(self.latencies)
+        return ('%d commands in %.3fs (%.1f/s), %d errors, %d mismatched outcomes\n'
+                'latency: p50 %.3fms, p90 %.3fms, p99 %.3fms, max %.3fms'
+                % (self.count, self.elapsed, self.throughput, self.errors, len(self.mismatches),
+                   _percentile(latencies, 50) * 1000, _percentile(latencies, 90) * 1000,
+                   _percentile(latencies, 99) * 1000, latencies[-1] * 1000 if latencies else 0.0))
+
+
+class _LastEntry:
+    """A journal remembering only the most recently recorded entry."""
+    def __init__(self):
+        self.entry = None
+
+    def record(self,
+               line: str,
+               timestamp: float,
+               duration: float,
+               error: Optional[str] = None):
+        self.entry = JournalEntry(timestamp, duration, error, line)
+
+
+def replay(cmd: Cmd,
+           entries: Iterable[JournalEntry],
+           speed: float = None,
+           sleep: Callable[[float], Any] = time.sleep) -> ReplayStats:
+    """
+    Executes command lines from journal ENTRIES in CMD session, discarding
+    everything they print.
+
+    If SPEED is None, commands are executed as fast as possible. Otherwise,
+    they are issued SPEED times faster than they were recorded, e.g. 1.0
+    reproduces the original pace. If execution falls behind that schedule,
+    following commands are issued without waiting until it catches up.
+    """
+    stats = ReplayStats()
+    last = _LastEntry()
+    first_timestamp = None
+    # pylint: disable=protected-access
+    cmd_journal, cmd._journal = cmd._journal, last
+    start = time.perf_counter()
+
+    try:
+        with capture_output(io.StringIO()) as output:
+            for entry in entries:
+                if not entry.line:
+                    continue
+                if speed is not None:
+                    if first_timestamp is None:
+                        first_timestamp = entry.timestamp
+                    delay = (entry.timestamp - first_timestamp) / speed - (time.perf_counter() - start)
+                    if delay > 0:
+                        sleep(delay)
+
+                cmd.onecmd(entry.line)
+                stats.latencies.append(last.entry.duration)
+                failed = last.entry.error is not None
+                stats.errors += failed
+                if failed != (entry.error is not None):
+                    stats.mismatches.append(entry)
+
+                output.seek(0)
+                output.truncate()
+    finally:
+        cmd._journal = cmd_journal
+
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def _parse_speed(text: str) -> Optional[float]:
+    """Parses --speed value: 'max', 'original' or a multiplier."""
+    if text == 'max':
+        return None
+    if text == 'original':
+        return 1.0
+    speed = float(text)
+    if speed <= 0:
+        raise ValueError('speed must be positive: %s' % (text,))
+    return speed
+
+
+def _main(argv: List[str]) -> int:
+    """Command line interface: replays a journal and prints statistics."""
+    parser = argparse.ArgumentParser(prog='python -m powercmd.journal',
+                                     description='Replays a recorded powercmd session.')
+    parser.add_argument('cmd_class', help='Cmd subclass to replay the journal against, as module:Class')
+    parser.add_argument('journal', help='journal file to replay')
+    parser.add_argument('--speed', type=_parse_speed, default=None,
+                        help='"max" (default), "original" or a speedup factor, e.g. 10')
+    args = parser.parse_args(argv)
+
+    module, _, qualname = args.cmd_class.partition(':')
+    cmd_cls = importlib.import_module(module)
+    for name in qualname.split('.'):
+        cmd_cls = getattr(cmd_cls, name)
+
+    stats = replay(cmd_cls(), read_journal(args.journal), speed=args.speed)
+    print(stats)
+    for entry in stats.mismatches:
+        print('outcome differs: %s (recorded error: %s)' % (entry.line, entry.error))
+    return 1 if stats.mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(_main(sys.argv[1:]))
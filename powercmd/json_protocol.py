@@ -0,0 +1,136 @@
+"""
+Line-delimited JSON protocol for driving a Cmd from other processes.
+
+Each input line is a single request, either a JSON object:
+
+    {"id": 1, "cmd": "sum", "args": {"first": 1, "second": "2"}}
+    {"id": 2, "line": "sum 1 2"}
+
+or a raw command line (`sum 1 2`). ARGS values that are JSON strings are
+parsed like typed command line arguments, other values are passed to the
+handler as they are. ARGS may also be a list of positional arguments.
+
+Each request results in a single JSON response line:
+
+    {"id": 1, "result": null, "output": "3\\n", "error": null, "time": 0.0001}
+
+where OUTPUT is everything the handler printed, RESULT is its return value
+and ERROR is a message describing an exception the command raised, if any.
+Requests do not need to wait for responses to previous ones; with WORKERS > 1
+they are executed concurrently and responses are written as soon as they are
+ready, possibly out of order.
+"""
+
+import concurrent.futures
+import io
+import json
+import sys
+import threading
+import time
+from typing import Any, Mapping, TextIO
+
+from powercmd.cmd import Cmd
+from powercmd.command_line import CommandLine
+from powercmd.exceptions import InvalidInput
+from powercmd.output_capture import capture_output
+
+
+class JsonProtocol:
+    """
+    Executes requests for a single CMD instance and formats responses.
+    """
+    def __init__(self, cmd: Cmd):
+        self._cmd = cmd
+        self._invoker = cmd._get_invoker(verbose=False)  # pylint: disable=protected-access
+
+    def _invoke(self, request: Any) -> Any:
+        """Executes a single decoded REQUEST and returns the handler result."""
+        if isinstance(request, str):
+            return self._invoker.invoke(self._cmd, cmdline=CommandLine(request))
+        if not isinstance(request, Mapping):
+            raise InvalidInput('invalid request: %r' % (request,))
+        if 'line' in request:
+            return self._invoker.invoke(self._cmd, cmdline=CommandLine(request['line']))
+        if 'cmd' not in request:
+            raise InvalidInput('request must contain either "cmd" or "line"')
+
+        args = request.get('args', {})
+        if isinstance(args, list):
+            return self._invoker.invoke_args(self._cmd, command=request['cmd'], positional_args=args)
+        return self._invoker.invoke_args(self._cmd, command=request['cmd'], named_args=args)
+
+    def handle_line(self, line: str) -> str:
+        """Executes a request encoded as LINE, returns an encoded response."""
+        try:
+            request = json.loads(line)
+        except ValueError:
+            request = line.strip()
+
+        response = {
+            'id': request.get('id') if isinstance(request, Mapping) else None,
+            'result': None,
+            'output': '',
+            'error': None,
+        }
+
+        output = io.StringIO()
+        start = time.perf_counter()
+        try:
+            with capture_output(output):
+                response['result'] = self._invoke(request)
+        # report any failure to the client instead of terminating
+        # pylint: disable=broad-except
+        except Exception as e:
+            response['error'] = '%s: %s' % (type(e).__name__, e)
+        response['time'] = time.perf_counter() - start
+        response['output'] = output.getvalue()
+
+        return json.dumps(response, default=repr, separators=(',', ':'))
+
+    def run(self,
+            infile: TextIO = None,
+            outfile: TextIO = None,
+            workers: int = 1):
+        """
+        Reads requests from INFILE (stdin by default) until EOF and writes
+        responses to OUTFILE (stdout by default). If WORKERS > 1, up to that
+        many requests are executed concurrently.
+        """
+        infile = infile or sys.stdin
+        outfile = outfile or sys.stdout
+
+        if workers <= 1:
+            for line in infile:
+                if line.strip():
+                    outfile.write(self.handle_line(line) + '\n')
+                    outfile.flush()
+            return
+
+        write_lock = threading.Lock()
+        pending = threading.BoundedSemaphore(workers * 2)
+
+        def respond(line):
+            try:
+                response = self.handle_line(line)
+                with write_lock:
+                    outfile.write(response + '\n')
+                    outfile.flush()
+            finally:
+                pending.release()
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            for line in infile:
+                if line.strip():
+                    pending.acquire()
+                    executor.submit(respond, line)
+
+
+def run_json_protocol(cmd: Cmd,
+                      infile: TextIO = None,
+                      outfile: TextIO = None,
+                      workers: int = 1):
+    """
+    Serves requests for CMD using the line-delimited JSON protocol, reading
+    from INFILE (stdin by default) and writing to OUTFILE (stdout by default).
+    """
+    JsonProtocol(cmd).run(infile, outfile, workers)
@@ -0,0 +1,137 @@
+"""
+Commands with handlers imported from their modules only when first used.
+
+A command manifest is a sequence of entries describing such commands, e.g.:
+
+    [
+        {
+            "name": "deploy",
+            "handler": "plugins.deploy:do_deploy",
+            "description": "Deploys the service.",
+            "params": ["target", "force?"]
+        }
+    ]
+
+HANDLER is a "module:attribute" path. DESCRIPTION and PARAMS are only used to
+display help before the handler module is imported. Optional parameters are
+suffixed with a question mark, the same way `help` displays them. An entry may
+also contain a complete HELP text, which is then displayed verbatim.
+"""
+
+import importlib
+import inspect
+import sys
+import textwrap
+import threading
+from typing import Any, Callable, Mapping, Sequence, Tuple
+
+from powercmd.command import Command
+
+
+class LazyHandler:
+    """
+    A command handler identified by a module path and attribute name. The
+    module is imported only when the handler is called or its signature is
+    inspected for the first time.
+    """
+    def __init__(self,
+                 path: str,
+                 description: str = None,
+                 params: Sequence[str] = (),
+                 help_text: str = None):
+        module, sep, attr = path.partition(':')
+        if not sep or not module or not attr:
+            raise ValueError('invalid handler path: %s (expected module:attribute)' % (path,))
+
+        self.path = path
+        self.params = list(params)
+        self.help_text = help_text
+        self.__doc__ = description
+        self._module = module
+        self._attr = attr
+        self._handler = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return 'LazyHandler(%s)' % (repr(self.path),)
+
+    def __eq__(self, other):
+        return isinstance(other, LazyHandler) and self.path == other.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    @property
+    def loaded(self) -> bool:
+        """Checks whether the handler module was already imported."""
+        return self._handler is not None
+
+    def load(self) -> Callable:
+        """Imports the handler module if necessary and returns the handler."""
+        if self._handler is None:
+            with self._lock:
+                if self._handler is None:
+                    obj = importlib.import_module(self._module)
+                    for name in self._attr.split('.'):
+                        obj = getattr(obj, name)
+                    if not callable(obj):
+                        raise TypeError('%s is not callable' % (self.path,))
+                    if self.__doc__ is None:
+                        self.__doc__ = obj.__doc__
+                    self._handler = obj
+        return self._handler
+
+    @property
+    def __signature__(self):
+        return inspect.signature(self.load())
+
+    @property
+    def __wrapped__(self):
+        # lets inspect.unwrap reach the module globals, to resolve annotations
+        return self.load()
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __getattr__(self, name):
+        # forward attributes set by decorators, like powercmd_cache
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    @staticmethod
+    def from_manifest_entry(entry: Mapping[str, Any]) -> Tuple[str, 'LazyHandler']:
+        """
+        Returns a (command name, handler) pair described by a manifest ENTRY.
+        """
+        try:
+            return entry['name'], LazyHandler(entry['handler'],
+                                              description=entry.get('description'),
+                                              params=entry.get('params', ()),
+                                              help_text=entry.get('help'))
+        except KeyError as exc:
+            raise ValueError('manifest entry is missing the %s key: %r' % (exc, entry)) from exc
+
+
+class LazyCommand(Command):
+    """
+    A Command backed by a LazyHandler. Creating one does not import the
+    handler; until it is loaded, help is generated from the manifest.
+    """
+    __slots__ = ()
+
+    def __new__(cls, name, handler):
+        # skip validation done by Command, it would import the handler
+        return super(Command, cls).__new__(cls, sys.intern(name), handler)
+
+    @property
+    def help(self) -> str:
+        """Returns a help message for this command handler."""
+        if self.handler.loaded:
+            return super().help
+        if self.handler.help_text is not None:
+            return self.handler.help_text
+        return ('%s\n\nARGUMENTS: %s %s\n'
+                % (textwrap.dedent(self.description or 'No details available.').strip(),
+                   self.name,
+                   ' '.join(self.handler.params)))
@@ -0,0 +1,157 @@
+"""
+Snapshots of Cmd command registries, allowing to start without inspecting
+every command handler.
+
+A manifest file stores everything needed to list commands, display help and
+complete command names (see `powercmd.lazy_command`), along with fingerprints
+of source files it was generated from. If any of them changed, the manifest
+is considered stale and ignored.
+
+To generate a manifest for a Cmd subclass:
+
+    python -m powercmd.manifest mymodule:MyCmd mycmd.manifest
+
+To use it:
+
+    if __name__ == '__main__':
+        sys.exit(MyCmd.main(manifest='mycmd.manifest'))
+"""
+
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import sys
+from typing import Any, List, Mapping, Optional
+
+from powercmd.command import CommandGroup
+from powercmd.lazy_command import LazyCommand
+
+MANIFEST_VERSION = 1
+
+
+def _handler_path(obj: Any) -> str:
+    """Returns a "module:qualified.name" path that can be used to import OBJ."""
+    path = '%s:%s' % (obj.__module__, obj.__qualname__)
+    if '<locals>' in path:
+        raise ValueError('%s is not importable: defined in a local scope' % (path,))
+    return path
+
+
+def _file_hash(path: str) -> str:
+    """Returns a hex digest of PATH contents."""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _fingerprint(path: str) -> Mapping[str, Any]:
+    """Returns data used to detect modifications of source file at PATH."""
+    stat = os.stat(path)
+    return {'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': _file_hash(path)}
+
+
+def _is_unchanged(path: str,
+                  fingerprint: Mapping[str, Any]) -> bool:
+    """
+    Checks if the file at PATH still matches FINGERPRINT. The contents are
+    only hashed if the modification time or size differ.
+    """
+    try:
+        stat = os.stat(path)
+        if (stat.st_mtime_ns == fingerprint['mtime_ns']
+                and stat.st_size == fingerprint['size']):
+            return True
+        return _file_hash(path) == fingerprint['sha256']
+    except OSError:
+        return False
+
+
+def build_manifest(cmd_cls: type) -> Mapping[str, Any]:
+    """
+    Returns a JSON-serializable snapshot of commands defined by CMD_CLS.
+
+    Command groups are not supported, as their handlers are Cmd instances
+    rather than importable functions.
+    """
+    commands = []
+    sources = {inspect.getsourcefile(cls) for cls in cmd_cls.__mro__
+               if cls is not object}
+
+    for name, cmd in sorted(cmd_cls()._get_all_commands().items()):  # pylint: disable=protected-access
+        if isinstance(cmd, CommandGroup):
+            raise ValueError('cannot store command group in a manifest: %s' % (name,))
+        if isinstance(cmd, LazyCommand):
+            handler_path = cmd.handler.path
+        else:
+            handler_path = _handler_path(cmd.handler)
+            sources.add(inspect.getsourcefile(cmd.handler))
+
+        commands.append({
+            'name': name,
+            'handler': handler_path,
+            'description': cmd.description,
+            'params': [cmd._param_to_help_str(param) for param in cmd.parameters],  # pylint: disable=protected-access
+            'help': cmd.help,
+        })
+
+    return {
+        'version': MANIFEST_VERSION,
+        'class': cmd_cls.__qualname__,
+        'sources': {path: _fingerprint(path) for path in sorted(sources) if path},
+        'commands': commands,
+    }
+
+
+def write_manifest(cmd_cls: type,
+                   path: str):
+    """Stores a manifest of commands defined by CMD_CLS in a file at PATH."""
+    manifest = build_manifest(cmd_cls)
+    with open(path, 'w') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+
+
+def read_manifest(path: str,
+                  cmd_cls: type = None) -> Optional[List[Mapping[str, Any]]]:
+    """
+    Returns a list of command manifest entries stored in file at PATH, or None
+    if the file is missing, was generated for a class other than CMD_CLS or
+    any of the source files it was generated from changed since.
+    """
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get('version') != MANIFEST_VERSION:
+        return None
+    # compare just the name: the module is called __main__ when run as a script
+    if cmd_cls is not None and manifest.get('class') != cmd_cls.__qualname__:
+        return None
+    if not all(_is_unchanged(source, fingerprint)
+               for source, fingerprint in manifest['sources'].items()):
+        return None
+
+    return manifest['commands']
+
+
+def _main(argv: List[str]) -> int:
+    """Command line interface: generates a manifest file."""
+    if len(argv) != 2:
+        print('usage: python -m powercmd.manifest module:CmdClass OUTPUT_FILE', file=sys.stderr)
+        return 2
+
+    module, _, qualname = argv[0].partition(':')
+    cmd_cls = importlib.import_module(module)
+    for name in qualname.split('.'):
+        cmd_cls = getattr(cmd_cls, name)
+
+    write_manifest(cmd_cls, argv[1])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(_main(sys.argv[1:]))
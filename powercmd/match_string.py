@@ -146,3 +146,15 @@ def match_string(text, possible, verbose=False):
         TextMatchStrategy.Fuzzy
     ]
     return _match_string(text, list(possible), match_strategies, verbose=verbose)
+
+
+def fuzzy_match_string(text, possible, verbose=False):
+    """
+    Returns subset of POSSIBLE commands matching TEXT using only the
+    approximate match strategies (snake case/fuzzy match).
+    """
+    match_strategies = [
+        TextMatchStrategy.SnakeCase,
+        TextMatchStrategy.Fuzzy
+    ]
+    return _match_string(text, list(possible), match_strategies, verbose=verbose)
@@ -0,0 +1,95 @@
+"""
+Per-thread redirection of standard output, used to collect output printed by
+command handlers running concurrently.
+"""
+
+import contextlib
+import sys
+import threading
+from typing import Optional, TextIO
+
+
+class ThreadLocalStdout:
+    """
+    A sys.stdout replacement forwarding writes to a stream selected for the
+    current thread, or to the original stdout if none was selected.
+    """
+    def __init__(self, default: TextIO):
+        self._default = default
+        self._local = threading.local()
+        # number of active capture_output contexts, guarded by _INSTALL_LOCK
+        self._users = 0
+
+    @property
+    def target(self) -> TextIO:
+        """Returns the stream output of current thread is written to."""
+        return getattr(self._local, 'target', None) or self._default
+
+    @target.setter
+    def target(self, stream: TextIO):
+        self._local.target = stream
+
+    def write(self, text: str) -> int:
+        return self.target.write(text)
+
+    def flush(self):
+        self.target.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.target, name)
+
+
+_INSTALL_LOCK = threading.Lock()
+
+
+def _install() -> ThreadLocalStdout:
+    """
+    Replaces sys.stdout with a ThreadLocalStdout, unless already done. Every
+    call must be paired with `_uninstall`.
+    """
+    with _INSTALL_LOCK:
+        if not isinstance(sys.stdout, ThreadLocalStdout):
+            sys.stdout = ThreadLocalStdout(sys.stdout)
+        sys.stdout._users += 1  # pylint: disable=protected-access
+        return sys.stdout
+
+
+def _uninstall(stdout: ThreadLocalStdout):
+    """
+    Restores the original sys.stdout once STDOUT, returned by `_install`, is
+    no longer used by any capture_output, unless it was replaced since.
+    """
+    # pylint: disable=protected-access
+    with _INSTALL_LOCK:
+        stdout._users -= 1
+        if stdout._users == 0 and sys.stdout is stdout:
+            sys.stdout = stdout._default
+
+
+@contextlib.contextmanager
+def capture_output(stream: TextIO):
+    """
+    Redirects everything printed by the current thread to STREAM. Unlike
+    contextlib.redirect_stdout, output printed by other threads at the same
+    time is not affected. sys.stdout is only replaced while there is at least
+    one active capture.
+    """
+    stdout = _install()
+    previous = getattr(stdout._local, 'target', None)  # pylint: disable=protected-access
+    stdout.target = stream
+    try:
+        yield stream
+    finally:
+        stdout.target = previous
+        _uninstall(stdout)
+
+
+def captured_stream() -> Optional[TextIO]:
+    """
+    Returns the stream output of the current thread is redirected to by
+    `capture_output`, or None if it is not redirected.
+    """
+    stdout = sys.stdout
+    if isinstance(stdout, ThreadLocalStdout):
+        return getattr(stdout._local, 'target', None)  # pylint: disable=protected-access
+    return None
@@ -0,0 +1,116 @@
+"""
+Serving command line sessions over TCP or Unix sockets.
+
+Each connection gets its own Cmd instance, so per-session state (prompt, last
+error, registered commands, ...) is not shared. Parsed handler parameters and
+argument constructors are cached per process, so they are shared by all
+sessions. Commands are executed in a thread pool, and everything they print
+is sent back to the client that issued them.
+
+Example:
+    server = CmdServer(MyCmd)
+    asyncio.run(server.serve_tcp('127.0.0.1', 8023))
+"""
+
+import asyncio
+import concurrent.futures
+import io
+from typing import Callable
+
+from powercmd.cmd import Cmd
+from powercmd.output_capture import capture_output
+
+
+class CmdServer:
+    """
+    Accepts connections and runs a separate command session for each of them.
+
+    CMD_FACTORY is called once per connection to create a session; typically
+    it is a Cmd subclass. At most MAX_CONCURRENT commands are executed at the
+    same time; sessions are not read from while their command is pending, so
+    that clients sending commands faster than they are processed are slowed
+    down by the socket flow control.
+
+    Clients may only read files on the server, using @path arguments or the
+    `bulk` command, if FILE_ARGS is set. Otherwise, `bulk` is not available,
+    neither in the session nor in its command groups.
+    """
+    def __init__(self,
+                 cmd_factory: Callable[[], Cmd],
+                 max_concurrent: int = 8,
+                 encoding: str = 'utf-8',
+                 file_args: bool = False):
+        self._cmd_factory = cmd_factory
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrent)
+        self._encoding = encoding
+        self._file_args = file_args
+
+    def create_session(self) -> Cmd:
+        """Returns a new Cmd instance for a connection."""
+        cmd = self._cmd_factory()
+        if not self._file_args:
+            cmd.FILE_ARGUMENTS = False
+            cmd.FILE_ACCESS = False
+            # pylint: disable=protected-access
+            if 'bulk' in cmd._get_all_commands():
+                cmd.remove_command('bulk')
+        return cmd
+
+    @staticmethod
+    def _execute(cmd: Cmd,
+                 line: str) -> str:
+        """Executes LINE in CMD session and returns everything it printed."""
+        output = io.StringIO()
+        with capture_output(output):
+            cmd.onecmd(line)
+        return output.getvalue()
+
+    async def handle_connection(self,
+                                reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter):
+        """Runs a command session until the client disconnects or exits."""
+        loop = asyncio.get_running_loop()
+        cmd = self.create_session()
+        try:
+            while cmd._loop:  # pylint: disable=protected-access
+                writer.write(cmd.prompt.encode(self._encoding))
+                await writer.drain()
+
+                line = await reader.readline()
+                if not line:
+                    break
+
+                line = line.decode(self._encoding).rstrip('\r\n')
+                output = await loop.run_in_executor(self._executor, self._execute, cmd, line)
+                writer.write(output.encode(self._encoding))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start_tcp(self,
+                        host: str,
+                        port: int) -> asyncio.AbstractServer:
+        """Starts accepting TCP connections on HOST:PORT."""
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def start_unix(self,
+                         path: str) -> asyncio.AbstractServer:
+        """Starts accepting connections on a Unix socket at PATH."""
+        return await asyncio.start_unix_server(self.handle_connection, path)
+
+    async def serve_tcp(self,
+                        host: str,
+                        port: int):
+        """Serves TCP connections on HOST:PORT until cancelled."""
+        server = await self.start_tcp(host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def serve_unix(self,
+                         path: str):
+        """Serves connections on a Unix socket at PATH until cancelled."""
+        server = await self.start_unix(path)
+        async with server:
+            await server.serve_forever()
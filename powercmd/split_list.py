@@ -2,7 +2,8 @@
 Utility function for splitting a string into list of elements.
 """
 
-from typing import Callable, List, Mapping
+import re
+from typing import Callable, Iterable, Iterator, List, Mapping
 
 
 def _split(text: str,
@@ -41,6 +42,15 @@ def _split(text: str,
     yield text[start:]
 
 
+_LIST_DELIMITERS = {
+    '(': ')',
+    '[': ']',
+    '{': '}',
+    '"': '"',
+    "'": "'",
+}
+
+
 def split_list(text: str,
                separator: str = ',',
                allow_unmatched: bool = False) -> List[str]:
@@ -55,15 +65,42 @@ def split_list(text: str,
     if len(separator) != 1:
         raise ValueError('only single-character separators are supported')
 
-    _DELIMITERS = {
-        '(': ')',
-        '[': ']',
-        '{': '}',
-        '"': '"',
-        "'": "'",
-    }
+    return list(_split(text, (lambda c: c == separator), _LIST_DELIMITERS, allow_unmatched))
 
-    return list(_split(text, (lambda c: c == separator), _DELIMITERS, allow_unmatched))
+
+def split_list_stream(chunks: Iterable[str],
+                      separators: str = ',') -> Iterator[str]:
+    """
+    Yields elements of a list read from consecutive text CHUNKS, split on any
+    of SEPARATORS the same way as `split_list` does. Elements may span
+    multiple chunks; the whole text is never held in memory at once.
+
+    An exception is thrown if the parens/quotes are unbalanced.
+    """
+    special = re.compile('[%s]' % re.escape(separators + ''.join(_LIST_DELIMITERS)
+                                             + ''.join(_LIST_DELIMITERS.values())))
+    stack = []
+    parts = []
+
+    for chunk in chunks:
+        start = 0
+        for match in special.finditer(chunk):
+            char = match.group()
+            if stack:
+                if stack[-1] == char:
+                    stack.pop()
+            elif char in _LIST_DELIMITERS:
+                stack.append(_LIST_DELIMITERS[char])
+            elif char in separators:
+                parts.append(chunk[start:match.start()])
+                yield ''.join(parts)
+                parts = []
+                start = match.end()
+        parts.append(chunk[start:])
+
+    if stack:
+        raise ValueError('text contains unmatched delimiters: %s' % (''.join(stack),))
+    yield ''.join(parts)
 
 
 _QUOTES = {
@@ -0,0 +1,44 @@
+import unittest
+
+from powercmd.bk_tree import BKTree, levenshtein_distance
+
+
+class TestLevenshteinDistance(unittest.TestCase):
+    def test_distance(self):
+        self.assertEqual(levenshtein_distance('', ''), 0)
+        self.assertEqual(levenshtein_distance('foo', 'foo'), 0)
+        self.assertEqual(levenshtein_distance('foo', ''), 3)
+        self.assertEqual(levenshtein_distance('', 'foo'), 3)
+        self.assertEqual(levenshtein_distance('kitten', 'sitting'), 3)
+        self.assertEqual(levenshtein_distance('help', 'hlep'), 2)
+
+
+class TestBKTree(unittest.TestCase):
+    def test_find(self):
+        tree = BKTree(['help', 'hello', 'exit', 'shell', 'halt'])
+        self.assertEqual(tree.find('helo', max_distance=1),
+                         [(1, 'hello'), (1, 'help')])
+        self.assertEqual(tree.find('helo', max_distance=2),
+                         [(1, 'hello'), (1, 'help'), (2, 'halt'), (2, 'shell')])
+        self.assertEqual(tree.find('xyzzy', max_distance=1), [])
+
+    def test_find_empty(self):
+        self.assertEqual(BKTree().find('foo', max_distance=3), [])
+
+    def test_add_duplicate(self):
+        tree = BKTree(['foo', 'foo'])
+        self.assertEqual(len(tree), 1)
+
+    def test_remove(self):
+        tree = BKTree(['foo', 'for', 'fox'])
+        tree.remove('foo')
+        self.assertNotIn('foo', tree)
+        self.assertEqual(len(tree), 2)
+        self.assertEqual(tree.find('foo', max_distance=1), [(1, 'for'), (1, 'fox')])
+
+        with self.assertRaises(KeyError):
+            tree.remove('foo')
+
+        tree.add('foo')
+        self.assertIn('foo', tree)
+        self.assertEqual(len(tree), 3)
@@ -0,0 +1,129 @@
+import contextlib
+import io
+import unittest
+from typing import List, Tuple
+from unittest import mock
+
+import powercmd
+from powercmd.cache import LruCache, get_parse_cache, make_key
+from powercmd.command_invoker import CommandInvoker
+
+
+class TestLruCache(unittest.TestCase):
+    def test_get_put(self):
+        cache = LruCache(maxsize=2)
+        self.assertEqual(cache.get('a', 'missing'), 'missing')
+        cache.put('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.hit_rate, 0.5)
+
+    def test_evicts_least_recently_used(self):
+        cache = LruCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_ttl(self):
+        cache = LruCache(maxsize=2, ttl=10)
+        with mock.patch('time.monotonic', return_value=100):
+            cache.put('a', 1)
+        with mock.patch('time.monotonic', return_value=109):
+            self.assertEqual(cache.get('a'), 1)
+        with mock.patch('time.monotonic', return_value=110):
+            self.assertEqual(cache.get('a'), None)
+        self.assertEqual(len(cache), 0)
+
+    def test_make_key(self):
+        self.assertEqual(make_key({'b': [1, 2], 'a': 'x'}), make_key({'a': 'x', 'b': [1, 2]}))
+        self.assertNotEqual(make_key({'a': [1, 2]}), make_key({'a': [2, 1]}))
+        self.assertIsNone(make_key({'a': iter([])}))
+        self.assertIsNone(make_key({'a': bytearray()}))
+
+
+class CachedImpl(powercmd.Cmd):
+    calls = 0
+
+    @powercmd.cached(maxsize=2)
+    def do_square(self, values: List[int]):
+        CachedImpl.calls += 1
+        return [value * value for value in values]
+
+
+class TestCached(unittest.TestCase):
+    def setUp(self):
+        CachedImpl.calls = 0
+        CachedImpl.do_square.powercmd_cache = LruCache(maxsize=2)
+
+    def test_cached(self):
+        cmd = CachedImpl()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(cmd.onecmd('square 1,2'), [1, 4])
+            self.assertEqual(cmd.onecmd('square [1,2]'), [1, 4])
+            self.assertEqual(cmd.onecmd('square 3'), [9])
+        self.assertEqual(CachedImpl.calls, 2)
+
+    def test_stats_and_invalidate(self):
+        cmd = CachedImpl()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            cmd.onecmd('square 1')
+            cmd.onecmd('square 1')
+            cmd.onecmd('stats')
+            cmd.onecmd('invalidate square')
+            cmd.onecmd('square 1')
+
+        self.assertIn('square: cache: 1/2 entries, 1 hits, 1 misses (50.0% hit rate), 0 evictions',
+                      output.getvalue())
+        self.assertEqual(CachedImpl.calls, 2)
+
+
+class Host:
+    powercmd_cacheable = True
+    parsed = 0
+
+    def __init__(self, name: str):
+        Host.parsed += 1
+        self.name = name
+
+
+class TestParseCache(unittest.TestCase):
+    def test_cacheable(self):
+        Host.parsed = 0
+        cache = get_parse_cache(Host)
+        cache.clear()
+        hits, misses = cache.hits, cache.misses
+
+        ctor = CommandInvoker.get_constructor(Tuple[Host, Host])
+        first, second = ctor('(a,a)')
+        self.assertIs(first, second)
+        self.assertIs(ctor('(b,a)')[1], first)
+        self.assertEqual(Host.parsed, 2)
+        self.assertEqual((cache.hits - hits, cache.misses - misses), (2, 2))
+        self.assertIsNone(get_parse_cache(int))
+
+    def test_cacheable_decorator(self):
+        @powercmd.cacheable(maxsize=1)
+        class Port(int):
+            pass
+
+        class SubPort(Port):
+            pass
+
+        ctor = CommandInvoker.get_constructor(Port)
+        self.assertIs(ctor('1'), ctor('1'))
+        ctor('2')
+        self.assertEqual(get_parse_cache(Port).evictions, 1)
+        self.assertIsNot(get_parse_cache(SubPort), get_parse_cache(Port))
+
+    def test_stats(self):
+        CommandInvoker.get_constructor(Host)('a')
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            powercmd.Cmd().onecmd('stats')
+        self.assertIn('Host: parse cache: ', output.getvalue())
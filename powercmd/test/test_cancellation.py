@@ -0,0 +1,121 @@
+import asyncio
+import contextlib
+import io
+import threading
+import time
+import unittest
+
+import powercmd
+from powercmd.cancellation import CancellationToken, call_cancellable
+from powercmd.command import Command
+from powercmd.exceptions import CommandCancelled, CommandTimeout
+from powercmd.output_capture import capture_output
+
+
+class CancellableImpl(powercmd.Cmd):
+    events = []
+    release = threading.Event()
+
+    @powercmd.timeout(0.05)
+    def do_hang(self, token: CancellationToken):
+        cancelled = token.wait(5)
+        CancellableImpl.events.append(('hang', cancelled))
+
+    def do_slow(self, seconds: float):
+        time.sleep(seconds)
+        print('done')
+
+    def do_blocked(self):
+        CancellableImpl.release.wait(5)
+
+    @powercmd.timeout(None)
+    def do_unlimited(self, seconds: float):
+        time.sleep(seconds)
+
+    async def do_async(self, value: int):
+        await asyncio.sleep(0)
+        return value * 2
+
+    @powercmd.timeout(0.05)
+    async def do_async_hang(self):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            CancellableImpl.events.append(('async_hang', True))
+            raise
+
+    def do_interrupted(self):
+        raise KeyboardInterrupt
+
+
+class TestCancellation(unittest.TestCase):
+    def setUp(self):
+        CancellableImpl.events = []
+
+    def test_token_param_is_not_an_argument(self):
+        cmd = Command('hang', CancellableImpl.do_hang)
+        self.assertEqual(cmd.parameters, {})
+        self.assertEqual(cmd.cancellation_param, 'token')
+        self.assertIsNone(Command('slow', CancellableImpl.do_slow).cancellation_param)
+
+    def test_timeout(self):
+        cmd = CancellableImpl()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            start = time.monotonic()
+            cmd.onecmd('hang')
+            self.assertLess(time.monotonic() - start, 1)
+            cmd.onecmd('async_hang')
+            cmd.onecmd('interrupted')
+            cmd.onecmd('stats')
+
+        self.assertIn('command timed out after 0.05s', output.getvalue())
+        self.assertIn('hang: timeouts: 1, cancelled: 0', output.getvalue())
+        self.assertIn('async_hang: timeouts: 1, cancelled: 0', output.getvalue())
+        self.assertIn('interrupted: timeouts: 0, cancelled: 1', output.getvalue())
+        deadline = time.monotonic() + 5
+        while len(CancellableImpl.events) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(sorted(CancellableImpl.events), [('async_hang', True), ('hang', True)])
+
+    def test_default_timeout(self):
+        class DefaultTimeoutImpl(CancellableImpl):
+            DEFAULT_TIMEOUT = 0.5
+
+        cmd = DefaultTimeoutImpl()
+        output = io.StringIO()
+        CancellableImpl.release.clear()
+        with capture_output(output):
+            cmd.onecmd('blocked')
+            CancellableImpl.release.set()
+            cmd.onecmd('slow 0')
+            cmd.onecmd('unlimited 0.6')
+        self.assertEqual(output.getvalue().count('timed out'), 1)
+        # output of commands running in worker threads is captured too
+        self.assertIn('done', output.getvalue())
+
+    def test_async(self):
+        self.assertEqual(CancellableImpl().onecmd('async 21'), 42)
+
+    def test_call_cancellable(self):
+        def handler(value, token):
+            return value, token.cancelled
+
+        self.assertEqual(call_cancellable(handler, (1,), {}, token_param='token'), (1, False))
+        with self.assertRaises(ValueError):
+            call_cancellable(int, ('x',), {})
+        with self.assertRaises(CommandTimeout):
+            call_cancellable(time.sleep, (1,), {}, limit=0.01)
+
+    def test_token(self):
+        token = CancellationToken()
+        calls = []
+        token.add_callback(lambda: calls.append(1))
+        token.raise_if_cancelled()
+        token.cancel()
+        token.cancel()
+        token.add_callback(lambda: calls.append(2))
+        self.assertEqual(calls, [1, 2])
+        self.assertTrue(token.wait(0))
+        with self.assertRaises(CommandCancelled):
+            token.raise_if_cancelled()
@@ -1,7 +1,36 @@
+import contextlib
+import gc
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
+import weakref
+from typing import Iterable, List
 
 from powercmd.cmd import Cmd
-from powercmd.command import Command
+from powercmd.command import Command, CommandGroup
+from powercmd.exceptions import InvalidInput
+
+
+def do_module_level(self, words: List[str]):
+    """Module-level handler, referenced by manifests in tests."""
+    MainImpl.calls.append(words)
+
+
+class MainImpl(Cmd):
+    calls = []
+
+    def do_echo(self, words: List[str], count: int = 1):
+        MainImpl.calls.append(words * count)
+
+    def do_fail(self):
+        raise RuntimeError('failed')
+
+    def do_say(self, text: str):
+        print(text)
 
 
 class TestCmd(unittest.TestCase):
@@ -13,8 +42,274 @@ class TestCmd(unittest.TestCase):
         expected_commands = {
             'exit': Command('exit', Cmd.do_exit),
             'EOF': Command('EOF', Cmd.do_EOF),
+            'bulk': Command('bulk', Cmd.do_bulk),
             'get_error': Command('get_error', Cmd.do_get_error),
             'help': Command('help', Cmd.do_help),
+            'invalidate': Command('invalidate', Cmd.do_invalidate),
+            'stats': Command('stats', Cmd.do_stats),
             'test': Command('test', TestImpl.do_test)
         }
         self.assertEqual(expected_commands, TestImpl()._get_all_commands())
+
+    def test_get_all_commands_group(self):
+        class GroupImpl(Cmd):
+            def do_sub(self):
+                pass
+
+        group = GroupImpl()
+
+        class TestImpl(Cmd):
+            do_group = group
+
+        commands = TestImpl()._get_all_commands()
+        self.assertEqual(commands['group'], CommandGroup('group', group))
+        self.assertIn('sub', commands['group'].subcommands)
+
+    def test_add_remove_command(self):
+        def handler(self, arg: int):
+            return arg
+
+        cmd = Cmd()
+        cmd.add_command('dynamic', handler)
+        self.assertEqual(cmd._get_all_commands()['dynamic'], Command('dynamic', handler))
+        self.assertEqual(cmd.onecmd('dynamic 42'), 42)
+
+        with self.assertRaises(ValueError):
+            cmd.add_command('dynamic', handler)
+
+        cmd.remove_command('dynamic')
+        self.assertNotIn('dynamic', cmd._get_all_commands())
+        self.assertEqual(cmd.onecmd('dynamic 42'), None)
+
+        with self.assertRaises(KeyError):
+            cmd.remove_command('dynamic')
+
+    def test_setattr_command(self):
+        class TestImpl(Cmd):
+            def do_static(self):
+                return 'static'
+
+        def handler(self, arg: int):
+            return arg
+
+        cmd = TestImpl()
+        self.assertEqual(cmd.onecmd('static'), 'static')
+
+        cmd.do_dynamic = handler
+        self.assertEqual(cmd.onecmd('dynamic 42'), 42)
+        cmd.do_dynamic = handler
+        self.assertEqual(cmd.onecmd('dyn 42'), 42)
+        self.assertEqual(cmd._get_all_commands().match('dyn'), ['dynamic'])
+        cmd.do_static = handler
+        self.assertEqual(cmd.onecmd('static 1'), 1)
+        del cmd.do_static
+        self.assertEqual(cmd.onecmd('static'), 'static')
+        del cmd.do_dynamic
+        commands = cmd._get_all_commands()
+        self.assertNotIn('dynamic', commands)
+        self.assertEqual(commands.match('dyn'), [])
+        self.assertEqual(commands.suggest('dynamic'), [])
+
+        cmd.do_dynamic = handler
+        self.assertEqual(commands.match('dyn'), ['dynamic'])
+        self.assertEqual(commands.suggest('dynamc'), ['dynamic'])
+
+        # the class is only inspected once per instance
+        TestImpl.do_late = handler
+        self.assertNotIn('late', cmd._get_all_commands())
+        self.assertIn('late', TestImpl()._get_all_commands())
+
+    def test_non_interactive_use_does_not_import_prompt_toolkit(self):
+        script = ('import sys, powercmd\n'
+                  'powercmd.Cmd().onecmd("help")\n'
+                  'sys.exit("prompt_toolkit" in sys.modules)\n')
+        subprocess.check_call([sys.executable, '-c', script], stdout=subprocess.DEVNULL)
+
+    def test_main(self):
+        MainImpl.calls = []
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(MainImpl.main(['echo', 'a b,c', 'count=2']), 0)
+            self.assertEqual(MainImpl.main(['sa', 'hello world']), 0)
+        self.assertEqual(MainImpl.calls, [['a b', 'c', 'a b', 'c']])
+        self.assertEqual(output.getvalue(), 'hello world\n')
+
+    def test_main_errors(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(MainImpl.main(['echo', 'foo', 'count=bar']), 2)
+            self.assertEqual(MainImpl.main(['no_such_command']), 2)
+            self.assertEqual(MainImpl.main(['fail']), 1)
+
+    def test_main_manifest(self):
+        class NoReflection(MainImpl):
+            def _collect_commands(self):
+                raise AssertionError('commands should be loaded from manifest')
+
+        manifest = [{'name': 'mod', 'handler': __name__ + ':do_module_level'}]
+        MainImpl.calls = []
+        self.assertEqual(NoReflection.main(['mod', 'x,y'], manifest=manifest), 0)
+        self.assertEqual(MainImpl.calls, [['x', 'y']])
+
+    def test_at_arguments(self):
+        class SayImpl(Cmd):
+            def do_say(self, text: str):
+                return text
+
+        self.assertEqual(SayImpl().onecmd('say "@me"'), '@me')
+        self.assertEqual(SayImpl().onecmd('say @me'), '@me')
+
+        SayImpl.FILE_ARGUMENTS = True
+        self.assertEqual(SayImpl().onecmd('say "@me"'), '@me')
+        self.assertEqual(SayImpl().onecmd("say '@me'"), '@me')
+
+    def test_pipeline(self):
+        class PipelineImpl(Cmd):
+            def do_numbers(self, count: int):
+                return iter(range(count))
+
+            def do_square(self, numbers: Iterable[int]):
+                return (number * number for number in numbers)
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertIsNone(PipelineImpl().onecmd('numbers 4 | square'))
+        self.assertEqual(output.getvalue().splitlines()[-4:], ['0', '1', '4', '9'])
+
+    def test_pipe_in_argument(self):
+        class SayImpl(Cmd):
+            def do_say(self, text: str, suffix: str = ''):
+                return text + suffix
+
+        cmd = SayImpl()
+        self.assertEqual(cmd.onecmd('say a|b'), 'a|b')
+        self.assertEqual(cmd.onecmd('say "a | b"'), 'a | b')
+        self.assertEqual(cmd.onecmd('say a suffix=|b'), 'a|b')
+
+    def test_heredocs(self):
+        class HeredocImpl(Cmd):
+            def do_text(self, text: str, suffix: str = ''):
+                return text + suffix
+
+            def do_lines(self, text: str):
+                return iter(text.splitlines())
+
+            def do_count(self, lines: Iterable[str], extra: str = ''):
+                return [len(list(lines)), extra]
+
+        cmd = HeredocImpl()
+        self.assertEqual(cmd.onecmd('text <<EOF suffix=!\nfoo\n  bar\nEOF'), 'foo\n  bar!')
+        self.assertEqual(cmd.onecmd('text <<A suffix=<<B\na\nA\nb\nB'), 'ab')
+        self.assertEqual(cmd.onecmd('text "<<EOF"'), '<<EOF')
+
+        self.assertEqual(cmd.onecmd('lines <<A | count extra=<<B\n1\n2\nA\nx\nB'), [2, 'x'])
+
+        self.assertIsNone(cmd.onecmd('text <<EOF\nfoo'))
+        self.assertTrue(issubclass(cmd._errors[0].exc_type, InvalidInput))
+
+    def test_bulk(self):
+        class BulkImpl(Cmd):
+            def do_scale(self, value: int, factor: int = 2):
+                return value * factor
+
+        cmd = BulkImpl()
+        self.assertEqual(list(cmd.invoke_many('scale', [['1'], ('2', 3), {'value': 4}])),
+                         [2, 6, 8])
+        self.assertEqual(list(cmd.invoke_many('scale', (['%d' % i] for i in range(20)), workers=4)),
+                         [i * 2 for i in range(20)])
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = os.path.join(tmpdir, 'rows.csv')
+            with open(csv_path, 'w') as f:
+                f.write('1,10\n2,20\n')
+            tsv_path = os.path.join(tmpdir, 'rows.tsv')
+            with open(tsv_path, 'w') as f:
+                f.write('factor\tvalue\n3\t1\n\n4\t2\n')
+
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                cmd.onecmd('bulk scale %s' % csv_path)
+                cmd.onecmd('bulk scale %s workers=2' % tsv_path)
+            results = [line for line in output.getvalue().splitlines() if not line.startswith('*')]
+            self.assertEqual(results, ['10', '40', '3', '8'])
+
+    def test_get_error(self):
+        class Payload:
+            pass
+
+        payloads = []
+
+        class ErrorImpl(Cmd):
+            MAX_ERRORS = 2
+
+            def do_fail(self, message: str):
+                payload = Payload()
+                payloads.append(weakref.ref(payload))
+                raise RuntimeError(message)
+
+        cmd = ErrorImpl()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            cmd.onecmd('get_error')
+            for message in ['first', 'second', 'third']:
+                cmd.onecmd('fail %s' % message)
+        self.assertIn('no errors', output.getvalue())
+        # failed command frames are not kept alive by stored errors
+        gc.collect()
+        self.assertEqual([ref() for ref in payloads], [None, None, None])
+
+        def get_error(*args):
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                cmd.onecmd(' '.join(('get_error',) + args))
+            return output.getvalue()
+
+        self.assertIn('raise RuntimeError(message)', get_error())
+        self.assertIn('RuntimeError: third', get_error())
+        self.assertIn('RuntimeError: second', get_error('1'))
+        self.assertIn('no such error', get_error('2'))
+
+    def test_concurrent_onecmd(self):
+        class ConcurrentImpl(Cmd):
+            collected = 0
+
+            def _collect_commands(self):
+                ConcurrentImpl.collected += 1
+                return super()._collect_commands()
+
+            def do_double(self, value: int):
+                if value % 3 == 0:
+                    raise ValueError('multiple of 3')
+                return value * 2
+
+        class ListJournal:
+            def __init__(self):
+                self.entries = []
+
+            def record(self, line, timestamp, duration, error=None):
+                self.entries.append((line, error))
+
+        journal = ListJournal()
+        cmd = ConcurrentImpl(journal=journal)
+        barrier = threading.Barrier(8)
+        failures = []
+
+        def run(thread_idx):
+            barrier.wait()
+            for value in range(thread_idx, 800, 8):
+                result = cmd.onecmd('double %d' % value)
+                if result != (None if value % 3 == 0 else value * 2):
+                    failures.append((value, result))
+
+        threads = [threading.Thread(target=run, args=(idx,)) for idx in range(8)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(failures, [])
+        self.assertEqual(ConcurrentImpl.collected, 1)
+        self.assertEqual(len(journal.entries), 800)
+        for line, error in journal.entries:
+            value = int(line.split()[1])
+            self.assertEqual(error, 'ValueError: multiple of 3' if value % 3 == 0 else None)
@@ -1,9 +1,22 @@
 import inspect
 import unittest
+from typing import List
 
+from powercmd.cancellation import CancellationToken
 from powercmd.command import Command, Parameter
 
 
+def handler_with_string_annotations(self,
+                                    a: 'int',
+                                    b: 'List[Later]',
+                                    token: 'CancellationToken') -> 'Unknown':
+    pass
+
+
+class Later:
+    pass
+
+
 class CommandTest(unittest.TestCase):
     def test_parameters(self):
         def func(a: int, b: str = 'x'):
@@ -24,3 +37,41 @@ class CommandTest(unittest.TestCase):
 
         cmd = Command(name='func', handler=func)
         self.assertEqual(cmd.short_description, 'Test function.')
+
+    def test_compact(self):
+        def func(a: int):
+            pass
+
+        cmd = Command(name=''.join(['fu', 'nc']), handler=func)
+        self.assertFalse(hasattr(cmd, '__dict__'))
+        self.assertFalse(hasattr(cmd.parameters['a'], '__dict__'))
+        self.assertIs(cmd.name, Command(name='func', handler=func).name)
+
+    def test_string_annotations(self):
+        cmd = Command(name='func', handler=handler_with_string_annotations)
+        self.assertEqual(cmd.parameters,
+                         {'a': Parameter(name='a', type=int, default=inspect._empty),
+                          'b': Parameter(name='b', type=List[Later], default=inspect._empty)})
+        self.assertEqual(cmd.cancellation_param, 'token')
+        self.assertIs(cmd.parameters, cmd.parameters)
+
+        def func(a: 'Undefined'):
+            pass
+
+        with self.assertRaises(ValueError):
+            Command(name='func', handler=func)
+
+    def test_redefined_handler(self):
+        def func(a: int):
+            pass
+
+        cmd = Command(name='func', handler=func)
+        self.assertEqual(list(cmd.parameters), ['a'])
+
+        def other(b: 'str'):
+            pass
+
+        func.__code__ = other.__code__
+        func.__annotations__ = other.__annotations__
+        self.assertEqual(cmd.parameters,
+                         {'b': Parameter(name='b', type=str, default=inspect._empty)})
@@ -1,7 +1,9 @@
+import enum
+import sys
 import unittest
-from typing import List, Tuple, Union
+from typing import Annotated, Dict, FrozenSet, Iterable, List, Literal, Optional, Set, Tuple, Union
 
-from powercmd.command import Command, Parameter
+from powercmd.command import Command, CommandGroup, Parameter
 from powercmd.command_invoker import CommandInvoker
 from powercmd.command_line import CommandLine
 from powercmd.commands_dict import CommandsDict
@@ -142,3 +144,204 @@ class TestCommandInvoker(unittest.TestCase):
             invoker.invoke(self, cmdline=CommandLine('test arg=3.14'))
         with do_test.expect_call(arg='test_arg'):
             invoker.invoke(self, cmdline=CommandLine('test arg=test_arg'))
+
+    def test_construct_union_members(self):
+        class Color(enum.Enum):
+            RED = 1
+            GREEN = 2
+
+        ctor = CommandInvoker.get_constructor(Union[int, float, Color, Literal['auto'], None, str])
+        self.assertEqual(ctor('42'), 42)
+        self.assertIs(type(ctor('42')), int)
+        self.assertEqual(ctor('-1_000'), -1000)
+        self.assertEqual(ctor('4.5'), 4.5)
+        self.assertEqual(ctor('inf'), float('inf'))
+        self.assertIs(ctor('GREEN'), Color.GREEN)
+        self.assertEqual(ctor('auto'), 'auto')
+        self.assertIsNone(ctor('None'))
+        self.assertEqual(ctor('1.2.3'), '1.2.3')
+
+        ctor = CommandInvoker.get_constructor(Union[Color, Tuple[int, int]])
+        self.assertEqual(ctor('(1,2)'), (1, 2))
+        with self.assertRaises(InvalidInput):
+            ctor('(1,2,3)')
+        with self.assertRaises(InvalidInput):
+            ctor('BLUE')
+
+    def test_construct_optional(self):
+        @test_utils.mock
+        def do_test(self,
+                    arg: Optional[int],
+                    other: Union[int, None] = 0):
+            pass
+
+        cmds = CommandsDict()
+        cmds['test'] = Command('test', do_test)
+
+        invoker = CommandInvoker(cmds)
+        with do_test.expect_call(arg=3, other=0):
+            invoker.invoke(self, cmdline=CommandLine('test arg=3'))
+        with do_test.expect_call(arg=None, other=None):
+            invoker.invoke(self, cmdline=CommandLine('test arg=None other=None'))
+
+    @unittest.skipIf(sys.version_info < (3, 10), 'X | Y unions require python>=3.10')
+    def test_construct_union_type(self):
+        self.assertEqual(CommandInvoker.get_constructor(int | None)('None'), None)
+        self.assertEqual(CommandInvoker.get_constructor(int | None)('1'), 1)
+
+    def test_construct_collections(self):
+        @test_utils.mock
+        def do_test(self,
+                    mapping: Dict[str, Tuple[int, str]],
+                    numbers: Set[int],
+                    names: FrozenSet[str]):
+            pass
+
+        cmds = CommandsDict()
+        cmds['test'] = Command('test', do_test)
+
+        invoker = CommandInvoker(cmds)
+        with do_test.expect_call(mapping={'a': (1, 'x'), 'b': (2, 'y:z')}, numbers={1, 2}, names=frozenset(['x'])):
+            invoker.invoke(self, cmdline=CommandLine('test {a:(1,x),b:(2,y:z)} {1,2,1} x'))
+        with self.assertRaises(InvalidInput):
+            invoker.invoke(self, cmdline=CommandLine('test a {1} x'))
+        with self.assertRaises(InvalidInput):
+            invoker.invoke(self, cmdline=CommandLine('test "" {1} x'))
+        with self.assertRaises(InvalidInput):
+            invoker.invoke(self, cmdline=CommandLine('test {a:(1,x)} "" x'))
+
+    def test_construct_literal(self):
+        @test_utils.mock
+        def do_test(self,
+                    mode: Literal['fast', 'slow', 1],
+                    count: Annotated[int, 'metadata']):
+            pass
+
+        cmds = CommandsDict()
+        cmds['test'] = Command('test', do_test)
+
+        invoker = CommandInvoker(cmds)
+        with do_test.expect_call(mode='slow', count=2):
+            invoker.invoke(self, cmdline=CommandLine('test slow 2'))
+        with do_test.expect_call(mode=1, count=2):
+            invoker.invoke(self, cmdline=CommandLine('test 1 2'))
+        with self.assertRaises(InvalidInput):
+            invoker.invoke(self, cmdline=CommandLine('test medium 2'))
+
+    def test_invoke_group(self):
+        @test_utils.mock
+        def do_sub(self, arg: int):
+            pass
+
+        class Group:
+            def _get_all_commands(self):
+                cmds = CommandsDict()
+                cmds['sub'] = Command('sub', do_sub)
+                return cmds
+
+        cmds = CommandsDict()
+        cmds['group'] = CommandGroup('group', Group())
+
+        invoker = CommandInvoker(cmds)
+        with do_sub.expect_call(arg=42):
+            invoker.invoke(self, cmdline=CommandLine('group sub 42'))
+        with do_sub.expect_call(arg=42):
+            invoker.invoke(self, cmdline=CommandLine('gr s arg=42'))
+
+        with do_sub.expect_no_calls(), self.assertRaises(InvalidInput):
+            invoker.invoke(self, cmdline=CommandLine('group'))
+
+    def test_invoke_args(self):
+        @test_utils.mock
+        def do_test(self,
+                    first: int,
+                    second: List[int] = None):
+            pass
+
+        cmds = CommandsDict()
+        cmds['test'] = Command('test', do_test)
+
+        invoker = CommandInvoker(cmds)
+        with do_test.expect_call(first=1, second=[2, 3]):
+            invoker.invoke_args(self, command='test', named_args={'first': '1', 'second': [2, 3]})
+        with do_test.expect_call(first=1, second=None):
+            invoker.invoke_args(self, command='test', positional_args=[1])
+
+        with do_test.expect_no_calls(), self.assertRaises(InvalidInput):
+            invoker.invoke_args(self, command='test', positional_args=[1], named_args={'first': 1})
+        with do_test.expect_no_calls(), self.assertRaises(InvalidInput):
+            invoker.invoke_args(self, command='test', named_args={'second': [1]})
+
+    def test_invoke_pipeline(self):
+        events = []
+
+        def do_produce(self, count: int):
+            for i in range(count):
+                events.append('produce %d' % i)
+                yield str(i)
+
+        def do_double(self, scale: int, items: Iterable[int]):
+            for item in items:
+                events.append('double %d' % item)
+                yield item * scale
+
+        def do_total(self, items: Iterable[int]):
+            return sum(items)
+
+        cmds = CommandsDict()
+        cmds['produce'] = Command('produce', do_produce)
+        cmds['double'] = Command('double', do_double)
+        cmds['total'] = Command('total', do_total)
+
+        invoker = CommandInvoker(cmds)
+        cmdlines = [CommandLine('produce 3'), CommandLine('double 2'), CommandLine('total')]
+        self.assertEqual(invoker.invoke_pipeline(self, cmdlines=cmdlines), 6)
+        self.assertEqual(events, ['produce 0', 'double 0',
+                                  'produce 1', 'double 1',
+                                  'produce 2', 'double 2'])
+
+        with self.assertRaises(InvalidInput):
+            invoker.invoke_pipeline(self, cmdlines=[CommandLine('total'), CommandLine('produce 1')])
+        with self.assertRaises(InvalidInput):
+            invoker.invoke_pipeline(self, cmdlines=[CommandLine('produce 1'), CommandLine('total items=1')])
+
+        # only the first command may be given by a partial name
+        self.assertEqual(invoker.invoke_pipeline(self, cmdlines=[CommandLine('prod 2'), CommandLine('total')]), 1)
+        with self.assertRaises(InvalidInput):
+            invoker.invoke_pipeline(self, cmdlines=[CommandLine('produce 2'), CommandLine('tot')])
+
+    def test_construct_iterable(self):
+        @test_utils.mock
+        def do_test(self,
+                    arg: Iterable[int]):
+            pass
+
+        cmds = CommandsDict()
+        cmds['test'] = Command('test', do_test)
+
+        invoker = CommandInvoker(cmds)
+        with do_test.expect_call(arg=[1, 2]):
+            invoker.invoke(self, cmdline=CommandLine('test 1,2'))
+
+    def test_invoke_many(self):
+        @test_utils.mock
+        def do_test(self,
+                    first: int,
+                    second: List[int] = None):
+            pass
+
+        cmds = CommandsDict()
+        cmds['test'] = Command('test', do_test)
+
+        invoker = CommandInvoker(cmds)
+        with do_test.expect_call(first=1, second=[2, 3]):
+            list(invoker.invoke_many(self, command='test', rows=[['1', '2,3']]))
+        with do_test.expect_call(first=4, second=None):
+            list(invoker.invoke_many(self, command='test', rows=[{'first': 4}]))
+
+        with do_test.expect_no_calls(), self.assertRaises(InvalidInput):
+            list(invoker.invoke_many(self, command='test', rows=[['1', '2', '3']]))
+        with do_test.expect_no_calls(), self.assertRaises(InvalidInput):
+            list(invoker.invoke_many(self, command='test', rows=[{'second': '1'}]))
+        with do_test.expect_no_calls(), self.assertRaisesRegex(InvalidInput, 'row 1'):
+            list(invoker.invoke_many(self, command='test', rows=[['one']]))
@@ -1,7 +1,9 @@
 import unittest
 
 from powercmd.command import Command, Parameter
-from powercmd.command_line import CommandLine, NamedArg, PositionalArg, IncompleteArg
+from powercmd.command_line import (CommandLine, FileArg, NamedArg, PositionalArg, IncompleteArg, MISSING_ARG,
+                                   split_heredocs, split_pipeline)
+from powercmd.exceptions import InvalidInput
 from powercmd.commands_dict import CommandsDict
 
 
@@ -89,6 +91,44 @@ class TestCommandLine(unittest.TestCase):
         self.assertEqual(CommandLine('" foo"').command, ' foo')
         self.assertEqual(CommandLine('"foo " ').command, 'foo ')
 
+    def test_from_words(self):
+        cmdline = CommandLine.from_words(['foo', 'bar baz', '"qux"', 'a=b c'])
+        self.assertEqual(cmdline.command, 'foo')
+        self.assertEqual(cmdline.args, [PositionalArg('bar baz'), PositionalArg('"qux"'), NamedArg('a', 'b c')])
+        self.assertEqual(cmdline.subcommand_line().args, [PositionalArg('"qux"'), NamedArg('a', 'b c')])
+
+    def test_file_args(self):
+        cmdline = CommandLine('foo @bar baz=@"a b" "@qux" \'@x y\' @')
+        self.assertEqual(cmdline.args, [PositionalArg(FileArg('bar', '@bar')),
+                                        NamedArg('baz', FileArg('a b', '@"a b"')),
+                                        PositionalArg('@qux'), PositionalArg('@x y'), PositionalArg('@')])
+
+    def test_split_pipeline(self):
+        self.assertEqual(split_pipeline('foo a | bar "b | c" |baz'), ['foo a ', ' bar "b | c" |baz'])
+        self.assertEqual(split_pipeline('foo a|b'), ['foo a|b'])
+        self.assertEqual(split_pipeline('foo |'), ['foo ', ''])
+
+    def test_heredocs(self):
+        cmdline = CommandLine('foo <<A bar=<<B "<<C"\nfirst\nA\nsecond\n  third\nB')
+        self.assertEqual(cmdline.raw_text, 'foo <<A bar=<<B "<<C"')
+        self.assertEqual(cmdline.args, [PositionalArg('first'), NamedArg('bar', 'second\n  third'),
+                                        PositionalArg('<<C')])
+        self.assertEqual(CommandLine('group foo <<A\nx=@y\nA').subcommand_line().args,
+                         [PositionalArg('x=@y')])
+
+        self.assertEqual(split_heredocs('foo\nbar'), ('foo\nbar', []))
+        with self.assertRaises(InvalidInput):
+            CommandLine('foo <<A\nbar')
+        with self.assertRaises(InvalidInput):
+            CommandLine('foo <<A\nA\nbar')
+
+    def test_subcommand_line(self):
+        self.assertEqual(CommandLine('foo bar baz=qux').subcommand_line(),
+                         CommandLine('bar baz=qux'))
+        self.assertEqual(CommandLine(' "foo" bar ').subcommand_line().raw_text, ' bar ')
+        self.assertEqual(CommandLine('foo').subcommand_line().command, '')
+        self.assertEqual(CommandLine('').subcommand_line().command, '')
+
     def test_has_trailing_whitespace(self):
         self.assertEqual(CommandLine('foo ').has_trailing_whitespace, True)
         self.assertEqual(CommandLine('foo\t').has_trailing_whitespace, True)
@@ -113,6 +153,19 @@ class TestCommandLine(unittest.TestCase):
         self.assertEqual(CommandLine('foo "bar=baz ').has_trailing_whitespace, False)
         self.assertEqual(CommandLine('foo \'bar=baz ').has_trailing_whitespace, False)
 
+    def test_assign_args_exclude(self):
+        def do_foo(self,
+                   bar: str,
+                   baz: str = ''):
+            pass
+
+        cmd = Command('foo', do_foo)
+
+        self.assertEqual(CommandLine('foo qux').assign_args(cmd, exclude=('bar',)),
+                         {'baz': 'qux'})
+        self.assertEqual(CommandLine('foo bar=qux').assign_args(cmd, exclude=('bar',)),
+                         {'bar': 'qux', 'baz': MISSING_ARG})
+
     def test_get_current_arg(self):
         def do_foo(self,
                    bar: str = '',
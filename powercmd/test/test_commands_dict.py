@@ -0,0 +1,73 @@
+import unittest
+
+from powercmd.command import Command
+from powercmd.commands_dict import CommandsDict
+from powercmd.exceptions import InvalidInput
+
+
+def do_test(self):
+    pass
+
+
+class TestCommandsDict(unittest.TestCase):
+    def _make_cmds(self, *names):
+        return CommandsDict((name, Command(name, do_test)) for name in names)
+
+    def test_match(self):
+        cmds = self._make_cmds('get', 'get_value', 'set_foo', 'exit')
+        self.assertEqual(cmds.match('get'), ['get'])
+        self.assertEqual(cmds.match('ge'), ['get', 'get_value'])
+        self.assertEqual(cmds.match('gval'), ['get_value'])
+        self.assertEqual(cmds.match('sfo'), ['set_foo'])
+        self.assertEqual(cmds.match('xt'), ['exit'])
+        self.assertEqual(cmds.match(''), ['exit', 'get', 'get_value', 'set_foo'])
+        self.assertEqual(cmds.match('qwerty'), [])
+
+    def test_match_after_update(self):
+        cmds = self._make_cmds('get', 'get_value')
+        del cmds['get']
+        cmds['getter'] = Command('getter', do_test)
+        self.assertEqual(cmds.match('get'), ['get_value', 'getter'])
+        self.assertEqual(cmds.match('gette'), ['getter'])
+
+    def test_suggest(self):
+        cmds = self._make_cmds('help', 'exit', 'restart', 'start')
+        self.assertEqual(cmds.suggest('hlep'), ['help'])
+        self.assertEqual(cmds.suggest('stat'), ['start'])
+        self.assertEqual(cmds.suggest('qwerty'), [])
+
+    def test_suggest_after_delete(self):
+        cmds = self._make_cmds('help', 'hello')
+        del cmds['hello']
+        self.assertEqual(cmds.suggest('helo'), ['help'])
+
+    def test_indexes_follow_dict_methods(self):
+        cmds = self._make_cmds('help', 'hello', 'exit')
+        self.assertEqual(cmds.pop('hello').name, 'hello')
+        self.assertIsNone(cmds.pop('hello', None))
+        with self.assertRaises(KeyError):
+            cmds.pop('hello')
+        self.assertEqual(cmds.match('hel'), ['help'])
+        self.assertEqual(cmds.suggest('helo'), ['help'])
+
+        cmds.setdefault('hello', Command('hello', do_test))
+        cmds.setdefault('hello', Command('other', do_test))
+        self.assertEqual(cmds['hello'].name, 'hello')
+        self.assertEqual(cmds.match('hel'), ['hello', 'help'])
+
+        name, _ = cmds.popitem()
+        self.assertNotIn(name, cmds.match(name[:3]))
+
+        cmds.clear()
+        self.assertEqual(cmds.match('e'), [])
+        self.assertEqual(cmds.suggest('exit'), [])
+
+    def test_choose_no_match_suggests(self):
+        cmds = self._make_cmds('help', 'exit')
+        with self.assertRaisesRegex(InvalidInput, r'did you mean: help\?'):
+            cmds.choose('hlep')
+
+    def test_choose_no_match_no_suggestions(self):
+        cmds = self._make_cmds('help', 'exit')
+        with self.assertRaisesRegex(InvalidInput, r'^no such command: qwerty$'):
+            cmds.choose('qwerty')
@@ -1,13 +1,14 @@
 import enum
 import unittest
-from typing import List, Tuple, Union
+from typing import Annotated, Dict, List, Literal, Tuple, Union
 
 from prompt_toolkit.completion import Completion
 from prompt_toolkit.document import Document
 
-from powercmd.command import Command
+from powercmd.command import Command, CommandGroup
 from powercmd.commands_dict import CommandsDict
 from powercmd.completer import Completer
+from powercmd.extra_typing import Hex, HexBytes
 from powercmd.test import test_utils
 
 
@@ -43,6 +44,49 @@ class TestCompleter(unittest.TestCase):
         self.assertEqual(list(completer.get_completions(Document(text='test arg_f', cursor_position=10))),
                          [Completion('arg_first', start_position=-5, display_meta=str.__name__)])
 
+    def test_complete_group(self):
+        def do_restart(self,
+                       node: TestEnum):
+            pass
+
+        def do_status(self):
+            pass
+
+        class Group:
+            def _get_all_commands(self):
+                cmds = CommandsDict()
+                cmds['restart'] = Command('restart', do_restart)
+                cmds['status'] = Command('status', do_status)
+                return cmds
+
+        cmds = CommandsDict()
+        cmds['cluster'] = CommandGroup('cluster', Group())
+        completer = Completer(cmds)
+
+        self.assertEqual(list(completer.get_completions(Document(text='cluster ', cursor_position=8))),
+                         [Completion('restart', start_position=0),
+                          Completion('status', start_position=0)])
+        self.assertEqual(list(completer.get_completions(Document(text='cluster r', cursor_position=9))),
+                         [Completion('restart', start_position=-1)])
+        self.assertEqual(list(completer.get_completions(Document(text='cluster restart node=F',
+                                                                 cursor_position=22))),
+                         [Completion('First', start_position=-1, display_meta='1')])
+
+    def test_complete_pipeline(self):
+        def do_test(self,
+                    arg: TestEnum):
+            pass
+
+        cmds = CommandsDict()
+        cmds['test'] = Command('test', do_test)
+        completer = Completer(cmds)
+
+        self.assertEqual(list(completer.get_completions(Document(text='test First | t', cursor_position=14))),
+                         [Completion('test', start_position=-1)])
+        self.assertEqual(list(completer.get_completions(Document(text='test First | test arg=S',
+                                                                 cursor_position=23))),
+                         [Completion('Second', start_position=-1, display_meta='2')])
+
     def test_complete_enum(self):
         def do_test(self,
                     arg: TestEnum):
@@ -138,6 +182,39 @@ class TestCompleter(unittest.TestCase):
         self.assertEqual(list(completer.get_completions(Document(text='test arg=C', cursor_position=10))),
                          [Completion('C2', start_position=-1, display_meta='4')])
 
+    def test_complete_literal_dict(self):
+        def do_test(self,
+                    mode: Literal['fast', 'slow'],
+                    mapping: Dict[TestEnum, Literal['on', 'off']]):
+            pass
+
+        cmds = CommandsDict()
+        cmds['test'] = Command('test', do_test)
+        completer = Completer(cmds)
+
+        self.assertEqual(list(completer.get_completions(Document(text='test f', cursor_position=6))),
+                         [Completion('fast', start_position=-1)])
+        self.assertEqual(list(completer.get_completions(Document(text='test fast F', cursor_position=11))),
+                         [Completion('First', start_position=-1, display_meta='1')])
+        self.assertEqual(list(completer.get_completions(Document(text='test fast First:o', cursor_position=17))),
+                         [Completion('off', start_position=-1),
+                          Completion('on', start_position=-1)])
+
+    def test_complete_binary(self):
+        def do_test(self,
+                    key: Annotated[bytearray, Hex(4)],
+                    data: HexBytes):
+            pass
+
+        cmds = CommandsDict()
+        cmds['test'] = Command('test', do_test)
+        completer = Completer(cmds)
+
+        self.assertEqual(list(completer.get_completions(Document(text='test de:ad', cursor_position=10))),
+                         [Completion('de:ad', start_position=-5, display='2/4 bytes', display_meta='hex')])
+        self.assertEqual(list(completer.get_completions(Document(text='test key=0 data=', cursor_position=16))),
+                         [Completion('', start_position=0, display='0 bytes', display_meta='hex')])
+
     def test_complete_custom_completer_legacy(self):
         class TestType(object):
             @test_utils.static_mock
@@ -0,0 +1,78 @@
+import contextlib
+import io
+import threading
+import time
+import unittest
+
+import powercmd
+from powercmd.concurrency import ConcurrencyLimit
+from powercmd.exceptions import CommandRejected
+
+
+class TestConcurrencyLimit(unittest.TestCase):
+    def test_reject(self):
+        limit = ConcurrencyLimit(1, wait=False)
+        with limit:
+            with self.assertRaises(CommandRejected):
+                limit.acquire()
+        with limit:
+            pass
+        self.assertEqual((limit.running, limit.rejected), (0, 1))
+
+    def test_wait(self):
+        limit = ConcurrencyLimit(1, max_queued=1)
+        limit.acquire()
+
+        waiter = threading.Thread(target=lambda: (limit.acquire(), limit.release()))
+        waiter.start()
+        deadline = time.monotonic() + 5
+        while limit.queued == 0:
+            self.assertLess(time.monotonic(), deadline, 'waiter did not start waiting')
+            time.sleep(0.001)
+        with self.assertRaises(CommandRejected):
+            limit.acquire()
+
+        limit.release()
+        waiter.join()
+        self.assertEqual((limit.running, limit.queued, limit.waits, limit.rejected), (0, 0, 1, 1))
+        self.assertGreater(limit.max_wait_time, 0)
+
+
+class LimitedImpl(powercmd.Cmd):
+    CONCURRENCY_LIMIT = ConcurrencyLimit(1, wait=False)
+    started = None
+    release = None
+
+    @powercmd.concurrency_limit(1, wait=False)
+    def do_exclusive(self):
+        LimitedImpl.started.set()
+        LimitedImpl.release.wait(5)
+        return 'done'
+
+
+class TestCmdConcurrency(unittest.TestCase):
+    def test_limits(self):
+        LimitedImpl.started = threading.Event()
+        LimitedImpl.release = threading.Event()
+        results = []
+        first = threading.Thread(target=lambda: results.append(LimitedImpl().onecmd('exclusive')))
+        with contextlib.redirect_stdout(io.StringIO()):
+            first.start()
+            LimitedImpl.started.wait(5)
+
+            cmd = LimitedImpl()
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                self.assertIsNone(cmd.onecmd('exclusive'))
+                self.assertEqual(LimitedImpl.CONCURRENCY_LIMIT.running, 1)
+                cmd.onecmd('stats')
+
+            LimitedImpl.release.set()
+            first.join()
+
+        self.assertEqual(results, ['done'])
+        self.assertIn('concurrency limit reached', output.getvalue())
+        # built-in `stats` is not subject to the shared limit
+        self.assertIn('all commands: concurrency: 1/1 running, 0 queued, 0 rejected', output.getvalue())
+        self.assertIn('exclusive: concurrency: 1/1 running, 0 queued, 1 rejected', output.getvalue())
+        self.assertEqual(LimitedImpl.CONCURRENCY_LIMIT.running, 0)
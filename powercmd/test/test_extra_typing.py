@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from typing import Annotated
+
+from powercmd.cmd import Cmd
+from powercmd.command_invoker import CommandInvoker
+from powercmd.extra_typing import Base64, Base64Bytes, Hex, HexBytes
+
+
+class TestBinaryFormats(unittest.TestCase):
+    def test_hex(self):
+        self.assertEqual(Hex().powercmd_parse('deadBEEF'), b'\xde\xad\xbe\xef')
+        self.assertEqual(Hex().powercmd_parse(' de ad\n\tbe ef '), b'\xde\xad\xbe\xef')
+        self.assertEqual(Hex().powercmd_parse('de:ad-be_ef,00'), b'\xde\xad\xbe\xef\x00')
+        self.assertEqual(Hex().powercmd_parse(''), b'')
+        for text in ['abc', 'xy', 'de:ad:g0']:
+            with self.assertRaises(ValueError):
+                Hex().powercmd_parse(text)
+
+    def test_base64(self):
+        self.assertEqual(Base64().powercmd_parse('3q2+7w=='), b'\xde\xad\xbe\xef')
+        self.assertEqual(Base64().powercmd_parse(' 3q2+\n7w==\n'), b'\xde\xad\xbe\xef')
+        with self.assertRaises(ValueError):
+            Base64().powercmd_parse('3q2+7')
+        with self.assertRaises(ValueError):
+            Base64().powercmd_parse('ą')
+
+    def test_targets(self):
+        for fmt, text in [(Hex(), 'dead beef'), (Base64(), '3q2+7w==')]:
+            data = fmt.powercmd_parse(text, bytearray)
+            self.assertIsInstance(data, bytearray)
+            self.assertEqual(data, b'\xde\xad\xbe\xef')
+            data = fmt.powercmd_parse(text, memoryview)
+            self.assertIsInstance(data, memoryview)
+            self.assertEqual(data, b'\xde\xad\xbe\xef')
+
+    def test_length(self):
+        self.assertEqual(Hex(2).powercmd_parse('beef'), b'\xbe\xef')
+        with self.assertRaises(ValueError):
+            Hex(2).powercmd_parse('dead beef')
+        with self.assertRaises(ValueError):
+            Base64(8).powercmd_parse('3q2+7w==')
+
+    def test_encoded_length(self):
+        self.assertEqual(Hex().encoded_length('de:ad b'), 2)
+        self.assertEqual(Base64().encoded_length('3q2+\n7w='), 4)
+
+    def test_equality(self):
+        self.assertEqual(Hex(4), Hex(4))
+        self.assertNotEqual(Hex(4), Hex())
+        self.assertNotEqual(Hex(), Base64())
+        self.assertEqual(repr(Hex(4)), 'Hex(4)')
+
+    def test_constructor(self):
+        ctor = CommandInvoker.get_constructor(HexBytes)
+        self.assertEqual(ctor('00ff'), b'\x00\xff')
+        self.assertEqual(CommandInvoker.get_constructor(Base64Bytes)('AP8='), b'\x00\xff')
+
+        data = CommandInvoker.get_constructor(Annotated[bytearray, Hex(2)])('00ff')
+        self.assertIsInstance(data, bytearray)
+        self.assertEqual(data, b'\x00\xff')
+        with self.assertRaises(ValueError):
+            CommandInvoker.get_constructor(Annotated[bytearray, Hex(4)])('00ff')
+
+    def test_file_args(self):
+        class BinaryImpl(Cmd):
+            FILE_ARGUMENTS = True
+
+            def do_hex(self, key: Annotated[bytes, Hex(4)]):
+                return key
+
+            def do_data(self, hex_data: HexBytes = None, base64_data: Base64Bytes = None):
+                return hex_data, base64_data
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            hex_path = os.path.join(tmpdir, 'key.hex')
+            with open(hex_path, 'w') as f:
+                f.write('deadbeef\n')
+            base64_path = os.path.join(tmpdir, 'data.b64')
+            with open(base64_path, 'w') as f:
+                f.write('3q2+\n7w==\n')
+
+            cmd = BinaryImpl()
+            self.assertEqual(cmd.onecmd('hex @%s' % hex_path), b'\xde\xad\xbe\xef')
+            self.assertEqual(cmd.onecmd('data @%s base64_data=@%s' % (hex_path, base64_path)),
+                             (b'\xde\xad\xbe\xef', b'\xde\xad\xbe\xef'))
+
+            with open(hex_path, 'w') as f:
+                f.write('dead')
+            self.assertIsNone(cmd.onecmd('hex @%s' % hex_path))
+            self.assertIn('expected 4 bytes', str(cmd._errors[0]))
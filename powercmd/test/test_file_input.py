@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from typing import Iterable, List, Set, Tuple
+
+from powercmd.cmd import Cmd
+from powercmd.exceptions import InvalidInput
+from powercmd.file_input import iter_list_items
+
+
+class FileInputImpl(Cmd):
+    FILE_ARGUMENTS = True
+
+    def do_view(self, data: memoryview):
+        return data
+
+    def do_bytes(self, data: bytes, copy: bytearray = None):
+        return data, copy
+
+    def do_numbers(self, values: List[int], unique: Set[int] = None):
+        return values, unique
+
+    def do_lazy(self, values: Iterable[Tuple[int, str]]):
+        return values
+
+    def do_text(self, text: str):
+        return text
+
+
+class TestFileInput(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _write(self, name, data):
+        path = os.path.join(self._dir.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_iter_list_items(self):
+        path = self._write('list', b'[1, 2,\n3\n\n(4,5)]\n')
+        self.assertEqual(list(iter_list_items(path)), ['1', ' 2', '3', '(4,5)'])
+        path = self._write('list', b'')
+        self.assertEqual(list(iter_list_items(path)), [])
+        path = self._write('list', b'[1,2')
+        with self.assertRaises(ValueError):
+            list(iter_list_items(path))
+
+    def test_bytes(self):
+        cmd = FileInputImpl()
+        path = self._write('blob', b'\x00\xffdata')
+        view = cmd.onecmd('view @%s' % path)
+        self.assertIsInstance(view, memoryview)
+        self.assertEqual(view, b'\x00\xffdata')
+        self.assertEqual(cmd.onecmd('bytes @%s copy=@%s' % (path, path)),
+                         (b'\x00\xffdata', bytearray(b'\x00\xffdata')))
+        self.assertEqual(cmd.onecmd('view @%s' % self._write('empty', b'')), b'')
+
+    def test_lists(self):
+        cmd = FileInputImpl()
+        path = self._write('numbers', b'1\n2\n2\n')
+        self.assertEqual(cmd.onecmd('numbers @%s unique=@%s' % (path, path)), ([1, 2, 2], {1, 2}))
+
+        values = cmd.onecmd('lazy @%s' % self._write('pairs', b'(1,a),(2,b)'))
+        self.assertNotIsInstance(values, list)
+        self.assertEqual(list(values), [(1, 'a'), (2, 'b')])
+
+    def test_text(self):
+        cmd = FileInputImpl()
+        self.assertEqual(cmd.onecmd('text @%s' % self._write('text', b'foo bar\n')), 'foo bar')
+        self.assertEqual(cmd.onecmd('text "@foo"'), '@foo')
+        self.assertEqual(cmd.onecmd('text "@foo bar"'), '@foo bar')
+
+    def test_errors(self):
+        cmd = FileInputImpl()
+        self.assertIsNone(cmd.onecmd('text @%s' % os.path.join(self._dir.name, 'missing')))
+        self.assertTrue(issubclass(cmd._errors[0].exc_type, InvalidInput))
+
+
+    def test_disabled(self):
+        class DisabledImpl(FileInputImpl):
+            FILE_ARGUMENTS = False
+
+        cmd = DisabledImpl()
+        path = self._write('text', b'foo')
+        self.assertEqual(cmd.onecmd('text @%s' % path), '@' + path)
+        self.assertEqual(cmd.onecmd('text "@me"'), '@me')
+        self.assertEqual(cmd.onecmd('text @@foo'), '@@foo')
@@ -0,0 +1,98 @@
+import gc
+import os
+import tempfile
+import unittest
+import weakref
+
+from prompt_toolkit.buffer import Buffer
+from prompt_toolkit.document import Document
+
+from powercmd.history import HistorySuggest, MmapHistory
+
+
+class TestMmapHistory(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmpdir.name, 'history')
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def test_store_load(self):
+        history = MmapHistory(self.path, flush_every=2)
+        history.store_string('first')
+        self.assertFalse(os.path.exists(self.path))
+        history.store_string('multi\nline \\n')
+        history.store_string('last')
+        self.assertEqual(list(history.load_history_strings()),
+                         ['last', 'multi\nline \\n', 'first'])
+
+        history.flush()
+        self.assertEqual(list(MmapHistory(self.path).load_history_strings()),
+                         ['last', 'multi\nline \\n', 'first'])
+
+    def test_load_limit(self):
+        history = MmapHistory(self.path, flush_every=2, load_limit=2)
+        for line in ['a', 'b', 'c']:
+            history.store_string(line)
+        self.assertEqual(list(history.load_history_strings()), ['c', 'b'])
+        # entries that were not loaded can still be found
+        self.assertEqual(list(history.search('a')), ['a'])
+
+    def test_search(self):
+        history = MmapHistory(self.path, flush_every=1)
+        for line in ['echo foo', 'help echo', 'echo bar', 'echo foo', 'echo \\n', 'echo\nx']:
+            history.store_string(line)
+        history.store_string('echo pending')
+        history._flush_every = 2
+        history.store_string('echo pending')
+
+        self.assertEqual(list(history.search('echo', prefix=True)),
+                         ['echo pending', 'echo\nx', 'echo \\n', 'echo foo', 'echo bar'])
+        self.assertEqual(list(history.search('echo')),
+                         ['echo pending', 'echo\nx', 'echo \\n', 'echo foo', 'echo bar', 'help echo'])
+        self.assertEqual(list(history.search('\n')), ['echo\nx'])
+        self.assertEqual(list(history.search('\\n')), ['echo \\n'])
+        self.assertEqual(list(history.search('foo', prefix=True)), [])
+        self.assertEqual(list(history.search('')),
+                         ['echo pending', 'echo\nx', 'echo \\n', 'echo foo', 'echo bar', 'help echo'])
+
+    def test_suggest(self):
+        history = MmapHistory(self.path, flush_every=1)
+        for line in ['echo foo', 'help', 'echo bar']:
+            history.store_string(line)
+
+        suggest = HistorySuggest(history)
+        buffer = Buffer()
+        self.assertEqual(suggest.get_suggestion(buffer, Document('ec')).text, 'ho bar')
+        self.assertEqual(suggest.get_suggestion(buffer, Document('echo f')).text, 'oo')
+        self.assertIsNone(suggest.get_suggestion(buffer, Document('help')))
+        self.assertIsNone(suggest.get_suggestion(buffer, Document(' ')))
+        self.assertIsNone(suggest.get_suggestion(buffer, Document('exit')))
+
+    def test_flush_on_collect(self):
+        history = MmapHistory(self.path)
+        history.store_string('pending')
+        ref = weakref.ref(history)
+        del history
+        gc.collect()
+        self.assertIsNone(ref())
+        self.assertEqual(list(MmapHistory(self.path).load_history_strings()), ['pending'])
+
+    def test_compact(self):
+        history = MmapHistory(self.path, flush_every=1, compact_every=0)
+        for line in ['a', 'b', 'a', 'c', 'b']:
+            history.store_string(line)
+
+        history.compact()
+        self.assertEqual(list(history.load_history_strings()), ['b', 'c', 'a'])
+        history.store_string('d')
+        self.assertEqual(list(MmapHistory(self.path).load_history_strings()), ['d', 'b', 'c', 'a'])
+
+    def test_compact_in_background(self):
+        history = MmapHistory(self.path, flush_every=2, compact_every=4)
+        for line in ['a', 'a', 'a', 'a']:
+            history.store_string(line)
+
+        history._compaction.join()
+        self.assertEqual(list(history.load_history_strings()), ['a'])
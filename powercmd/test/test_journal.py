@@ -0,0 +1,57 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from powercmd.cmd import Cmd
+from powercmd.journal import Journal, JournalEntry, read_journal, replay
+
+
+class JournalImpl(Cmd):
+    def do_echo(self, text: str):
+        print(text)
+
+    def do_fail(self):
+        raise RuntimeError('failed')
+
+
+class TestJournal(unittest.TestCase):
+    def test_record(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'journal')
+            with Journal(path) as journal, contextlib.redirect_stdout(io.StringIO()):
+                cmd = JournalImpl(journal=journal)
+                cmd.onecmd('echo "a\nb"')
+                cmd.onecmd('')
+                cmd.onecmd('fail')
+                cmd.onecmd('echo c')
+
+            entries = list(read_journal(path))
+
+        self.assertEqual([(entry.line, entry.error) for entry in entries],
+                         [('echo "a\nb"', None),
+                          ('fail', 'RuntimeError: failed'),
+                          ('echo c', None)])
+        self.assertTrue(all(entry.duration >= 0 for entry in entries))
+        self.assertTrue(entries[0].timestamp <= entries[1].timestamp <= entries[2].timestamp)
+
+    def test_replay(self):
+        entries = [JournalEntry(100.0, 0.1, None, 'echo a'),
+                   JournalEntry(101.0, 0.1, 'RuntimeError: failed', 'fail'),
+                   JournalEntry(104.0, 0.1, 'RuntimeError: failed', 'echo b')]
+
+        delays = []
+        stats = replay(JournalImpl(), entries, speed=2.0, sleep=delays.append)
+        self.assertEqual(stats.count, 3)
+        self.assertEqual(stats.errors, 1)
+        self.assertEqual(stats.mismatches, [entries[2]])
+        self.assertEqual(len(delays), 2)
+        self.assertAlmostEqual(delays[0], 0.5, places=1)
+        self.assertAlmostEqual(delays[1], 2.0, places=1)
+        self.assertIn('3 commands', str(stats))
+
+        delays = []
+        stats = replay(JournalImpl(), entries, sleep=delays.append)
+        self.assertEqual(delays, [])
+        self.assertGreaterEqual(stats.percentile(100), stats.percentile(50))
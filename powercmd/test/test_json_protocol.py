@@ -0,0 +1,65 @@
+import io
+import json
+import unittest
+from typing import List
+
+from powercmd.cmd import Cmd
+from powercmd.json_protocol import JsonProtocol, run_json_protocol
+
+
+class JsonImpl(Cmd):
+    def do_sum(self, first: int, second: int = 1):
+        print('summing')
+        return first + second
+
+    def do_total(self, values: List[int]):
+        return sum(values)
+
+    def do_fail(self):
+        raise RuntimeError('failed')
+
+
+class TestJsonProtocol(unittest.TestCase):
+    def _request(self, request):
+        line = request if isinstance(request, str) else json.dumps(request)
+        return json.loads(JsonProtocol(JsonImpl()).handle_line(line + '\n'))
+
+    def test_named_args(self):
+        response = self._request({'id': 1, 'cmd': 'sum', 'args': {'first': 2, 'second': '3'}})
+        self.assertEqual(response['id'], 1)
+        self.assertEqual(response['result'], 5)
+        self.assertEqual(response['output'], 'summing\n')
+        self.assertIsNone(response['error'])
+        self.assertGreaterEqual(response['time'], 0)
+
+    def test_positional_args(self):
+        self.assertEqual(self._request({'cmd': 'sum', 'args': [2]})['result'], 3)
+
+    def test_pre_typed_args(self):
+        self.assertEqual(self._request({'cmd': 'total', 'args': {'values': [1, 2, 3]}})['result'], 6)
+        self.assertEqual(self._request({'cmd': 'total', 'args': {'values': '1,2,3'}})['result'], 6)
+
+    def test_command_line(self):
+        self.assertEqual(self._request({'id': 'a', 'line': 'sum 2 second=2'})['result'], 4)
+        self.assertEqual(self._request('sum 2 2')['result'], 4)
+
+    def test_errors(self):
+        self.assertEqual(self._request({'cmd': 'fail'})['error'], 'RuntimeError: failed')
+        self.assertEqual(self._request({'cmd': 'sum'})['error'],
+                         'InvalidInput: missing value for argument: first')
+        self.assertEqual(self._request({'cmd': 'sum', 'args': {'third': 1}})['error'],
+                         'InvalidInput: unrecognized argument: third')
+        self.assertEqual(self._request({'cmd': 'sum', 'args': {'first': 'x'}})['error'],
+                         "InvalidInput: invalid literal for int() with base 10: 'x'")
+        self.assertIsNotNone(self._request({'id': 1})['error'])
+
+    def test_run_pipelined(self):
+        requests = ''.join(json.dumps({'id': i, 'cmd': 'sum', 'args': [i]}) + '\n'
+                           for i in range(100))
+
+        for workers in (1, 4):
+            output = io.StringIO()
+            run_json_protocol(JsonImpl(), io.StringIO(requests), output, workers=workers)
+            responses = [json.loads(line) for line in output.getvalue().splitlines()]
+            self.assertEqual(sorted((r['id'], r['result'], r['output']) for r in responses),
+                             [(i, i + 1, 'summing\n') for i in range(100)])
@@ -0,0 +1,72 @@
+import inspect
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+
+from powercmd.cmd import Cmd
+from powercmd.command import Parameter
+from powercmd.lazy_command import LazyCommand, LazyHandler
+
+PLUGIN_SOURCE = textwrap.dedent('''
+    from __future__ import annotations
+
+
+    def do_multiply(self, first: int, second: int = 2):
+        """Multiplies two numbers."""
+        return first * second
+''')
+
+
+class TestLazyCommand(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.module = 'powercmd_test_plugin_%d' % id(self)
+        with open(os.path.join(self._dir.name, self.module + '.py'), 'w') as f:
+            f.write(PLUGIN_SOURCE)
+        sys.path.insert(0, self._dir.name)
+
+    def tearDown(self):
+        sys.path.remove(self._dir.name)
+        sys.modules.pop(self.module, None)
+        self._dir.cleanup()
+
+    def _manifest(self):
+        return [{'name': 'multiply',
+                 'handler': self.module + ':do_multiply',
+                 'description': 'Multiplies two numbers.',
+                 'params': ['first', 'second?']}]
+
+    def test_invalid_path(self):
+        with self.assertRaises(ValueError):
+            LazyHandler('no_attribute')
+
+    def test_help_does_not_import(self):
+        cmd = Cmd()
+        cmd.add_manifest(self._manifest())
+
+        command = cmd._get_all_commands()['multiply']
+        self.assertIsInstance(command, LazyCommand)
+        self.assertEqual(command.short_description, 'Multiplies two numbers.')
+        self.assertEqual(command.help,
+                         'Multiplies two numbers.\n\nARGUMENTS: multiply first second?\n')
+        self.assertNotIn(self.module, sys.modules)
+
+    def test_import_on_invoke(self):
+        cmd = Cmd()
+        cmd.add_manifest(self._manifest())
+
+        self.assertEqual(cmd.onecmd('multiply 21'), 42)
+        self.assertIn(self.module, sys.modules)
+        self.assertTrue(cmd._get_all_commands()['multiply'].handler.loaded)
+
+    def test_import_on_parameters(self):
+        cmd = Cmd()
+        cmd.add_manifest(self._manifest())
+
+        command = cmd._get_all_commands()['multiply']
+        self.assertEqual(list(command.parameters.values()),
+                         [Parameter('first', int, inspect._empty),
+                          Parameter('second', int, 2)])
+        self.assertIn(self.module, sys.modules)
@@ -0,0 +1,97 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from powercmd.cmd import Cmd
+from powercmd.lazy_command import LazyCommand
+from powercmd.manifest import build_manifest, read_manifest, write_manifest
+
+
+class ManifestImpl(Cmd):
+    calls = []
+
+    def do_add(self, first: int, second: int = 1):
+        """Adds two numbers."""
+        ManifestImpl.calls.append(first + second)
+
+
+class OtherImpl(Cmd):
+    pass
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, 'test.manifest')
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_build(self):
+        manifest = build_manifest(ManifestImpl)
+        self.assertEqual(manifest['class'], 'ManifestImpl')
+        self.assertIn(__file__.replace('.pyc', '.py'), manifest['sources'])
+
+        add = next(entry for entry in manifest['commands'] if entry['name'] == 'add')
+        self.assertEqual(add['handler'], __name__ + ':ManifestImpl.do_add')
+        self.assertEqual(add['params'], ['first', 'second?'])
+        self.assertEqual(add['help'], ManifestImpl()._get_all_commands()['add'].help)
+
+    def test_build_local_handler(self):
+        class LocalImpl(Cmd):
+            def do_local(self):
+                pass
+
+        with self.assertRaises(ValueError):
+            build_manifest(LocalImpl)
+
+    def test_round_trip(self):
+        write_manifest(ManifestImpl, self.path)
+        entries = read_manifest(self.path, ManifestImpl)
+        self.assertEqual(entries, build_manifest(ManifestImpl)['commands'])
+
+        def no_reflection(self):
+            raise AssertionError('commands should be loaded from manifest')
+
+        ManifestImpl.calls = []
+        with mock.patch.object(ManifestImpl, '_collect_commands', no_reflection):
+            self.assertEqual(ManifestImpl.main(['add', '2', '3'], manifest=self.path), 0)
+        self.assertEqual(ManifestImpl.calls, [5])
+
+    def test_help_without_introspection(self):
+        write_manifest(ManifestImpl, self.path)
+        cmd = Cmd()
+        cmd.add_manifest(entry for entry in read_manifest(self.path) if entry['name'] == 'add')
+
+        add = cmd._get_all_commands()['add']
+        self.assertIsInstance(add, LazyCommand)
+        self.assertEqual(add.help, ManifestImpl()._get_all_commands()['add'].help)
+        self.assertFalse(add.handler.loaded)
+
+    def test_stale(self):
+        write_manifest(ManifestImpl, self.path)
+        with open(self.path) as f:
+            manifest = json.load(f)
+        for fingerprint in manifest['sources'].values():
+            fingerprint['mtime_ns'] += 1
+        with open(self.path, 'w') as f:
+            json.dump(manifest, f)
+
+        # only the mtime changed, contents are the same
+        self.assertIsNotNone(read_manifest(self.path, ManifestImpl))
+
+        for fingerprint in manifest['sources'].values():
+            fingerprint['sha256'] = '0' * 64
+        with open(self.path, 'w') as f:
+            json.dump(manifest, f)
+
+        self.assertIsNone(read_manifest(self.path, ManifestImpl))
+
+    def test_other_class(self):
+        write_manifest(ManifestImpl, self.path)
+        self.assertIsNone(read_manifest(self.path, OtherImpl))
+
+    def test_missing(self):
+        self.assertIsNone(read_manifest(self.path))
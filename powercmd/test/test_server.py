@@ -0,0 +1,175 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+from powercmd.cmd import Cmd
+from powercmd.exceptions import InvalidInput
+from powercmd.server import CmdServer
+
+
+class CounterCmd(Cmd):
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def do_increment(self):
+        self.count += 1
+        return self.count
+
+    def do_add(self, first: int, second: int):
+        self.count += first + second
+        return self.count
+
+
+class ServerImpl(Cmd):
+    released = threading.Event()
+
+    def __init__(self):
+        super().__init__()
+        self.prompt = '$ '
+        self.do_counter = CounterCmd()
+
+    def do_sum(self, first: int, second: int):
+        print(first + second)
+
+    def do_block(self):
+        print('released' if ServerImpl.released.wait(timeout=5) else 'timeout')
+
+    def do_release(self):
+        ServerImpl.released.set()
+
+    def do_echo(self, text: str):
+        return text
+
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def command(self, line):
+        self.writer.write((line + '\n').encode())
+        return await self.read_output()
+
+    async def read_output(self):
+        return (await self.reader.readuntil(b'$ '))[:-2].decode()
+
+    def close(self):
+        self.writer.close()
+
+
+class TestCmdServer(unittest.TestCase):
+    def setUp(self):
+        ServerImpl.released.clear()
+
+    async def _connect_tcp(self, server):
+        host, port = server.sockets[0].getsockname()[:2]
+        client = Client(*await asyncio.open_connection(host, port))
+        await client.read_output()
+        return client
+
+    def test_tcp(self):
+        async def run():
+            server = CmdServer(ServerImpl)
+            async with await server.start_tcp('127.0.0.1', 0) as tcp_server:
+                client = await self._connect_tcp(tcp_server)
+                self.assertEqual(await client.command('sum 1 2'), '* exact: sum\n3\n')
+                self.assertIn('available commands:', await client.command('help'))
+                client.close()
+
+        asyncio.run(run())
+
+    @unittest.skipUnless(hasattr(asyncio, 'start_unix_server'), 'Unix sockets not supported')
+    def test_unix(self):
+        async def run():
+            with tempfile.TemporaryDirectory() as tmpdir:
+                path = os.path.join(tmpdir, 'socket')
+                server = CmdServer(ServerImpl)
+                async with await server.start_unix(path):
+                    client = Client(*await asyncio.open_unix_connection(path))
+                    await client.read_output()
+                    self.assertEqual(await client.command('sum 2 2'), '* exact: sum\n4\n')
+                    client.close()
+
+        asyncio.run(run())
+
+    def test_concurrent_sessions(self):
+        async def run():
+            server = CmdServer(ServerImpl)
+            async with await server.start_tcp('127.0.0.1', 0) as tcp_server:
+                first = await self._connect_tcp(tcp_server)
+                second = await self._connect_tcp(tcp_server)
+
+                blocked = asyncio.ensure_future(first.command('block'))
+                self.assertEqual(await second.command('sum 1 1'), '* exact: sum\n2\n')
+                self.assertEqual(await second.command('release'), '* exact: release\n')
+                self.assertEqual(await blocked, '* exact: block\nreleased\n')
+
+                first.close()
+                second.close()
+
+        asyncio.run(run())
+
+    def test_sessions_have_own_registry(self):
+        server = CmdServer(ServerImpl)
+        first = server.create_session()
+        second = server.create_session()
+        self.assertIsNot(first._get_all_commands(), second._get_all_commands())
+        # parsed parameters are shared
+        self.assertIs(first._get_all_commands()['sum'].parameters,
+                      second._get_all_commands()['sum'].parameters)
+
+        first.add_command('dynamic', lambda self: 'dynamic')
+        self.assertEqual(first.onecmd('dynamic'), 'dynamic')
+        self.assertNotIn('dynamic', second._get_all_commands())
+
+        # groups belong to the session that defined them
+        self.assertEqual(first.onecmd('counter increment'), 1)
+        self.assertEqual(first.onecmd('counter increment'), 2)
+        self.assertEqual(second.onecmd('counter increment'), 1)
+
+    def test_no_file_access(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'rows.csv')
+            with open(path, 'w') as f:
+                f.write('1,2\n')
+
+            session = CmdServer(ServerImpl).create_session()
+            output = CmdServer._execute(session, 'bulk sum %s' % path)
+            self.assertNotIn('3', output)
+            self.assertNotIn('bulk', session._get_all_commands())
+            self.assertEqual(session.onecmd('echo @%s' % path), '@' + path)
+
+            # nested command groups have their own `bulk`
+            output = CmdServer._execute(session, 'counter bulk add %s' % path)
+            self.assertIn('bulk is not available: file access is disabled', output)
+            self.assertNotIn('3', output)
+            self.assertEqual(session.do_counter.count, 0)
+            output = CmdServer._execute(session, 'counter bulk add %s | counter increment' % path)
+            self.assertIn('bulk is not available: file access is disabled', output)
+            with self.assertRaises(InvalidInput):
+                list(session.invoke_many('counter bulk', [['add', path]]))
+
+            session = CmdServer(ServerImpl, file_args=True).create_session()
+            self.assertEqual(CmdServer._execute(session, 'bulk sum %s' % path), '* exact: bulk\n3\n')
+            self.assertIn('3\n', CmdServer._execute(session, 'counter bulk add %s' % path))
+            self.assertEqual(session.do_counter.count, 3)
+
+    def test_stdout_restored(self):
+        stdout = sys.stdout
+        self.assertEqual(CmdServer._execute(ServerImpl(), 'sum 1 2'), '* exact: sum\n3\n')
+        self.assertIs(sys.stdout, stdout)
+
+    def test_exit_closes_connection(self):
+        async def run():
+            server = CmdServer(ServerImpl)
+            async with await server.start_tcp('127.0.0.1', 0) as tcp_server:
+                client = await self._connect_tcp(tcp_server)
+                client.writer.write(b'exit\n')
+                self.assertEqual(await client.reader.read(), b'* exact: exit\nexiting\n')
+                client.close()
+
+        asyncio.run(run())
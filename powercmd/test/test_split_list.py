@@ -1,6 +1,6 @@
 import unittest
 
-from powercmd.split_list import split_list
+from powercmd.split_list import split_list, split_list_stream
 
 
 class TestSplitList(unittest.TestCase):
@@ -36,3 +36,9 @@ class TestSplitList(unittest.TestCase):
     def test_unmatched_paren_allowed(self):
         self.assertEqual(['(foo,bar'],
                          list(split_list('(foo,bar', allow_unmatched=True)))
+
+    def test_stream(self):
+        self.assertEqual(['foo', '(bar,\nbaz)', 'qux', ''],
+                         list(split_list_stream(['fo', 'o,(bar,', '\nbaz)\nq', 'ux\n'], separators=',\n')))
+        with self.assertRaises(ValueError):
+            list(split_list_stream(['"foo', ',bar']))
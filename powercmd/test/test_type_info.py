@@ -0,0 +1,43 @@
+import collections.abc
+import enum
+import sys
+import unittest
+from typing import Annotated, Dict, FrozenSet, Iterable, List, Literal, Optional, Set, Tuple, Union
+
+from powercmd.type_info import TypeKind, classify, type_name
+
+
+class TestTypeInfo(unittest.TestCase):
+    def test_classify_plain(self):
+        class TestEnum(enum.Enum):
+            A = 1
+
+        self.assertEqual(classify(int), (TypeKind.PLAIN, int, ()))
+        self.assertEqual(classify(list), (TypeKind.PLAIN, list, ()))
+        self.assertEqual(classify(TestEnum), (TypeKind.ENUM, TestEnum, ()))
+
+    def test_classify_generic(self):
+        self.assertEqual(classify(List[int]), (TypeKind.LIST, list, (int,)))
+        self.assertEqual(classify(list[int]), (TypeKind.LIST, list, (int,)))
+        self.assertEqual(classify(Iterable[str]), (TypeKind.ITERABLE, collections.abc.Iterable, (str,)))
+        self.assertEqual(classify(Tuple[int, str]), (TypeKind.TUPLE, tuple, (int, str)))
+        self.assertEqual(classify(Set[int]), (TypeKind.SET, set, (int,)))
+        self.assertEqual(classify(FrozenSet[int]), (TypeKind.SET, frozenset, (int,)))
+        self.assertEqual(classify(Dict[str, int]), (TypeKind.DICT, dict, (str, int)))
+        self.assertEqual(classify(Literal['a', 1]), (TypeKind.LITERAL, Literal, ('a', 1)))
+        self.assertEqual(classify(Annotated[int, 'meta']), (TypeKind.ANNOTATED, Annotated, (int, 'meta')))
+
+    def test_classify_union(self):
+        self.assertEqual(classify(Union[int, str]).args, (int, str))
+        self.assertEqual(classify(Union[str, int]).args, (str, int))
+        self.assertEqual(classify(Optional[int]).args, (int, type(None)))
+
+    @unittest.skipIf(sys.version_info < (3, 10), 'X | Y unions require python>=3.10')
+    def test_classify_union_type(self):
+        self.assertEqual(classify(int | str).kind, TypeKind.UNION)
+        self.assertEqual(classify(int | str).args, (int, str))
+
+    def test_type_name(self):
+        self.assertEqual(type_name(int), 'int')
+        self.assertEqual(type_name(List[int]), str(List[int]))
+        self.assertEqual(type_name(Union[int, str]), str(Union[int, str]))
@@ -0,0 +1,108 @@
+"""
+Classification of type annotations.
+
+Both parsing command arguments and completing them depend on what kind of
+annotation a parameter has: a plain class, an enum, or one of supported
+generic types. `classify` analyzes an annotation once and caches the result,
+so that callers can dispatch on its kind directly instead of probing the
+annotation again on every call.
+"""
+
+import collections
+import collections.abc
+import enum
+import types
+import typing
+from typing import Any, Tuple, get_args, get_origin
+
+
+class TypeKind(enum.Enum):
+    """Kinds of annotations that need to be handled differently."""
+    PLAIN = 'plain'
+    ENUM = 'enum'
+    LIST = 'list'
+    ITERABLE = 'iterable'
+    TUPLE = 'tuple'
+    SET = 'set'
+    DICT = 'dict'
+    UNION = 'union'
+    LITERAL = 'literal'
+    ANNOTATED = 'annotated'
+
+
+# Classification of an annotation. ORIGIN is the class the annotation
+# describes, i.e. the annotation itself for non-generic ones. ARGS are type
+# arguments of a generic, or allowed values of a Literal.
+TypeInfo = collections.namedtuple('TypeInfo', ['kind', 'origin', 'args'])
+
+# generic origin -> kind of annotations with that origin
+_GENERIC_KINDS = {
+    list: TypeKind.LIST,
+    collections.abc.Sequence: TypeKind.LIST,
+    collections.abc.MutableSequence: TypeKind.LIST,
+    collections.abc.Iterable: TypeKind.ITERABLE,
+    collections.abc.Iterator: TypeKind.ITERABLE,
+    tuple: TypeKind.TUPLE,
+    set: TypeKind.SET,
+    frozenset: TypeKind.SET,
+    collections.abc.Set: TypeKind.SET,
+    collections.abc.MutableSet: TypeKind.SET,
+    dict: TypeKind.DICT,
+    collections.OrderedDict: TypeKind.DICT,
+    collections.abc.Mapping: TypeKind.DICT,
+    collections.abc.MutableMapping: TypeKind.DICT,
+    typing.Union: TypeKind.UNION,
+    typing.Literal: TypeKind.LITERAL,
+    typing.Annotated: TypeKind.ANNOTATED,
+}
+if hasattr(types, 'UnionType'):  # X | Y, python>=3.10
+    _GENERIC_KINDS[types.UnionType] = TypeKind.UNION
+
+# annotation key -> TypeInfo
+_TYPE_INFO = {}
+
+
+def annotation_key(annotation: Any) -> Tuple:
+    """
+    Returns a key identifying ANNOTATION in caches. Type arguments are
+    included explicitly, because typing considers e.g. Union[int, str] and
+    Union[str, int] equal, while they are not parsed the same way: the first
+    matching type is used.
+    """
+    return (annotation, tuple(annotation_key(arg)
+                              for arg in getattr(annotation, '__args__', None) or ()))
+
+
+def _classify(annotation: Any) -> TypeInfo:
+    """Returns a TypeInfo describing ANNOTATION."""
+    origin = get_origin(annotation)
+    kind = _GENERIC_KINDS.get(origin)
+    if kind is not None:
+        return TypeInfo(kind, origin, get_args(annotation))
+    if isinstance(annotation, type) and issubclass(annotation, enum.Enum):
+        return TypeInfo(TypeKind.ENUM, annotation, ())
+    return TypeInfo(TypeKind.PLAIN, annotation, ())
+
+
+def classify(annotation: Any) -> TypeInfo:
+    """
+    Returns a TypeInfo describing ANNOTATION. Results are cached, so that
+    every annotation is only analyzed once per process.
+    """
+    try:
+        key = annotation_key(annotation)
+        return _TYPE_INFO[key]
+    except KeyError:
+        info = _classify(annotation)
+        _TYPE_INFO[key] = info
+        return info
+    except TypeError:
+        # unhashable annotation
+        return _classify(annotation)
+
+
+def type_name(annotation: Any) -> str:
+    """Returns a human-readable name of the type described by ANNOTATION."""
+    if classify(annotation).kind in (TypeKind.PLAIN, TypeKind.ENUM) and hasattr(annotation, '__name__'):
+        return annotation.__name__
+    return str(annotation)
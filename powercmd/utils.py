@@ -2,7 +2,9 @@
 Utility functions that do not belong anywhere else.
 """
 
-from typing import Any, List, Tuple, Union
+from typing import Any, List
+
+from powercmd.type_info import TypeKind, classify
 
 
 def get_available_instance_names(cls: type,
@@ -43,27 +45,26 @@ def match_instance(cls: type,
 
 def is_generic_list(annotation: Any):
     """Checks if ANNOTATION is List[...]."""
-    # python<3.7 reports List in __origin__, while python>=3.7 reports list
-    return getattr(annotation, '__origin__', None) in (List, list)
+    return classify(annotation).kind is TypeKind.LIST
 
 
 def is_generic_tuple(annotation: Any):
     """Checks if ANNOTATION is Tuple[...]."""
-    # python<3.7 reports Tuple in __origin__, while python>=3.7 reports tuple
-    return getattr(annotation, '__origin__', None) in (Tuple, tuple)
+    return classify(annotation).kind is TypeKind.TUPLE
+
+
+def is_generic_iterable(annotation: Any):
+    """Checks if ANNOTATION is Iterable[...] or Iterator[...]."""
+    return classify(annotation).kind is TypeKind.ITERABLE
 
 
 def is_generic_union(annotation: Any):
     """Checks if ANNOTATION is Union[...]."""
-    # python<3.6 does not have __origin__
-    return (hasattr(annotation, '__union_params__')
-            or getattr(annotation, '__origin__', None) in (Union,))
+    return classify(annotation).kind is TypeKind.UNION
 
 
 def is_generic_type(annotation: Any) -> bool:
     """
     Checks if the type described by ANNOTATION is a generic one.
     """
-    return (is_generic_list(annotation)
-            or is_generic_tuple(annotation)
-            or is_generic_union(annotation))
+    return classify(annotation).kind not in (TypeKind.PLAIN, TypeKind.ENUM)
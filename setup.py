@@ -17,4 +17,5 @@ setup(name='powercmd',
       license='MIT',
       packages=['powercmd'],
       zip_safe=True,
+      python_requires='>=3.9',
       install_requires=['prompt_toolkit >= 2.0'])